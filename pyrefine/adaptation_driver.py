@@ -8,10 +8,13 @@ from pbs4py import PBS
 
 from .component_base import ComponentBase
 from .controller.basic import ControllerBasic
+from .controller.budget import ControllerBudget
 from .directory_utils import cd
 from .refine.multiscale import RefineMultiscale
 from .shell_utils import cp, mkdir
 from .simulation.fun3d import SimulationFun3dFV
+from .telemetry import AdaptationTelemetry
+from .work_queue import PersistentWorkerLauncher
 
 
 class AdaptationDriver:
@@ -60,6 +63,18 @@ class AdaptationDriver:
         #: :class:`~pyrefine.refine.base.RefineBase`: the refine driver object
         self.refine = RefineMultiscale(project_name)
 
+        #: int: If set, serve live telemetry of the adaptation on this port at
+        #:      http://localhost:<port>/metrics (Prometheus text) and /metrics.json.
+        #:      The default is None, which does not start the server
+        self.telemetry_port = None
+
+        #: str: JSON lines event log of the telemetry in the Flow directory. Only written
+        #:      when the telemetry server is enabled
+        self.telemetry_event_log = "telemetry_events.jsonl"
+
+        #: :class:`~pyrefine.telemetry.AdaptationTelemetry`: the live state of the adaptation
+        self.telemetry = AdaptationTelemetry(project_name)
+
     def set_iterations(self, start_iteration, final_iteration):
         """
         Set the starting and ending iteration of the adaptation cycle.
@@ -93,25 +108,58 @@ class AdaptationDriver:
         self._prepare_flow_directory()
 
         with cd("./Flow"):
-            self.refine.translate_mesh(self.start_iteration)
-
-            for istep in range(self.start_iteration, self.final_iteration + 1):
-                print(f"Begin adaptation step {istep}")
-                self._check_for_stop_file(istep)
-                early_stop = self._run_adapt_iteration(istep, skip_final_refine_call)
-                self.controller.cleanup(istep)
-                if early_stop:
-                    break
-                self.istep = istep
+            self._start_telemetry()
+            try:
+                self.refine.translate_mesh(self.start_iteration)
+
+                for istep in range(self.start_iteration, self.final_iteration + 1):
+                    print(f"Begin adaptation step {istep}")
+                    self._check_for_stop_file(istep)
+                    early_stop = self._run_adapt_iteration(istep, skip_final_refine_call)
+                    self.controller.cleanup(istep)
+                    if early_stop:
+                        break
+                    self.istep = istep
+                self.telemetry.record_event("finish")
+            finally:
+                self._stop_persistent_workers()
+                self.telemetry.stop_server()
+
+    def _start_telemetry(self):
+        """
+        If a telemetry port is set, log the telemetry events and start the metrics server.
+        The events of a previous run are replayed so a restart keeps the history.
+        """
+        if self.telemetry_port is None:
+            return
+        self.telemetry.event_log_filename = self.telemetry_event_log
+        self.telemetry.load_event_log()
+        port = self.telemetry.start_server(self.telemetry_port)
+        print(f"Serving adaptation telemetry at http://localhost:{port}/metrics")
+        self.telemetry.record_event("start", start_iteration=self.start_iteration,
+                                    final_iteration=self.final_iteration)
+
+    def _stop_persistent_workers(self):
+        """
+        Release the nodes of the persistent workers instead of holding them until their idle timeout
+        """
+        for component in self.component_list:
+            if isinstance(component.pbs, PersistentWorkerLauncher):
+                component.pbs.stop_worker()
 
     def _check_pbs(self):
         """
         If a component already has a pbs handler, let them use that, else
-        give them one
+        give them one. A budget controller is charged for the simulation and refine jobs
         """
         for component in self.component_list:
             if component.pbs is None:
                 component.pbs = self.pbs
+        if isinstance(self.controller, ControllerBudget):
+            if self.controller.simulation_pbs is None:
+                self.controller.simulation_pbs = self.simulation.pbs
+            if self.controller.refine_pbs is None:
+                self.controller.refine_pbs = self.refine.pbs
 
     def _check_component_vertices_per_core(self):
         """
@@ -132,18 +180,26 @@ class AdaptationDriver:
         | 3. Compute the metric field
         """
 
-        # set up
-        self._set_node_request_size(istep)
-        self._copy_mapbc_file(istep)
-        self.controller.update_inputs(istep)
+        self.telemetry.start_cycle(istep)
+
+        with self.telemetry.phase("setup"):
+            self._set_node_request_size(istep)
+            self._copy_mapbc_file(istep)
+            self.controller.update_inputs(istep)
+            self.simulation.complexity = self.current_complexity
 
-        self.simulation.run(istep)
+        with self.telemetry.phase("simulation"):
+            self.simulation.run(istep)
+        self.telemetry.record_monitor_values(self.simulation.get_final_monitor_values(istep))
 
-        self.current_complexity = self.controller.compute_complexity(istep + 1, self.current_complexity)
-        early_stop = self.controller.check_for_early_stop_condition(istep)
+        with self.telemetry.phase("controller"):
+            self.current_complexity = self.controller.compute_complexity(istep + 1, self.current_complexity)
+            early_stop = self.controller.check_for_early_stop_condition(istep)
+        self.telemetry.record_complexity(self.current_complexity)
 
         if not self._skip_refine_call(skip_final_refine_call, istep, early_stop):
-            self.refine.run(istep, self.current_complexity)
+            with self.telemetry.phase("refine"):
+                self.refine.run(istep, self.current_complexity)
         return early_stop
 
     def _skip_refine_call(self, skip_final_refine_call, istep, early_stop):
@@ -163,6 +219,10 @@ class AdaptationDriver:
             cores_request = vertex_count / component.vertices_per_cpu_core
             request = int(np.ceil(cores_request / component.pbs.ncpus_per_node))
             component.pbs.requested_number_of_nodes = request
+        node_requests = {"simulation": self.simulation.pbs.requested_number_of_nodes,
+                         "controller": self.controller.pbs.requested_number_of_nodes,
+                         "refine": self.refine.pbs.requested_number_of_nodes}
+        self.telemetry.record_mesh_size(vertex_count, node_requests)
 
     def _check_if_ready(self):
         """
@@ -1,6 +1,8 @@
 from .base import ControllerBase
 from .basic import ControllerBasic
+from .budget import ControllerBudget
 from .aoa_sweep import ControllerAoaSweep
 from .monitor_forces import ControllerMonitorForcesFUN3D, ControllerMonitorForcesSFE
 from .monitor_quantity import ControllerMonitorQuantity
+from .richardson import ControllerRichardsonExtrapolation, ControllerRichardsonForcesFUN3D, ControllerRichardsonForcesSFE
 from .smooth_transition import ControllerSmoothTransition
@@ -1,8 +1,8 @@
 import numpy as np
-import f90nml
 
 from .base import ControllerBase
 from pbs4py import PBS
+from pyrefine.simulation.input_renderer import InputRenderer
 
 
 class ControllerAoaSweep(ControllerBase):
@@ -46,18 +46,22 @@ class ControllerAoaSweep(ControllerBase):
         #: list[str]: The list of fun3d namelist files to adjust the angle of attack in
         self.fun3d_nml_list = ['fun3d.nml']
 
+        #: :class:`~pyrefine.simulation.input_renderer.InputRenderer`: Stores the angle of attack as an overlay
+        #:   of the namelist templates for each cycle, which the simulation applies when it renders its inputs.
+        #:   The templates in the root directory are not modified.
+        self.input_renderer = InputRenderer()
+
     def update_inputs(self, istep):
         """
         Update the angle of attack based on the schedule
         """
         aoa = self._compute_angle_of_attack(istep)
-        self._set_angle_of_attack_in_fun3d_nmls(aoa)
+        self._set_angle_of_attack_in_fun3d_nmls(istep, aoa)
 
-    def _set_angle_of_attack_in_fun3d_nmls(self, aoa):
+    def _set_angle_of_attack_in_fun3d_nmls(self, istep, aoa):
         for nml_file in self.fun3d_nml_list:
-            nml = f90nml.read(f'../{nml_file}')
-            nml['reference_physical_properties']['angle_of_attack'] = aoa
-            nml.write(f'../{nml_file}', force=True)
+            overlay = {'reference_physical_properties': {'angle_of_attack': float(aoa)}}
+            self.input_renderer.set_overlay(f'../{nml_file}', overlay, istep)
 
     def _compute_phase_info(self, istep):
         steps_per_aoa = (self.steps_per_complexity_at_aoa * self.complexity_levels_per_aoa
@@ -36,7 +36,7 @@ class ControllerBase(ComponentBase):
         #             if save_all is True
         self.file_extensions_to_cleanup_every_step = [".lb8.ugrid", "-distance.solb", ".flow",
                                                       "-mach.solb", "-metric.solb", "_volume*.solb",
-                                                      "-prim-adj.solb", ]
+                                                      "-prim-adj.solb", "_snapshot_*.solb"]
 
         #: List[str]: extensions of files to remove at the end of each adaptation cycle except for
         #             steps that are multiples of restart_save_frequency.
@@ -0,0 +1,359 @@
+import datetime
+import glob
+import json
+import os
+import re
+import time
+from typing import List
+
+import numpy as np
+from pbs4py import PBS
+
+from .base import ControllerBase
+
+
+class ControllerBudget(ControllerBase):
+    def __init__(self, project_name: str, pbs: PBS = None):
+        """
+        A controller that schedules the complexity to reach the highest final complexity
+        within a wall clock or core-hour budget.
+
+        The wall time of each adaptation cycle is measured as the time between complexity calculations.
+        The core hours are measured from the run time of the flow and refine jobs of the cycle, so the time the
+        jobs wait in the PBS queue is not charged. The cost is fit as ``cost = a * vertices^b`` with a least
+        squares fit in log-log space.
+        Until there are cycles at two different mesh sizes, the exponent is
+        :attr:`~default_cost_exponent`. After every cycle, the fit is updated and the number of steps per
+        complexity level and the complexity multiplier are re-planned to maximize the final complexity
+        that can be reached with the remaining budget.
+        Among plans that reach nearly the same final complexity, the plan with more steps per
+        complexity level is preferred, then the one with fewer complexity levels.
+        The adaptation is stopped early once the remaining budget can not afford another cycle.
+
+        Set either :attr:`~wall_time_budget` or :attr:`~core_hour_budget`.
+        The run time of a job is read from the ``Flow{N}`` or ``Refine{N}`` start and end time lines in its
+        ``*_pbs.log`` file and is charged with the node request of :attr:`~simulation_pbs` or :attr:`~refine_pbs`,
+        which the adaptation driver sets. If no job of a cycle has these lines, e.g., when the jobs run without
+        PBS, the wall time of the cycle is charged with the largest node request instead.
+
+        Parameters
+        ----------
+        project_name:
+            The root name of the project (without any mesh numbers)
+        pbs:
+            PBS queue helper
+        """
+        super().__init__(project_name, pbs)
+
+        #: float: The wall clock budget of the adaptation in hours
+        self.wall_time_budget = None
+
+        #: float: The core-hour budget of the adaptation
+        self.core_hour_budget = None
+
+        #: int: The fewest meshes per complexity level
+        self.minimum_steps_per_complexity = 2
+
+        #: int: The most meshes per complexity level
+        self.maximum_steps_per_complexity = 5
+
+        #: float: The smallest multiplier applied to the complexity when the complexity is increased
+        self.minimum_complexity_multiplier = 1.25
+
+        #: float: The largest multiplier applied to the complexity when the complexity is increased
+        self.maximum_complexity_multiplier = 2.0
+
+        #: float: The exponent of the cost fit until cycles at two mesh sizes are available
+        self.default_cost_exponent = 1.0
+
+        #: float: Plans whose final complexity is within this fraction of the best plan are
+        #:   considered equivalent, and the one with the most steps per complexity is chosen
+        self.complexity_tolerance = 0.05
+
+        #: bool: Measure the vertex count of the meshes with ``ref examine``.
+        #:   If False or the count can not be determined, the complexity is used as the mesh size
+        self.measure_vertex_count = True
+
+        #: :class:`PBS`: The pbs handler of the flow jobs charged to the core-hour budget.
+        #:   If None, the adaptation driver sets it to the pbs handler of the simulation
+        self.simulation_pbs: PBS = None
+
+        #: :class:`PBS`: The pbs handler of the refine jobs charged to the core-hour budget.
+        #:   If None, the adaptation driver sets it to the pbs handler of the refine component
+        self.refine_pbs: PBS = None
+
+        #: str: The file used to restart the budget accounting
+        self.state_filename = 'budget_controller_state.json'
+
+        #: list: The adaptation step, complexity, mesh size, wall time in hours, and core hours of each cycle
+        self.cycle_history: List[dict] = []
+
+        #: int: The currently planned number of meshes per complexity
+        self.steps_per_complexity = self.maximum_steps_per_complexity
+
+        #: float: The currently planned complexity multiplier
+        self.complexity_multiplier = self.maximum_complexity_multiplier
+
+        #: float: The complexity of the current level
+        self.level_complexity = None
+
+        #: int: The number of completed meshes at the current complexity level
+        self.steps_at_current_complexity = 0
+
+        #: bool: Whether the remaining budget can not afford another cycle
+        self.budget_exhausted = False
+
+        self._cycle_start_time = None
+        self._refine_core_count = None
+
+    def update_inputs(self, istep: int):
+        if self._cycle_start_time is None:
+            self._cycle_start_time = time.time()
+
+    def compute_complexity(self, istep: int, current_complexity: float) -> float:
+        """
+        Record the cost of the cycle that just finished, re-plan the schedule, and compute the complexity
+        for the upcoming adaptation cycle, istep.
+
+        Parameters
+        ----------
+        istep:
+            Adaptation step number
+        current_complexity:
+            The current complexity in the driver. If doing a restart, the current
+            complexity will be `None`
+
+        Returns
+        -------
+        complexity:
+        """
+        if self.wall_time_budget is None and self.core_hour_budget is None:
+            raise ValueError('ControllerBudget requires wall_time_budget or core_hour_budget to be set')
+
+        now = time.time()
+        if self.level_complexity is None and self._beginning_of_a_restart(istep, current_complexity):
+            self._read_state()
+        if self.level_complexity is None:
+            self.level_complexity = self.initial_complexity if current_complexity is None else current_complexity
+
+        start_time = self._cycle_start_time if self._cycle_start_time is not None else now
+        self._record_cycle(istep - 1, (now - start_time) / 3600.0)
+        self._cycle_start_time = now
+        self.steps_at_current_complexity += 1
+
+        complexity = self._plan_next_complexity()
+        # the refine job of this cycle runs next with the current node request and is charged in the next cycle
+        self._refine_core_count = self._get_core_count(self.refine_pbs)
+        self._save_state()
+        print(f'Complexity: {complexity}, remaining budget: {self.get_remaining_budget():.4g},',
+              f'plan: {self.steps_per_complexity} steps per complexity, multiplier {self.complexity_multiplier:.3f}')
+        return complexity
+
+    def check_for_early_stop_condition(self, istep: int) -> bool:
+        if self.budget_exhausted:
+            print('The remaining budget can not afford another adaptation cycle. Stopping the adaptation')
+        return self.budget_exhausted
+
+    def get_remaining_budget(self) -> float:
+        """
+        The remaining wall clock hours or core hours
+        """
+        budget = self.wall_time_budget if self.wall_time_budget is not None else self.core_hour_budget
+        return budget - sum(self._get_cycle_cost(cycle) for cycle in self.cycle_history)
+
+    def fit_cost_model(self):
+        """
+        Fit the measured cycle costs with ``cost = a * vertices^b``
+
+        Returns
+        -------
+        coefficient:
+            The coefficient, a
+        exponent:
+            The exponent, b
+        """
+        sizes = np.array([cycle['vertex_count'] for cycle in self.cycle_history], dtype=float)
+        costs = np.array([self._get_cycle_cost(cycle) for cycle in self.cycle_history], dtype=float)
+        valid = (sizes > 0.0) & (costs > 0.0)
+        if not np.any(valid):
+            raise ValueError('No cycle costs have been measured')
+        sizes, costs = sizes[valid], costs[valid]
+
+        exponent = self.default_cost_exponent
+        if np.unique(sizes).size > 1:
+            exponent = float(np.polyfit(np.log(sizes), np.log(costs), 1)[0])
+            if exponent <= 0.0:
+                exponent = self.default_cost_exponent
+        coefficient = float(np.exp(np.mean(np.log(costs) - exponent * np.log(sizes))))
+        return coefficient, exponent
+
+    def predict_cycle_cost(self, complexity: float) -> float:
+        """
+        The predicted cost of a cycle at the given complexity
+        """
+        coefficient, exponent = self.fit_cost_model()
+        last_cycle = self.cycle_history[-1]
+        vertices_per_complexity = last_cycle['vertex_count'] / last_cycle['complexity']
+        return coefficient * (vertices_per_complexity * complexity) ** exponent
+
+    def plan_schedule(self, remaining_budget: float):
+        """
+        Find the number of steps per complexity and complexity multiplier that reach the highest
+        final complexity with the remaining budget
+
+        Parameters
+        ----------
+        remaining_budget:
+            The wall clock hours or core hours left
+
+        Returns
+        -------
+        plan:
+            The steps per complexity, complexity multiplier, and final complexity of the best plan
+            or None if the budget can not afford another complexity level
+        """
+        current_cost = self.predict_cycle_cost(self.level_complexity)
+        max_complexity = np.inf if self.final_complexity is None else self.final_complexity
+
+        plans = []
+        for steps in range(self.minimum_steps_per_complexity, self.maximum_steps_per_complexity + 1):
+            base_cost = max(steps - self.steps_at_current_complexity, 0) * current_cost
+            nlevels = 1
+            while True:
+                def total_cost(multiplier):
+                    levels = self.level_complexity * multiplier ** np.arange(1, nlevels + 1)
+                    return base_cost + steps * sum(self.predict_cycle_cost(c) for c in levels)
+
+                low, high = self.minimum_complexity_multiplier, self.maximum_complexity_multiplier
+                high = min(high, (max_complexity / self.level_complexity) ** (1.0 / nlevels))
+                if high < low or total_cost(low) > remaining_budget:
+                    break
+                if total_cost(high) > remaining_budget:
+                    for _ in range(50):
+                        middle = 0.5 * (low + high)
+                        if total_cost(middle) > remaining_budget:
+                            high = middle
+                        else:
+                            low = middle
+                    high = low
+                plans.append((self.level_complexity * high ** nlevels, steps, high))
+                nlevels += 1
+
+        if len(plans) == 0:
+            return None
+        best_complexity = max(plan[0] for plan in plans)
+        equivalent_plans = [plan for plan in plans if plan[0] >= (1.0 - self.complexity_tolerance) * best_complexity]
+        final_complexity, steps, multiplier = max(equivalent_plans, key=lambda plan: (plan[1], plan[2]))
+        return steps, multiplier, final_complexity
+
+    def _plan_next_complexity(self) -> float:
+        remaining_budget = self.get_remaining_budget()
+        plan = self.plan_schedule(remaining_budget)
+        if plan is not None:
+            self.steps_per_complexity, self.complexity_multiplier, final_complexity = plan
+            print(f'Budget plan reaches a final complexity of {final_complexity:.6g}')
+            if self.steps_at_current_complexity >= self.steps_per_complexity:
+                self.level_complexity *= self.complexity_multiplier
+                self.steps_at_current_complexity = 0
+        elif self.predict_cycle_cost(self.level_complexity) > remaining_budget:
+            self.budget_exhausted = True
+        return self.level_complexity
+
+    def _record_cycle(self, istep: int, wall_time: float):
+        vertex_count = None
+        if self.measure_vertex_count:
+            try:
+                vertex_count = self._get_vertex_count(istep)
+            except (RuntimeError, ValueError, OSError) as error:
+                print(f'Could not determine the vertex count of step {istep}. Using the complexity instead: {error}')
+        if vertex_count is None:
+            vertex_count = self.level_complexity
+        self.cycle_history.append({'istep': istep, 'complexity': self.level_complexity,
+                                   'vertex_count': vertex_count, 'wall_time': wall_time,
+                                   'core_hours': self._measure_core_hours(istep, wall_time)})
+
+    def _measure_core_hours(self, istep: int, wall_time: float) -> float:
+        """
+        The core hours of the refine job that created the mesh of step `istep` and the flow jobs of step `istep`
+        """
+        refine_core_count = self._refine_core_count
+        if refine_core_count is None:
+            refine_core_count = self._get_core_count(self.refine_pbs)
+        job_hours = {'Flow': read_job_run_hours('Flow', istep), 'Refine': read_job_run_hours('Refine', istep - 1)}
+        if job_hours['Flow'] is None and job_hours['Refine'] is None:
+            return wall_time * max(self._get_core_count(self.simulation_pbs), refine_core_count)
+        core_hours = 0.0
+        if job_hours['Flow'] is not None:
+            core_hours += job_hours['Flow'] * self._get_core_count(self.simulation_pbs)
+        if job_hours['Refine'] is not None:
+            core_hours += job_hours['Refine'] * refine_core_count
+        return core_hours
+
+    def _get_core_count(self, pbs: PBS) -> int:
+        if pbs is None:
+            return 1
+        return pbs.requested_number_of_nodes * pbs.ncpus_per_node
+
+    def _beginning_of_a_restart(self, istep: int, current_complexity: float) -> bool:
+        # note: controller called with istep+1 at the end of step 1 in order to set complexity for next adaptation cycle
+        return current_complexity is None and istep != 2
+
+    def _get_cycle_cost(self, cycle: dict) -> float:
+        return cycle['wall_time'] if self.wall_time_budget is not None else cycle['core_hours']
+
+    def _save_state(self):
+        state = {'level_complexity': self.level_complexity,
+                 'steps_at_current_complexity': self.steps_at_current_complexity,
+                 'cycle_history': self.cycle_history}
+        with open(self.state_filename, 'w') as fh:
+            json.dump(state, fh, indent=2)
+
+    def _read_state(self):
+        if not os.path.isfile(self.state_filename):
+            return
+        with open(self.state_filename, 'r') as fh:
+            state = json.load(fh)
+        self.level_complexity = state['level_complexity']
+        self.steps_at_current_complexity = state['steps_at_current_complexity']
+        self.cycle_history = state['cycle_history']
+
+
+def read_job_run_hours(label: str, istep: int):
+    """
+    The run time of the jobs of step `istep` from the ``{label}{istep} Start Time:`` and
+    ``{label}{istep} End Time:`` lines that the jobs print to their ``*_pbs.log`` files
+
+    Returns
+    -------
+    hours:
+        The summed run time of the start and end pairs or None if no complete pair was found
+    """
+    pattern = re.compile(rf'^{label}{istep} (Start|End) Time: (.*)$')
+    hours = None
+    for log_file in sorted(glob.glob(f'*{istep:02d}_pbs.log')):
+        start = None
+        with open(log_file, 'r', errors='replace') as fh:
+            for line in fh:
+                match = pattern.match(line.strip())
+                if match is None:
+                    continue
+                date = _parse_date(match.group(2))
+                if match.group(1) == 'Start':
+                    start = date
+                elif start is not None and date is not None:
+                    hours = (0.0 if hours is None else hours) + (date - start).total_seconds() / 3600.0
+                    start = None
+    return hours
+
+
+def _parse_date(text: str):
+    # the output of `date` with the time zone dropped, which is the same for the start and end of a job
+    words = [word for word in text.split() if not (word.isalpha() and word.isupper() and len(word) > 2)]
+    text = ' '.join(words)
+    for date_format in ['%a %b %d %H:%M:%S %Y', '%a %d %b %Y %H:%M:%S', '%a %b %d %I:%M:%S %p %Y',
+                        '%a %d %b %Y %I:%M:%S %p']:
+        try:
+            return datetime.datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+    return None
@@ -1,6 +1,6 @@
-from typing import List
+from typing import Dict, List
 
-from pyrefine.shell_utils import grep
+from pyrefine.shell_utils import grep_multiple
 
 from .monitor_quantity import ControllerMonitorQuantity
 
@@ -64,15 +64,12 @@ class ControllerMonitorForcesFUN3D(ControllerMonitorQuantity):
             Variables to be monitored
         """
         forces_file = f'{self._create_project_rootname(istep)}.forces'
-        values = [self._read_cost_function_from_forces_file(forces_file, key)
-                  for key, value in self.monitor_dict.items() if value]
-        return values
+        names = [key for key, value in self.monitor_dict.items() if value]
+        values = read_last_cost_function_values(forces_file, names)
+        return [values[name] for name in names]
 
     def _read_cost_function_from_forces_file(self, forces_file, cost_function_name):
-        regex_scientific_number = '-*[0-9].[0-9]+[Ee]\\+*-*[0-9][0-9]'
-        regex_for_cost_function_name_and_value = f'{cost_function_name}[ ]*=[ ]*{regex_scientific_number}'
-        cost_function_string = grep(regex_for_cost_function_name_and_value, forces_file, tail=1, match_only=True)
-        return float(cost_function_string[0].split("=")[-1])
+        return read_last_cost_function_values(forces_file, [cost_function_name])[cost_function_name]
 
 
 class ControllerMonitorForcesSFE(ControllerMonitorQuantity):
@@ -115,15 +112,42 @@ class ControllerMonitorForcesSFE(ControllerMonitorQuantity):
         """
         project = self._create_project_rootname(istep)
         log_file = f'{project}_sfe.out'
-        values = []
+        names = []
         if self.monitor_cl:
-            values.append(self._read_cost_function_from_log_file(log_file, 'CL'))
+            names.append('CL')
         if self.monitor_cd:
-            values.append(self._read_cost_function_from_log_file(log_file, 'CD'))
-        return values
+            names.append('CD')
+        values = read_last_cost_function_values(log_file, names)
+        return [values[name] for name in names]
 
     def _read_cost_function_from_log_file(self, log_file, cost_function_name):
-        regex_scientific_number = '-*[0-9].[0-9]+[Ee]\\+*-*[0-9][0-9]'
-        regex_for_cost_function_name_and_value = f'{cost_function_name}[ ]*=[ ]*{regex_scientific_number}'
-        cost_function_string = grep(regex_for_cost_function_name_and_value, log_file, tail=1, match_only=True)
-        return float(cost_function_string[0].split("=")[-1])
+        return read_last_cost_function_values(log_file, [cost_function_name])[cost_function_name]
+
+
+def read_last_cost_function_values(filename: str, cost_function_names: List[str]) -> Dict[str, float]:
+    """
+    Read the last value of each ``name = value`` entry with a single reverse scan of the file
+
+    Parameters
+    ----------
+    filename:
+        The forces or log file
+    cost_function_names:
+        The names of the cost functions, e.g., ['Cl', 'Cd']
+
+    Returns
+    -------
+    values:
+        The last value of each cost function
+    """
+    if len(cost_function_names) == 0:
+        return {}
+    regex_scientific_number = '-*[0-9].[0-9]+[Ee]\\+*-*[0-9][0-9]'
+    patterns = [f'{name}[ ]*=[ ]*{regex_scientific_number}' for name in cost_function_names]
+    found_strings = grep_multiple(patterns, filename, tail=1, match_only=True)
+    values = {}
+    for name, pattern in zip(cost_function_names, patterns):
+        if len(found_strings[pattern]) == 0:
+            raise ValueError(f'Could not find {name} in {filename}')
+        values[name] = float(found_strings[pattern][0].split("=")[-1])
+    return values
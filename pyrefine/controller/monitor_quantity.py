@@ -1,5 +1,6 @@
 import ast
-from typing import List
+import json
+from typing import Dict, List
 
 import numpy as np
 from pbs4py import PBS
@@ -38,6 +39,9 @@ class ControllerMonitorQuantity(ControllerBase):
         #:  The default value is 2.0.
         self.complexity_multiplier = 2.0
 
+        #: dict: The monitored quantities of each adaptation step that have been read
+        self.monitored_quantity_cache: Dict[int, List[float]] = {}
+
     def compute_complexity(self, istep: int, current_complexity: float) -> float:
         """
         Compute the complexity for the upcoming step based in the convergence
@@ -68,7 +72,7 @@ class ControllerMonitorQuantity(ControllerBase):
         self._save_controller_state(current_complexity)
 
         if self._complexity_should_be_increased():
-            current_complexity *= self.complexity_multiplier
+            current_complexity = self._increase_complexity(current_complexity)
             self._reset_monitored_state()
 
         print("Complexity:", current_complexity)
@@ -91,14 +95,36 @@ class ControllerMonitorQuantity(ControllerBase):
                 return True
         return False
 
+    def _increase_complexity(self, current_complexity: float) -> float:
+        return current_complexity * self.complexity_multiplier
+
     def _reset_monitored_state(self):
         self.steps_at_current_complexity = 0
         self.quantity_history = []
 
     def _get_monitored_state(self, istep: int):
-        self.quantity_history.append(self.get_monitored_quantities_for_step(istep))
+        self.quantity_history.append(self.get_cached_monitored_quantities(istep))
         self.steps_at_current_complexity += 1
 
+    def get_cached_monitored_quantities(self, istep: int) -> List[float]:
+        """
+        The monitored quantities of adaptation cycle `istep`. The simulation output
+        is only read the first time a step is queried.
+
+        Parameters
+        ----------
+        istep:
+            Adaptation step number
+
+        Returns
+        -------
+        quantities:
+            Variables to be monitored
+        """
+        if istep not in self.monitored_quantity_cache:
+            self.monitored_quantity_cache[istep] = self.get_monitored_quantities_for_step(istep)
+        return self.monitored_quantity_cache[istep]
+
     def _taken_minimum_number_of_steps_at_complexity(self, steps_at_current_complexity: int):
         return steps_at_current_complexity > 3
 
@@ -114,24 +140,28 @@ class ControllerMonitorQuantity(ControllerBase):
         return np.all(normalized_differences < self.relative_tolerance)
 
     def _save_controller_state(self, current_complexity, output_filename='controller_state.txt'):
-        state = {'current_complexity': current_complexity,
-                 'steps_at_current_complexity': self.steps_at_current_complexity,
-                 'quantity_history': self.quantity_history}
+        state = self._get_controller_state(current_complexity)
         with open(output_filename, 'w') as f:
-            f.write(str(state))
+            json.dump(state, f)
             f.write('\n')
 
     def _read_controller_restart_state(self, restart_file='controller_state.txt'):
         try:
-            with open(restart_file, 'r') as f:
-                state = ast.literal_eval(f.read())
-            current_complexity = state['current_complexity']
-            self.steps_at_current_complexity = state['steps_at_current_complexity']
-            self.quantity_history = state['quantity_history']
-        except:
-            raise RuntimeError('Unable to read previous controller state during restart')
+            current_complexity = self._set_controller_state(read_controller_state(restart_file))
+        except (OSError, ValueError, SyntaxError, KeyError, TypeError) as error:
+            raise RuntimeError('Unable to read previous controller state during restart') from error
         return current_complexity
 
+    def _get_controller_state(self, current_complexity) -> dict:
+        return {'current_complexity': current_complexity,
+                'steps_at_current_complexity': self.steps_at_current_complexity,
+                'quantity_history': self.quantity_history}
+
+    def _set_controller_state(self, state: dict) -> float:
+        self.steps_at_current_complexity = state['steps_at_current_complexity']
+        self.quantity_history = state['quantity_history']
+        return state['current_complexity']
+
     def get_monitored_quantities_for_step(self, istep: int) -> List[float]:
         """
         function to extract list of quantities to be monitored from the
@@ -148,3 +178,26 @@ class ControllerMonitorQuantity(ControllerBase):
             Variables to be monitored
         """
         raise NotImplementedError('monitoring controllers must implement method to get monitored_quantities for step')
+
+
+def read_controller_state(filename: str) -> dict:
+    """
+    Read a controller state file. The state is stored as JSON, but files written
+    by older versions of pyrefine, which are python dictionary literals, can also be read.
+
+    Parameters
+    ----------
+    filename:
+        The controller state file
+
+    Returns
+    -------
+    state:
+        The controller state
+    """
+    with open(filename, 'r') as f:
+        contents = f.read()
+    try:
+        return json.loads(contents)
+    except json.JSONDecodeError:
+        return ast.literal_eval(contents)
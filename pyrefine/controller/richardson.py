@@ -0,0 +1,192 @@
+from typing import List, Tuple
+
+import numpy as np
+from pbs4py import PBS
+
+from .monitor_forces import ControllerMonitorForcesFUN3D, ControllerMonitorForcesSFE
+from .monitor_quantity import ControllerMonitorQuantity
+
+
+class ControllerRichardsonExtrapolation(ControllerMonitorQuantity):
+    def __init__(self, project_name: str, pbs: PBS = None, **kwargs):
+        """
+        A controller that chooses the complexity multiplier from a Richardson extrapolation
+        of the monitored quantities across complexity levels.
+
+        When the quantities have settled at a complexity level, the mean of the last three values is
+        recorded as the value of that level. With the mesh size h proportional to complexity^(-1/3),
+        the quantities are fit with q(h) = q_inf + A h^p, where the order of convergence, p, is computed
+        from the last three levels or the assumed order is used if only two levels are available.
+        The next complexity is chosen so that the estimated discretization error, ``|A| h^p``,
+        reaches ``target_relative_error``, and the adaptation stops once the estimated error of the
+        current level is within the target.
+
+        Like :class:`~pyrefine.controller.monitor_quantity.ControllerMonitorQuantity`, you should subclass and
+        implement the :func:`~get_monitored_quantities_for_step` method, or use
+        :class:`ControllerRichardsonForcesFUN3D` or :class:`ControllerRichardsonForcesSFE`.
+
+        Parameters
+        ----------
+        project_name:
+            The root name of the project (without any mesh numbers)
+        pbs:
+            PBS queue helper
+        """
+        super().__init__(project_name, pbs, **kwargs)
+
+        #: float: The target relative discretization error of the monitored quantities
+        self.target_relative_error = 1e-3
+
+        #: float: The order of convergence used when there are only two complexity levels or the
+        #:   observed order can not be computed, e.g., the quantities do not converge monotonically
+        self.assumed_order = 2.0
+
+        #: float: Lower bound of the observed order of convergence
+        self.minimum_order = 0.5
+
+        #: float: Upper bound of the observed order of convergence
+        self.maximum_order = 4.0
+
+        #: float: Smallest complexity multiplier when the target error has not been reached
+        self.minimum_complexity_multiplier = 1.5
+
+        #: float: Largest complexity multiplier
+        self.maximum_complexity_multiplier = 8.0
+
+        #: float: The quantities at a complexity level are also considered settled once the changes
+        #:   within the level are less than this fraction of the estimated discretization error of the
+        #:   previous level
+        self.level_tolerance_fraction = 0.1
+
+        #: list: The complexity and settled values of the quantities of each completed complexity level
+        self.level_history: List[Tuple[float, List[float]]] = []
+
+        #: bool: Whether the estimated error of the last level is within the target
+        self.target_error_met = False
+
+    def check_for_early_stop_condition(self, istep: int) -> bool:
+        if self.target_error_met:
+            print('Estimated discretization error is within the target. Stopping the adaptation')
+        return self.target_error_met
+
+    def estimate_discretization_error(self):
+        """
+        Fit the settled values of the complexity levels
+
+        Returns
+        -------
+        extrapolated_values:
+            The estimated value of each quantity on an infinitely fine mesh
+        coefficients:
+            The coefficient, A, of each quantity
+        orders:
+            The order of convergence, p, of each quantity
+        """
+        # repeated levels at the same complexity, e.g., once final_complexity is reached, replace the earlier ones
+        levels = {}
+        for complexity, values in self.level_history:
+            levels.pop(complexity, None)
+            levels[complexity] = values
+        if len(levels) < 2:
+            raise ValueError('At least two complexity levels are needed to estimate the discretization error')
+        complexities = np.array(list(levels.keys())[-3:], dtype=float)
+        values = np.array(list(levels.values())[-3:], dtype=float)
+        h = complexities ** (-1.0 / 3.0)
+
+        extrapolated_values = np.zeros(values.shape[1])
+        coefficients = np.zeros(values.shape[1])
+        orders = np.zeros(values.shape[1])
+        for i in range(values.shape[1]):
+            q = values[:, i]
+            order = self._compute_observed_order(h, q) if len(q) == 3 else self.assumed_order
+            coefficients[i] = (q[-2] - q[-1]) / (h[-2] ** order - h[-1] ** order)
+            extrapolated_values[i] = q[-1] - coefficients[i] * h[-1] ** order
+            orders[i] = order
+        return extrapolated_values, coefficients, orders
+
+    def _compute_observed_order(self, h: np.ndarray, q: np.ndarray) -> float:
+        """
+        Solve (q1 - q2) / (q2 - q3) = (h1^p - h2^p) / (h2^p - h3^p) for p by bisection.
+        """
+        if q[1] == q[2] or (q[0] - q[1]) / (q[1] - q[2]) <= 0.0:
+            return self.assumed_order
+        ratio = (q[0] - q[1]) / (q[1] - q[2])
+
+        def residual(p):
+            return (h[0] ** p - h[1] ** p) / (h[1] ** p - h[2] ** p) - ratio
+
+        low, high = self.minimum_order, self.maximum_order
+        if residual(low) >= 0.0:
+            return low
+        if residual(high) <= 0.0:
+            return high
+        for _ in range(60):
+            middle = 0.5 * (low + high)
+            if residual(middle) < 0.0:
+                low = middle
+            else:
+                high = middle
+        return 0.5 * (low + high)
+
+    def _monitored_quantities_are_converged(self, quantity_history):
+        if super()._monitored_quantities_are_converged(quantity_history):
+            return True
+        if len({level[0] for level in self.level_history}) < 2:
+            return False
+        extrapolated_values, coefficients, orders = self.estimate_discretization_error()
+        h = self.level_history[-1][0] ** (-1.0 / 3.0)
+        level_tolerance = self.level_tolerance_fraction * np.abs(coefficients * h ** orders)
+        array = np.array(quantity_history)
+        return bool(np.all(np.abs(array[-3:-1, :] - array[-1, :]) < level_tolerance))
+
+    def _increase_complexity(self, current_complexity: float) -> float:
+        settled_values = np.mean(np.array(self.quantity_history)[-3:, :], axis=0)
+        self.level_history.append((current_complexity, settled_values.tolist()))
+        if len({level[0] for level in self.level_history}) < 2:
+            return current_complexity * self.complexity_multiplier
+
+        extrapolated_values, coefficients, orders = self.estimate_discretization_error()
+        h = current_complexity ** (-1.0 / 3.0)
+        scale = np.maximum(np.abs(extrapolated_values), np.finfo(float).tiny)
+        relative_errors = np.abs(coefficients) * h ** orders / scale
+        print('Extrapolated values:', extrapolated_values)
+        print('Estimated relative discretization errors:', relative_errors)
+        if np.all(relative_errors <= self.target_relative_error):
+            self.target_error_met = True
+            return current_complexity
+
+        # complexity where |A| h^p = target * |q_inf| for the quantity that needs the finest mesh
+        target_h = (self.target_relative_error / relative_errors) ** (1.0 / orders) * h
+        multiplier = np.max(target_h[relative_errors > self.target_relative_error] ** -3.0) / current_complexity
+        multiplier = float(np.clip(multiplier, self.minimum_complexity_multiplier,
+                                   self.maximum_complexity_multiplier))
+        print(f'Richardson extrapolation complexity multiplier: {multiplier:.3f}')
+        complexity = current_complexity * multiplier
+        if self.final_complexity is not None:
+            complexity = min(complexity, self.final_complexity)
+        return complexity
+
+    def _get_controller_state(self, current_complexity) -> dict:
+        state = super()._get_controller_state(current_complexity)
+        state['level_history'] = [[complexity, values] for complexity, values in self.level_history]
+        return state
+
+    def _set_controller_state(self, state: dict) -> float:
+        self.level_history = [(complexity, values) for complexity, values in state.get('level_history', [])]
+        return super()._set_controller_state(state)
+
+
+class ControllerRichardsonForcesFUN3D(ControllerRichardsonExtrapolation, ControllerMonitorForcesFUN3D):
+    """
+    Richardson extrapolation controller for the integrated loads in the FUN3D forces file.
+    The keyword arguments select the monitored loads as in
+    :class:`~pyrefine.controller.monitor_forces.ControllerMonitorForcesFUN3D`, e.g., ``monitor_cl=True``.
+    """
+
+
+class ControllerRichardsonForcesSFE(ControllerRichardsonExtrapolation, ControllerMonitorForcesSFE):
+    """
+    Richardson extrapolation controller for CL and/or CD of SFE.
+    The keyword arguments select the monitored loads as in
+    :class:`~pyrefine.controller.monitor_forces.ControllerMonitorForcesSFE`.
+    """
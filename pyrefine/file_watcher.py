@@ -0,0 +1,183 @@
+"""
+Watch directories for new and modified files.
+
+On Linux, the kernel's inotify interface is used through ctypes so the watcher sleeps until a file
+changes. Where inotify is unavailable, the directories are polled with ``os.scandir``.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Dict, List, Set, Tuple
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingFileWatcher:
+    def __init__(self, directories: List[str], poll_interval: float = 1.0):
+        """
+        Detect changes by comparing the modification time and size of the files in each directory.
+
+        Parameters
+        ----------
+        directories:
+            The directories to watch
+        poll_interval:
+            Seconds between scans of the directories
+        """
+        #: list: the watched directories
+        self.directories = list(directories)
+        #: float: seconds between scans of the directories
+        self.poll_interval = poll_interval
+        self._file_states = self._scan()
+
+    def wait(self, timeout: float = None) -> Set[str]:
+        """
+        Block until at least one file is created, modified, or deleted, or the timeout expires
+
+        Returns
+        -------
+        changed_files:
+            The paths of the files that changed. Empty if the timeout expired
+        """
+        start = time.time()
+        while True:
+            file_states = self._scan()
+            changed_files = {path for path in set(file_states).union(self._file_states)
+                             if file_states.get(path) != self._file_states.get(path)}
+            self._file_states = file_states
+            if changed_files:
+                return changed_files
+            if timeout is not None and time.time() - start + self.poll_interval > timeout:
+                time.sleep(max(0.0, timeout - (time.time() - start)))
+                return set()
+            time.sleep(self.poll_interval)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        file_states = {}
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            file_states[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                continue
+        return file_states
+
+
+class InotifyFileWatcher:
+    def __init__(self, directories: List[str]):
+        """
+        Detect changes with Linux inotify events. Raises OSError if inotify is not available.
+
+        Parameters
+        ----------
+        directories:
+            The directories to watch
+        """
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._libc = libc
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        #: list: the watched directories
+        self.directories = list(directories)
+        self._directories_by_descriptor = {}
+        for directory in self.directories:
+            descriptor = libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if descriptor < 0:
+                error = ctypes.get_errno()
+                self.close()
+                raise OSError(error, f"inotify_add_watch failed for {directory}")
+            self._directories_by_descriptor[descriptor] = directory
+
+    def wait(self, timeout: float = None) -> Set[str]:
+        """
+        Block until at least one file is created, modified, or deleted, or the timeout expires
+
+        Returns
+        -------
+        changed_files:
+            The paths of the files that changed. Empty if the timeout expired
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed_files = set()
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            changed_files.update(self._parse_events(buffer))
+        return changed_files
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _parse_events(self, buffer: bytes) -> Set[str]:
+        changed_files = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            descriptor, _, _, name_length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            directory = self._directories_by_descriptor.get(descriptor)
+            if directory is not None and name:
+                changed_files.add(os.path.join(directory, os.fsdecode(name)))
+        return changed_files
+
+
+def create_file_watcher(directories: List[str], use_inotify: bool = True, poll_interval: float = 1.0):
+    """
+    Create an inotify watcher if possible, otherwise a polling watcher
+
+    Parameters
+    ----------
+    directories:
+        The directories to watch
+    use_inotify:
+        If False, always use polling. Polling is needed for file systems that do
+        not deliver inotify events for writes from other hosts, e.g. NFS or Lustre
+    poll_interval:
+        Seconds between scans of the polling watcher
+    """
+    if use_inotify:
+        try:
+            return InotifyFileWatcher(directories)
+        except (OSError, AttributeError):
+            pass
+    return PollingFileWatcher(directories, poll_interval)
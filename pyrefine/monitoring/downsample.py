@@ -0,0 +1,133 @@
+"""
+Reduce the number of points in a series before sending it to the browser while keeping its visual shape.
+"""
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, number_of_points: int) -> np.ndarray:
+    """
+    Largest-triangle-three-buckets downsampling.
+
+    The first and last points are kept. The remaining points are split into buckets and
+    from each bucket the point that forms the largest triangle with the previously selected
+    point and the average of the next bucket is kept.
+
+    Returns
+    -------
+    indices:
+        Indices of the selected points in increasing order
+    """
+    n = len(x)
+    if number_of_points >= n or number_of_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    bucket_size = (n - 2) / (number_of_points - 2)
+    edges = (np.floor(np.arange(number_of_points - 1) * bucket_size) + 1).astype(int)
+    edges[-1] = n - 1
+
+    indices = np.zeros(number_of_points, dtype=int)
+    selected = 0
+    for bucket in range(number_of_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start = end
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+        areas = np.abs((x[selected] - average_x) * (y[start:end] - y[selected]) -
+                       (x[selected] - x[start:end]) * (average_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+    indices[-1] = n - 1
+    return indices
+
+
+def min_max_indices(y: np.ndarray, number_of_points: int) -> np.ndarray:
+    """
+    Min/max decimation: keep the minimum and maximum of each of ``number_of_points // 2`` buckets.
+
+    Returns
+    -------
+    indices:
+        Indices of the selected points in increasing order
+    """
+    n = len(y)
+    number_of_buckets = number_of_points // 2
+    if number_of_points >= n or number_of_buckets < 1:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(0, n, number_of_buckets + 1).astype(int)
+    indices = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        bucket = y[start:end]
+        indices.extend([start + int(np.nanargmin(bucket)), start + int(np.nanargmax(bucket))])
+    return np.unique(indices)
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, max_points: int, x_range: tuple = None,
+                       method: str = "lttb", log_y: bool = False) -> np.ndarray:
+    """
+    Select at most ``max_points`` points of a series within an optional x range.
+
+    Parameters
+    ----------
+    x, y:
+        The series
+    max_points:
+        Maximum number of points to return
+    x_range:
+        (min, max) of the visible range. One point beyond each end of the range is kept so
+        the lines continue off the edges of the plot. If None, the full series is used
+    method:
+        "lttb" or "minmax"
+    log_y:
+        Select the points based on log10(|y|), which should be used for log scale axes
+
+    Returns
+    -------
+    indices:
+        Indices of the selected points in increasing order
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    indices = np.arange(len(x))
+    if x_range is not None and len(x) > 0:
+        first = max(int(np.searchsorted(x, x_range[0], side="left")) - 1, 0)
+        last = min(int(np.searchsorted(x, x_range[1], side="right")) + 1, len(x))
+        indices = indices[first:last]
+    if len(indices) <= max_points:
+        return indices
+
+    y_selected = y[indices].astype(float)
+    if log_y:
+        with np.errstate(divide="ignore"):
+            y_selected = np.log10(np.abs(y_selected))
+        y_selected[~np.isfinite(y_selected)] = np.nan
+    if method == "lttb":
+        return indices[lttb_indices(x[indices], y_selected, max_points)]
+    if method == "minmax":
+        return indices[min_max_indices(y_selected, max_points)]
+    raise ValueError(f"Unknown downsampling method: {method}. Options are lttb or minmax")
+
+
+def get_x_range_from_relayout(relayout_data: dict, axis: str = "xaxis"):
+    """
+    Get the x range from a Dash graph's ``relayoutData``.
+
+    Returns
+    -------
+    range_changed:
+        False if the relayout did not change the range of the axis, e.g. a legend click
+    x_range:
+        (min, max) of the zoomed range, or None if the axis was reset to its full range
+    """
+    if not relayout_data:
+        return False, None
+    if relayout_data.get(f"{axis}.autorange"):
+        return True, None
+    if f"{axis}.range[0]" in relayout_data and f"{axis}.range[1]" in relayout_data:
+        return True, (float(relayout_data[f"{axis}.range[0]"]), float(relayout_data[f"{axis}.range[1]"]))
+    if f"{axis}.range" in relayout_data:
+        return True, tuple(float(value) for value in relayout_data[f"{axis}.range"])
+    return False, None
@@ -1,8 +1,11 @@
 
 import dash_core_components as dcc
 import dash_html_components as html
+import numpy as np
 import plotly.graph_objects as go
 
+from pyrefine.monitoring.downsample import downsample_indices
+
 
 class PyrefinePlotly:
     def __init__(self):
@@ -18,6 +21,30 @@ class PyrefinePlotly:
         self.background_color = 'white'
         self.plot_height = 700
 
+        #: int: maximum number of points sent to the browser for each trace of the long histories
+        self.max_points_per_trace = 2000
+        #: str: downsampling method, "lttb" or "minmax"
+        self.downsample_method = 'lttb'
+
+    def downsample_trace_data(self, x, y, x_range=None, log_y=False):
+        """
+        Downsample a series to ``max_points_per_trace`` within the visible x range
+        """
+        x = np.asarray(x)
+        y = np.asarray(y)
+        if len(x) != len(y):
+            return x, y
+        indices = downsample_indices(x, y, self.max_points_per_trace, x_range, self.downsample_method, log_y)
+        return x[indices], y[indices]
+
+    def set_zoomed_x_range(self, fig: go.Figure, x_range, uirevision):
+        """
+        Keep the zoomed range and the legend state when a re-queried figure replaces the current one
+        """
+        fig.update_layout(uirevision=uirevision)
+        if x_range is not None:
+            fig.update_xaxes(range=list(x_range))
+
     def set_default_figure_layout(self, fig: go.Figure, xaxis: dict, yaxis: dict):
         updatemenus, menu_annotations = self.make_update_menus_for_log_scale()
         fig.update_layout(updatemenus=updatemenus,
@@ -5,18 +5,34 @@ import dash_html_components as html
 import numpy as np
 import plotly.graph_objects as go
 from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 from plotly.subplots import make_subplots
 
+from pyrefine.monitoring.downsample import get_x_range_from_relayout
 from pyrefine.monitoring.plotly_base import PyrefinePlotly
+from pyrefine.monitoring.sfe_reader_cache import SFEReaderCache
 from pyrefine.post_processing.fun3d_file_reader import \
     Fun3dAdaptationSteadyHistoryReader
-from pyrefine.post_processing.sfe_file_reader import SFEForwardHistoryReader
 
 
 class GuiAdaptHistory(PyrefinePlotly):
     def __init__(self):
         super().__init__()
 
+        #: SFEReaderCache: parsed SFE logs of recently viewed and prefetched meshes
+        self.sfe_reader_cache = SFEReaderCache()
+        #: bool: parse the logs of the neighbouring mesh numbers in the background
+        self.prefetch_neighbouring_meshes = True
+        #: str: the SFE tab being viewed. Only this tab is generated; the others are generated when viewed
+        self.active_sfe_tab = "convergence"
+        self.normalized_timings = "actual"
+        self.sfe_tab_generators = {
+            "convergence": self.generate_sfe_forward_convergence_div,
+            "timing": self.generate_sfe_forward_timing_div,
+            "preconditioning": self.generate_sfe_forward_preconditioning_div,
+        }
+        self.rendered_sfe_tabs = {}
+
         project_rootname = ""
         data_directory = ""
         self.load_data(data_directory, project_rootname)
@@ -105,10 +121,17 @@ class GuiAdaptHistory(PyrefinePlotly):
     # SFE details
 
     def load_sfe_data(self, data_directory, project_rootname, mesh_number):
-        self.sfe_fwd_reader = SFEForwardHistoryReader(self.data_directory, self.project_rootname, mesh_number)
+        self.sfe_fwd_reader = self.sfe_reader_cache.get_forward_reader(
+            self.data_directory, self.project_rootname, mesh_number
+        )
         print(f"GUI: loaded data for mesh number {self.sfe_fwd_reader.imesh}")
+        if self.prefetch_neighbouring_meshes:
+            neighbours = [imesh for imesh in [mesh_number + 1, mesh_number - 1]
+                          if 1 <= imesh <= self.reader.number_of_meshes]
+            self.sfe_reader_cache.prefetch(self.data_directory, self.project_rootname, neighbours)
 
     def create_sfe_tabs_outer_div(self):
+        self.rendered_sfe_tabs = {}
         div = html.Div(
             children=[
                 html.H1("SFE data"),
@@ -124,18 +147,50 @@ class GuiAdaptHistory(PyrefinePlotly):
         tabs = dcc.Tabs(
             [
                 dcc.Tab(
-                    label="Convergence", children=[self.generate_sfe_forward_convergence_div()], id="convergence_tab"
+                    label="Convergence",
+                    value="convergence",
+                    children=[self.generate_sfe_tab_div("convergence")],
+                    id="convergence_tab",
                 ),
-                dcc.Tab(label="Timing", children=[self.create_sfe_forward_timing_div()], id="timing_tab"),
+                dcc.Tab(label="Timing", value="timing", children=[self.create_sfe_forward_timing_div()], id="timing_tab"),
                 dcc.Tab(
                     label="Preconditioning",
-                    children=[self.generate_sfe_forward_preconditioning_div()],
+                    value="preconditioning",
+                    children=[self.generate_sfe_tab_div("preconditioning")],
                     id="preconditioning_tab",
                 ),
-            ]
+            ],
+            id="sfe_tabs",
+            value=self.active_sfe_tab,
         )
         return tabs
 
+    def generate_sfe_tab_div(self, tab: str):
+        if tab != self.active_sfe_tab:
+            return html.Div("Loading ...")
+        div = self.sfe_tab_generators[tab]()
+        self.rendered_sfe_tabs[tab] = self.get_sfe_tab_state(tab)
+        return div
+
+    def get_sfe_tab_state(self, tab: str):
+        """
+        The data shown in a tab. A tab is only regenerated when this changes.
+        """
+        return self.sfe_fwd_reader, self.normalized_timings
+
+    def generate_sfe_tab_updates(self) -> list:
+        """
+        Regenerate the active tab if its data changed since it was last generated.
+        The other tabs are left unchanged until they are viewed.
+        """
+        updates = []
+        for tab in self.sfe_tab_generators:
+            if tab == self.active_sfe_tab and self.rendered_sfe_tabs.get(tab) != self.get_sfe_tab_state(tab):
+                updates.append(self.generate_sfe_tab_div(tab))
+            else:
+                updates.append(dash.no_update)
+        return updates
+
     def generate_sfe_forward_convergence_div(self):
         self.sfe_fwd_convergence_fig = self.generate_sfe_forward_convergence_fig()
         export_html = self.generate_export_field_and_button(
@@ -165,7 +220,7 @@ class GuiAdaptHistory(PyrefinePlotly):
                 html.H2("SFE Forward Solve Timing"),
                 html.Div("Timing format: "),
                 self.timing_normalization_radio,
-                html.Div(children=[self.generate_sfe_forward_timing_div()], id="timing_inner_div"),
+                html.Div(children=[self.generate_sfe_tab_div("timing")], id="timing_inner_div"),
             ]
         )
 
@@ -214,8 +269,9 @@ class GuiAdaptHistory(PyrefinePlotly):
 
         return html.Div(children=children)
 
-    def generate_sfe_forward_convergence_fig(self):
+    def generate_sfe_forward_convergence_fig(self, x_range=None):
         fig_sfe_fwd_convergence = make_subplots(specs=[[{"secondary_y": True}]])
+        steps = np.arange(1, self.sfe_fwd_reader.number_of_steps + 1, 1)
         for variable_name, var_data in self.sfe_fwd_reader.residual_convergence_data.items():
             vis = (
                 None
@@ -223,10 +279,11 @@ class GuiAdaptHistory(PyrefinePlotly):
                 else "legendonly"
             )
             sec_y = True if variable_name in ["CL", "CD"] else False
+            x, y = self.downsample_trace_data(steps, var_data, x_range, log_y=not sec_y)
             fig_sfe_fwd_convergence.add_trace(
                 go.Scatter(
-                    x=np.arange(1, self.sfe_fwd_reader.number_of_steps + 1, 1),
-                    y=var_data,
+                    x=x,
+                    y=y,
                     mode="lines",
                     name=variable_name,
                     visible=vis,
@@ -240,16 +297,19 @@ class GuiAdaptHistory(PyrefinePlotly):
         self.set_default_figure_layout(fig_sfe_fwd_convergence, xaxis, yaxis)
         fig_sfe_fwd_convergence.update_yaxes(type="log", secondary_y=False)
         fig_sfe_fwd_convergence.update_yaxes(title_text="CL, CD", secondary_y=True)
+        self.set_zoomed_x_range(fig_sfe_fwd_convergence, x_range, f"mesh{self.sfe_fwd_reader.imesh}")
         return fig_sfe_fwd_convergence
 
-    def generate_sfe_forward_timing_fig(self, timing_data):
+    def generate_sfe_forward_timing_fig(self, timing_data, x_range=None):
         fig_sfe_timing = go.Figure()
+        steps = np.arange(1, self.sfe_fwd_reader.number_of_steps + 1, 1)
         for variable_name, var_data in timing_data.items():
             vis = None if variable_name in ["RHS", "LHS", "Linear solve"] else "legendonly"
+            x, y = self.downsample_trace_data(steps, var_data, x_range)
             fig_sfe_timing.add_trace(
                 go.Scatter(
-                    x=np.arange(1, self.sfe_fwd_reader.number_of_steps + 1, 1),
-                    y=var_data,
+                    x=x,
+                    y=y,
                     mode="lines",
                     name=variable_name,
                     visible=vis,
@@ -263,18 +323,21 @@ class GuiAdaptHistory(PyrefinePlotly):
         else:
             yaxis["title"] = "Proportion of Total Step Time []"
         self.set_default_figure_layout(fig_sfe_timing, xaxis, yaxis)
+        self.set_zoomed_x_range(fig_sfe_timing, x_range, f"mesh{self.sfe_fwd_reader.imesh}_{self.normalized_timings}")
         return fig_sfe_timing
 
-    def generate_sfe_forward_preconditioning_fig(self):
+    def generate_sfe_forward_preconditioning_fig(self, x_range=None):
         fig_sfe_fwd_preconditioning = make_subplots(specs=[[{"secondary_y": True}]])
+        steps = np.arange(1, self.sfe_fwd_reader.number_of_steps + 1, 1)
         for variable_name, var_data in self.sfe_fwd_reader.preconditioner_data.items():
             vis = None if variable_name in ["Amplification", "Rank"] else "legendonly"
             sec_y = True if variable_name in ["Rank"] else False
             line_mode = "markers" if variable_name in ["Rank"] else "lines"
+            x, y = self.downsample_trace_data(steps, var_data, x_range, log_y=not sec_y)
             fig_sfe_fwd_preconditioning.add_trace(
                 go.Scatter(
-                    x=np.arange(1, self.sfe_fwd_reader.number_of_steps + 1, 1),
-                    y=var_data,
+                    x=x,
+                    y=y,
                     mode=line_mode,
                     name=variable_name,
                     visible=vis,
@@ -288,6 +351,7 @@ class GuiAdaptHistory(PyrefinePlotly):
         self.set_default_figure_layout(fig_sfe_fwd_preconditioning, xaxis, yaxis)
         fig_sfe_fwd_preconditioning.update_yaxes(type="log", secondary_y=False)
         fig_sfe_fwd_preconditioning.update_yaxes(title_text="Rank", secondary_y=True)
+        self.set_zoomed_x_range(fig_sfe_fwd_preconditioning, x_range, f"mesh{self.sfe_fwd_reader.imesh}")
         return fig_sfe_fwd_preconditioning
 
     def create_timing_normalization_radio(self):
@@ -315,7 +379,7 @@ class GuiAdaptHistory(PyrefinePlotly):
 
 def main():
     ap = GuiAdaptHistory()
-    app = dash.Dash()
+    app = dash.Dash(suppress_callback_exceptions=True)
     app.layout = ap.full_layout
 
     @app.callback(
@@ -362,9 +426,11 @@ def main():
         ],
         [Input("mesh_number", "value")],
         [Input("timing_normalization_radio", "value")],
+        [Input("sfe_tabs", "value")],
     )
-    def create_sfe_tabs_outer_div(mesh_number, timing_normalization_radio):
+    def create_sfe_tabs_outer_div(mesh_number, timing_normalization_radio, active_tab):
         ap.normalized_timings = timing_normalization_radio
+        ap.active_sfe_tab = active_tab
         if mesh_number < 1:
             print("Mesh number must be an integer greater than 0")
             mesh_number = 1
@@ -372,10 +438,43 @@ def main():
             print(f"Mesh number must be an integer less than {ap.reader.number_of_meshes+1}")
             mesh_number = ap.reader.number_of_meshes
         ap.load_sfe_data(ap.data_directory, ap.project_rootname, mesh_number)
-        div1 = ap.generate_sfe_forward_convergence_div()
-        div2 = ap.generate_sfe_forward_timing_div()
-        div3 = ap.generate_sfe_forward_preconditioning_div()
-        return div1, div2, div3
+        return ap.generate_sfe_tab_updates()
+
+    @app.callback(
+        Output("sfe_fwd_convergence_graph", "figure"),
+        [Input("sfe_fwd_convergence_graph", "relayoutData")],
+    )
+    def requery_sfe_forward_convergence(relayout_data):
+        range_changed, x_range = get_x_range_from_relayout(relayout_data)
+        if not range_changed:
+            raise PreventUpdate
+        ap.sfe_fwd_convergence_fig = ap.generate_sfe_forward_convergence_fig(x_range)
+        return ap.sfe_fwd_convergence_fig
+
+    @app.callback(
+        Output("sfe_fwd_timing_graph", "figure"),
+        [Input("sfe_fwd_timing_graph", "relayoutData")],
+    )
+    def requery_sfe_forward_timing(relayout_data):
+        range_changed, x_range = get_x_range_from_relayout(relayout_data)
+        if not range_changed:
+            raise PreventUpdate
+        if ap.normalized_timings == "actual":
+            ap.sfe_timing_fig = ap.generate_sfe_forward_timing_fig(ap.sfe_fwd_reader.timing_data, x_range)
+        else:
+            ap.sfe_timing_fig = ap.generate_sfe_forward_timing_fig(ap.sfe_fwd_reader.norm_timing_data, x_range)
+        return ap.sfe_timing_fig
+
+    @app.callback(
+        Output("sfe_fwd_preconditioning_graph", "figure"),
+        [Input("sfe_fwd_preconditioning_graph", "relayoutData")],
+    )
+    def requery_sfe_forward_preconditioning(relayout_data):
+        range_changed, x_range = get_x_range_from_relayout(relayout_data)
+        if not range_changed:
+            raise PreventUpdate
+        ap.sfe_fwd_preconditioning_fig = ap.generate_sfe_forward_preconditioning_fig(x_range)
+        return ap.sfe_fwd_preconditioning_fig
 
     @app.callback(
         Output("sfe_forward_timing_export_html_status", "children"),
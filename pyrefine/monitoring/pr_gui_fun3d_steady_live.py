@@ -5,6 +5,7 @@ import dash
 import dash_core_components as dcc
 import dash_html_components as html
 from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 
 from pyrefine.post_processing.fun3d_file_reader import Fun3dAdaptationSteadyHistoryReader
 from pyrefine.monitoring.plotly_base import PyrefinePlotly
@@ -19,6 +20,10 @@ class GuiAdaptHistoryLive(PyrefinePlotly):
         variables = "C_L, C_D"
         xlog = False
         ylog = False
+        self.plot_settings = (variables, xlog, ylog)
+        self.plotted_number_of_meshes = 0
+        self.plotted_variables = []
+        self.reader_recreated = False
         self.load_data(data_directory, project_rootname)
 
         sections = []
@@ -27,9 +32,92 @@ class GuiAdaptHistoryLive(PyrefinePlotly):
         self.full_layout = html.Div(children=sections, style=dict(backgroundColor=self.background_color))
 
     def load_data(self, data_directory, project_rootname):
+        """
+        Update the existing reader if the case is unchanged, otherwise create a new one.
+
+        Returns
+        -------
+        updated_meshes:
+            The mesh numbers that were (re)read
+        """
+        reader = getattr(self, "reader", None)
+        if reader is not None and reader.project_rootname != "" and \
+                reader.data_directory == data_directory and reader.project_rootname == project_rootname:
+            updated_meshes = reader.update()
+            if updated_meshes:
+                print(f"GUI: updated data for {len(updated_meshes)} of {reader.number_of_meshes} meshes")
+            return updated_meshes
         self.project_rootname = project_rootname
         self.reader = Fun3dAdaptationSteadyHistoryReader(data_directory, project_rootname)
+        self.plotted_number_of_meshes = 0
+        # the plotted traces belong to the previous case, so the next update has to replace the figure
+        self.reader_recreated = True
         print(f"GUI: loaded data for {self.reader.number_of_meshes} meshes")
+        return list(range(1, self.reader.number_of_meshes + 1))
+
+    def generate_live_update(self, updated_meshes, variables, xlog, ylog):
+        """
+        Get the update for the adaptation history graph after a refresh.
+
+        If only new meshes were read, the new points are returned as an ``extendData`` update
+        so only the new data is sent to the browser. While a flow job runs, the history of the
+        last plotted mesh changes on every refresh, so its point is replaced with a ``dash.Patch``
+        of the figure, which also appends any new meshes. If the plot settings changed, an earlier
+        mesh changed, or the reader was recreated for a different case, the full figure is returned.
+
+        Returns
+        -------
+        figure, extend_data:
+            One of them is ``dash.no_update``
+
+        Raises
+        ------
+        PreventUpdate:
+            If nothing changed since the last refresh
+        """
+        plot_settings = (variables, xlog, ylog)
+        earlier_meshes_changed = any(imesh < self.plotted_number_of_meshes for imesh in updated_meshes)
+        variables_changed = list(self.reader.final_hist_values.keys()) != self.plotted_variables
+        if plot_settings != self.plot_settings or earlier_meshes_changed or variables_changed or \
+                self.reader_recreated:
+            self.reader_recreated = False
+            self.plot_settings = plot_settings
+            self.hist_fig = self.generate_adapt_history_fig(variables, xlog, ylog)
+            self.plotted_number_of_meshes = self.reader.number_of_meshes
+            self.plotted_variables = list(self.reader.final_hist_values.keys())
+            return self.hist_fig, dash.no_update
+
+        if len(updated_meshes) == 0:
+            raise PreventUpdate
+
+        last_mesh_changed = self.plotted_number_of_meshes in updated_meshes
+        start = self.plotted_number_of_meshes - 1 if last_mesh_changed else self.plotted_number_of_meshes
+        end = self.reader.number_of_meshes
+        nodes = self.reader.number_of_nodes[start:end].tolist()
+        mesh_numbers = np.c_[np.arange(start + 1, end + 1)].tolist()
+        values = [var_data[start:end].tolist() for var_data in self.reader.final_hist_values.values()]
+        self.plotted_number_of_meshes = end
+
+        if last_mesh_changed:
+            patch = dash.Patch()
+            for itrace, var_values in enumerate(values):
+                trace = patch["data"][itrace]
+                trace["x"][start] = nodes[0]
+                trace["y"][start] = var_values[0]
+                trace["customdata"][start] = mesh_numbers[0]
+                if end - start > 1:
+                    trace["x"].extend(nodes[1:])
+                    trace["y"].extend(var_values[1:])
+                    trace["customdata"].extend(mesh_numbers[1:])
+            return patch, dash.no_update
+
+        extend_data = dict(x=[], y=[], customdata=[])
+        for var_values in values:
+            extend_data["x"].append(nodes)
+            extend_data["y"].append(var_values)
+            extend_data["customdata"].append(mesh_numbers)
+        trace_indices = list(range(len(self.plotted_variables)))
+        return dash.no_update, (extend_data, trace_indices)
 
     def create_case_information_div(self):
         start_button = html.Button(
@@ -98,7 +186,11 @@ class GuiAdaptHistoryLive(PyrefinePlotly):
         return div
 
     def generate_adaptation_history_div(self, variables, xlog, ylog):
+        self.reader_recreated = False
+        self.plot_settings = (variables, xlog, ylog)
         self.hist_fig = self.generate_adapt_history_fig(variables, xlog, ylog)
+        self.plotted_number_of_meshes = self.reader.number_of_meshes
+        self.plotted_variables = list(self.reader.final_hist_values.keys())
         export_html = self.generate_export_field_and_button(
             default_filename="adapt_hist.html", button_txt="Export interactive figure", id_base="hist_export_html"
         )
@@ -163,7 +255,7 @@ def main():
         return interval_ms
 
     @app.callback(
-        Output("div_adapt_hist", "children"),
+        [Output("adapt_hist_graph", "figure"), Output("adapt_hist_graph", "extendData")],
         [Input("live_update_interval", "n_intervals")],
         [
             State("data_directory", "value"),
@@ -172,15 +264,16 @@ def main():
             State("log_scale_checklist", "value"),
         ],
     )
-    def generate_history_div(n_intervals, data_directory, project_rootname, variables, log_scale):
-        if n_intervals > 0:
-            ap.load_data(data_directory, project_rootname)
+    def update_history_graph(n_intervals, data_directory, project_rootname, variables, log_scale):
+        if n_intervals == 0:
+            raise PreventUpdate
+        updated_meshes = ap.load_data(data_directory, project_rootname)
         xlog = False
         ylog = False
         if log_scale is not None:
             xlog = True if "xlog" in log_scale else False
             ylog = True if "ylog" in log_scale else False
-        return ap.generate_adaptation_history_div(variables, xlog, ylog)
+        return ap.generate_live_update(updated_meshes, variables, xlog, ylog)
 
     @app.callback(
         Output("hist_export_html_status", "children"),
@@ -190,6 +283,8 @@ def main():
     def export_adapt_history_html(n_clicks, filename):
         status = ""
         if n_clicks > 0:
+            # the server-side figure is not extended by the live updates, so regenerate it
+            ap.hist_fig = ap.generate_adapt_history_fig(*ap.plot_settings)
             status = ap.export_fig_as_html(ap.hist_fig, filename)
         return status
 
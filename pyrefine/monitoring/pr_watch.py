@@ -1,69 +1,221 @@
 #!/usr/bin/env python
 """
-Monitor specified .out files in a directory and display the last few lines of the latest file for each type.
+Monitor specified .out files in one or more directories and display the last few lines of the latest file for each type.
 
-This script watches a directory for output files (e.g., "flow" or "refine") created during the adaptation process
-and updates the terminal with the most recent output lines.
+This script watches directories for output files (e.g., "flow" or "refine") created during the adaptation process
+and updates the terminal with the most recent output lines. On Linux, inotify is used to wake up when files
+change. Only the bytes appended to a file since the last check are read, and the screen is redrawn only when the
+displayed lines change.
 """
 import os
 import time
 import sys
 import argparse
+from collections import deque
+from typing import Dict, List
+
+from pyrefine.file_watcher import create_file_watcher
+from pyrefine.shell_utils import tail
 
 
 def get_latest_out_files(output_dir, prefixes):
-    latest_files = {}
+    latest_files = {prefix: None for prefix in prefixes}
+    try:
+        filenames = os.listdir(output_dir)
+    except FileNotFoundError:
+        return latest_files
     for prefix in prefixes:
-        files = sorted([f for f in os.listdir(output_dir) if f.startswith(prefix) and f.endswith(".out")])
-        latest_files[prefix] = files[-1] if files else None
+        files = [f for f in filenames if f.startswith(prefix) and f.endswith(".out")]
+        latest_files[prefix] = max(files) if files else None
     return latest_files
 
 
 def tail_file(filepath, lines=15):
-    with open(filepath, "r") as file:
-        data = file.readlines()
-    return "".join(data[-lines:])
+    return "".join(tail(filepath, n=lines))
+
+
+class FileTail:
+    def __init__(self, filepath: str, num_lines: int = 15):
+        """
+        Keeps the last lines of a growing file. The byte offset of the last read is stored
+        so each update only reads the newly appended bytes.
+
+        Parameters
+        ----------
+        filepath:
+            The file to follow
+        num_lines:
+            Number of lines to keep
+        """
+        #: str: the file being followed
+        self.filepath = filepath
+        #: deque: ring buffer of the last lines
+        self.lines = deque(maxlen=num_lines)
+        self._offset = 0
+        self._partial_line = b""
+        self._initialize()
+
+    def _initialize(self):
+        self.lines.clear()
+        self._partial_line = b""
+        self._offset = 0
+        if not os.path.isfile(self.filepath):
+            return
+        self._offset = os.path.getsize(self.filepath)
+        last_lines = tail(self.filepath, n=self.lines.maxlen)
+        if last_lines and not last_lines[-1].endswith("\n"):
+            self._partial_line = last_lines.pop().encode()
+        self.lines.extend(line.rstrip("\n") for line in last_lines)
+
+    def update(self) -> bool:
+        """
+        Read the bytes appended since the last update
+
+        Returns
+        -------
+        changed:
+            Whether new lines were added to the buffer
+        """
+        try:
+            size = os.path.getsize(self.filepath)
+        except FileNotFoundError:
+            return False
+        if size < self._offset:
+            self._initialize()
+            return True
+        if size == self._offset:
+            return False
+        with open(self.filepath, "rb") as fh:
+            fh.seek(self._offset)
+            data = self._partial_line + fh.read(size - self._offset)
+        self._offset = size
+        new_lines = data.split(b"\n")
+        self._partial_line = new_lines.pop()
+        self.lines.extend(line.decode(errors="replace") for line in new_lines)
+        return len(new_lines) > 0
 
+    @property
+    def contents(self) -> str:
+        lines = list(self.lines)
+        if self._partial_line:
+            lines.append(self._partial_line.decode(errors="replace"))
+        return "\n".join(lines[-self.lines.maxlen:])
 
-def tracking_loop(output_dir, num_tail_lines, prefixes):
-    last_files = {prefix: None for prefix in prefixes}
-    last_sizes = {prefix: 0 for prefix in prefixes}
-    last_contents = {prefix: "" for prefix in prefixes}
 
+class DirectoryWatch:
+    def __init__(self, output_dir: str, prefixes: List[str], num_tail_lines: int):
+        """
+        The latest output file of each prefix in one directory
+        """
+        self.output_dir = output_dir
+        self.prefixes = prefixes
+        self.num_tail_lines = num_tail_lines
+        self.tails: Dict[str, FileTail] = {}
+        self.latest_files = {prefix: None for prefix in prefixes}
+        self.update_latest_files()
+
+    def update_latest_files(self) -> bool:
+        changed = False
+        for prefix, latest_file in get_latest_out_files(self.output_dir, self.prefixes).items():
+            if latest_file != self.latest_files[prefix]:
+                self.latest_files[prefix] = latest_file
+                if latest_file is None:
+                    self.tails.pop(prefix, None)
+                else:
+                    self.tails[prefix] = FileTail(os.path.join(self.output_dir, latest_file), self.num_tail_lines)
+                changed = True
+        return changed
+
+    def update_tails(self) -> bool:
+        changed = False
+        for file_tail in self.tails.values():
+            changed = file_tail.update() or changed
+        return changed
+
+    def is_out_file(self, path: str) -> bool:
+        """
+        Whether the path is an output file of one of the prefixes in this directory
+        """
+        if os.path.normpath(os.path.dirname(path)) != os.path.normpath(self.output_dir):
+            return False
+        filename = os.path.basename(path)
+        return filename.endswith(".out") and any(filename.startswith(prefix) for prefix in self.prefixes)
+
+    def render(self, show_directory: bool) -> List[str]:
+        output = []
+        for prefix in self.prefixes:
+            header = f"=== Latest {prefix.capitalize()} File: {self.latest_files[prefix]} ==="
+            if show_directory:
+                header = f"=== {self.output_dir}: Latest {prefix.capitalize()} File: {self.latest_files[prefix]} ==="
+            output.append(header)
+            output.append(self.tails[prefix].contents if prefix in self.tails else "")
+            output.append("")
+        return output
+
+
+def tracking_loop(output_dirs, num_tail_lines, prefixes, refresh_interval=1.0, rescan_interval=10.0,
+                  use_inotify=True):
+    """
+    Parameters
+    ----------
+    output_dirs:
+        Directory or list of directories to watch
+    num_tail_lines:
+        Number of lines to display for each file
+    prefixes:
+        Prefixes of the .out files to display
+    refresh_interval:
+        Maximum number of seconds between checks of the displayed files. Appends from other hosts
+        on network file systems may not generate inotify events, so the files are also checked
+        at this interval
+    rescan_interval:
+        Maximum number of seconds between directory listings to look for new files without an event
+    use_inotify:
+        Use inotify events if available. Otherwise the directories are polled
+    """
+    if isinstance(output_dirs, str):
+        output_dirs = [output_dirs]
+    watches = [DirectoryWatch(output_dir, prefixes, num_tail_lines) for output_dir in output_dirs]
+    watcher = create_file_watcher(output_dirs, use_inotify=use_inotify, poll_interval=refresh_interval)
+    show_directory = len(watches) > 1
+
+    last_screen = None
+    last_rescan = time.time()
     try:
         while True:
-            latest_files = get_latest_out_files(output_dir, prefixes)
-
-            for prefix in prefixes:
-                latest_file = latest_files[prefix]
-                if latest_file:
-                    latest_path = os.path.join(output_dir, latest_file)
-                    file_size = os.path.getsize(latest_path)
-                    if latest_file != last_files[prefix] or file_size > last_sizes[prefix]:
-                        last_contents[prefix] = tail_file(latest_path, lines=num_tail_lines)
-                        last_files[prefix], last_sizes[prefix] = latest_file, file_size
-
-            sys.stdout.write("\033[H\033[J")  # Clear the screen (ANSI escape code)
-            for prefix in prefixes:
-                print(f"=== Latest {prefix.capitalize()} File: {last_files[prefix]} ===")
-                print(last_contents[prefix])
-                print()
-
-            sys.stdout.flush()
-            time.sleep(1)
+            screen = "\n".join(line for watch in watches for line in watch.render(show_directory))
+            if screen != last_screen:
+                sys.stdout.write("\033[H\033[J")  # Clear the screen (ANSI escape code)
+                sys.stdout.write(screen + "\n")
+                sys.stdout.flush()
+                last_screen = screen
+
+            changed_files = watcher.wait(timeout=refresh_interval)
+            rescan_all = time.time() - last_rescan > rescan_interval
+            if rescan_all:
+                last_rescan = time.time()
+            for watch in watches:
+                new_out_files = any(watch.is_out_file(path) for path in changed_files)
+                if new_out_files or rescan_all:
+                    watch.update_latest_files()
+                watch.update_tails()
     except KeyboardInterrupt:
         print("Monitoring stopped.")
+    finally:
+        watcher.close()
 
 
 def main():
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("-d", "--directory", type=str, default="./Flow", help="Directory containing .out files.")
+    parser.add_argument("-d", "--directory", type=str, nargs="+", default=["./Flow"],
+                        help="Directories containing .out files.")
     parser.add_argument("-n", "--num_lines", type=int, default=15, help="Number of lines to tail for each file.")
     parser.add_argument(
         "-p", "--prefixes", nargs="+", default=["flow", "refine"], help="Prefixes of file types to monitor."
     )
+    parser.add_argument("--poll", action="store_true", help="Poll the directories instead of using inotify.")
     args = parser.parse_args()
-    tracking_loop(args.directory, args.num_lines, args.prefixes)
+    tracking_loop(args.directory, args.num_lines, args.prefixes, use_inotify=not args.poll)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+"""
+Cache of parsed SFE log readers for the SFE GUIs.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from pyrefine.post_processing.sfe_file_reader import SFEForwardHistoryReader, SFEGoalOrientedHistoryReader
+
+
+class SFEReaderCache:
+    def __init__(self, max_size: int = 8, prefetch: bool = True):
+        """
+        Least recently used cache of SFE history readers.
+
+        Forward readers are keyed by the mesh number and the modification time and size of that
+        mesh's log file, so a log that is still being written is re-parsed when it changes.
+        The goal oriented reader is keyed by the signature of all of the adjoint logs.
+
+        The SFE readers write temporary files to the current directory while parsing, so only one
+        log is parsed at a time. Prefetching uses a single background thread.
+
+        Parameters
+        ----------
+        max_size:
+            Maximum number of readers to keep
+        prefetch:
+            Allow neighbouring mesh numbers to be parsed in the background
+        """
+        #: int: maximum number of readers to keep
+        self.max_size = max_size
+        #: bool: allow neighbouring mesh numbers to be parsed in the background
+        self.prefetch_enabled = prefetch
+
+        self._readers = OrderedDict()
+        self._lock = threading.Lock()
+        self._parse_lock = threading.Lock()
+        self._executor = None
+
+    def get_forward_reader(self, data_directory: str, project_rootname: str,
+                           mesh_number: int) -> SFEForwardHistoryReader:
+        logfile = f"{data_directory}/flow{mesh_number:02}.out"
+        key = ("forward", data_directory, project_rootname, mesh_number, self._file_signature(logfile))
+        return self._get(key, lambda: SFEForwardHistoryReader(data_directory, project_rootname, mesh_number))
+
+    def get_goal_oriented_reader(self, data_directory: str, project_rootname: str) -> SFEGoalOrientedHistoryReader:
+        signature = [self._file_signature(f"{data_directory}/flow01.out")]
+        iadjoint = 1
+        while os.path.isfile(f"{data_directory}/adjoint{iadjoint:02}.out"):
+            signature.append(self._file_signature(f"{data_directory}/adjoint{iadjoint:02}.out"))
+            iadjoint += 1
+        key = ("goal_oriented", data_directory, project_rootname, tuple(signature))
+        return self._get(key, lambda: SFEGoalOrientedHistoryReader(data_directory, project_rootname))
+
+    def prefetch(self, data_directory: str, project_rootname: str, mesh_numbers: List[int]):
+        """
+        Parse the logs of the mesh numbers in a background thread if they are not already cached
+        """
+        if not self.prefetch_enabled or data_directory == "" or project_rootname == "":
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        for mesh_number in mesh_numbers:
+            if os.path.isfile(f"{data_directory}/flow{mesh_number:02}.out"):
+                self._executor.submit(self.get_forward_reader, data_directory, project_rootname, mesh_number)
+
+    def clear(self):
+        with self._lock:
+            self._readers.clear()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __len__(self):
+        return len(self._readers)
+
+    def _get(self, key, create_reader):
+        reader = self._lookup(key)
+        if reader is not None:
+            return reader
+        with self._parse_lock:
+            # another thread may have parsed it while this one waited
+            reader = self._lookup(key)
+            if reader is None:
+                reader = create_reader()
+                self._store(key, reader)
+        return reader
+
+    def _lookup(self, key):
+        with self._lock:
+            reader = self._readers.get(key)
+            if reader is not None:
+                self._readers.move_to_end(key)
+            return reader
+
+    def _store(self, key, reader):
+        with self._lock:
+            stale_keys = [old_key for old_key in self._readers if old_key[:-1] == key[:-1]]
+            for old_key in stale_keys:
+                del self._readers[old_key]
+            self._readers[key] = reader
+            while len(self._readers) > self.max_size:
+                self._readers.popitem(last=False)
+
+    def _file_signature(self, filename: str):
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Call a method of a pickled simulation component.
+
+When the phases of a multi-phase simulation are batched into one job, the Python work between the phases,
+e.g., projecting the mode shapes onto the new mesh, runs inside the job with this module.
+"""
+import argparse
+import json
+import pickle
+
+
+def run_phase_hook(state_filename: str, method: str, args: list = None, settings: dict = None,
+                   completed_filename: str = None):
+    """
+    Load the component from the pickle file, set the phase settings, and call the method
+
+    Parameters
+    ----------
+    state_filename:
+        The pickle file of the simulation component
+    method:
+        The name of the method to call
+    args:
+        The arguments of the method
+    settings:
+        Attributes of the component set before the call
+    completed_filename:
+        If set, the method and arguments are appended to this file once the call returns
+    """
+    args = [] if args is None else args
+    with open(state_filename, "rb") as fh:
+        component = pickle.load(fh)
+    for name, value in ({} if settings is None else settings).items():
+        setattr(component, name, value)
+    getattr(component, method)(*args)
+    if completed_filename is not None:
+        with open(completed_filename, "a") as fh:
+            fh.write(f"{method} {json.dumps(args)}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("state_filename", help="Pickle file of the simulation component.")
+    parser.add_argument("method", help="Name of the method to call.")
+    parser.add_argument("--args", type=json.loads, default=[], help="JSON list of the method arguments.")
+    parser.add_argument("--settings", type=json.loads, default={},
+                        help="JSON dictionary of attributes to set before the call.")
+    parser.add_argument("--completed", default=None, help="File to record the completed call in.")
+    args = parser.parse_args()
+    run_phase_hook(args.state_filename, args.method, args.args, args.settings, args.completed)
+
+
+if __name__ == "__main__":
+    main()
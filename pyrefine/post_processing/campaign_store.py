@@ -0,0 +1,308 @@
+import ast
+import glob
+import json
+import os
+import re
+import sqlite3
+import numpy as np
+from typing import Dict, List, Tuple
+
+from .fun3d_file_reader import Fun3dAdaptationSteadyHistoryReader
+from .sfe_file_reader import SFEForwardHistoryReader, SFEGoalOrientedHistoryReader
+
+#: Source name of the steady adaptation histories (final hist values of each mesh)
+SOURCE_FUN3D_STEADY = "fun3d_steady"
+#: Source name of the SFE forward solve histories of each mesh
+SOURCE_SFE_FORWARD = "sfe_forward"
+#: Source name of the SFE adjoint histories
+SOURCE_SFE_ADJOINT = "sfe_adjoint"
+#: Source name of the flutter history.dat files
+SOURCE_FLUTTER = "flutter"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    name TEXT PRIMARY KEY,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS series (
+    case_name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    mesh INTEGER NOT NULL,
+    variable TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (case_name, source, mesh, variable)
+);
+CREATE INDEX IF NOT EXISTS series_by_variable ON series (source, variable);
+CREATE TABLE IF NOT EXISTS ingested (
+    case_name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    mesh INTEGER NOT NULL,
+    signature TEXT NOT NULL,
+    PRIMARY KEY (case_name, source, mesh)
+);
+"""
+
+
+class CampaignStore:
+    def __init__(self, filename: str):
+        """
+        A single on-disk store for the results of many adaptation cases.
+
+        Each variable is stored as one array, indexed by the case name, the data source
+        (e.g. the steady adaptation history or an SFE forward solve), the mesh number,
+        and the variable name. Mesh number 0 is used for series that span the
+        adaptation, like the final hist values of each mesh. Cases carry user metadata
+        such as the Mach number that can be used to select cases in queries.
+
+        Ingestion is incremental: the signature (path, modification time, size) of the
+        files of a case is recorded, and cases whose files are unchanged are skipped.
+
+        Parameters
+        ----------
+        filename:
+            The SQLite database file. It is created if it does not exist
+        """
+        #: str: the SQLite database file
+        self.filename = filename
+        self._connection = sqlite3.connect(filename)
+        self._connection.executescript(_SCHEMA)
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add_case(self, case_name: str, metadata: dict = None):
+        """
+        Add a case or replace its metadata
+
+        Parameters
+        ----------
+        case_name:
+            Unique name of the case
+        metadata:
+            JSON serializable values describing the case, e.g. ``{"mach": 0.8, "aoa": 2.0}``
+        """
+        metadata = {} if metadata is None else metadata
+        with self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO cases (name, metadata) VALUES (?, ?)",
+                                     (case_name, json.dumps(metadata)))
+
+    def get_metadata(self, case_name: str) -> dict:
+        row = self._connection.execute("SELECT metadata FROM cases WHERE name = ?", (case_name,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown case: {case_name}")
+        return json.loads(row[0])
+
+    def cases(self, where: dict = None) -> List[str]:
+        """
+        Get the names of the cases whose metadata matches all the key-value pairs in ``where``
+        """
+        where = {} if where is None else where
+        names = []
+        for name, metadata in self._connection.execute("SELECT name, metadata FROM cases ORDER BY name"):
+            metadata = json.loads(metadata)
+            if all(key in metadata and _values_match(metadata[key], value) for key, value in where.items()):
+                names.append(name)
+        return names
+
+    def variables(self, case_name: str, source: str = SOURCE_FUN3D_STEADY, mesh: int = 0) -> List[str]:
+        rows = self._connection.execute(
+            "SELECT variable FROM series WHERE case_name = ? AND source = ? AND mesh = ? ORDER BY rowid",
+            (case_name, source, mesh))
+        return [row[0] for row in rows]
+
+    def meshes(self, case_name: str, source: str) -> List[int]:
+        rows = self._connection.execute(
+            "SELECT DISTINCT mesh FROM series WHERE case_name = ? AND source = ? ORDER BY mesh", (case_name, source))
+        return [row[0] for row in rows]
+
+    def get(self, case_name: str, variable: str, source: str = SOURCE_FUN3D_STEADY, mesh: int = 0) -> np.ndarray:
+        """
+        Get one stored array
+        """
+        row = self._connection.execute(
+            "SELECT dtype, shape, data FROM series WHERE case_name = ? AND source = ? AND mesh = ? AND variable = ?",
+            (case_name, source, mesh, variable)).fetchone()
+        if row is None:
+            raise KeyError(f"No {variable} for case {case_name}, source {source}, mesh {mesh}")
+        return _decode_array(*row)
+
+    def query(self, y_variable: str, x_variable: str = "Number of Nodes", source: str = SOURCE_FUN3D_STEADY,
+              mesh: int = 0, where: dict = None) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get a pair of variables for all the cases that match the metadata selection,
+        e.g. C_D vs. number of nodes for all the Mach 0.8 cases:
+        ``store.query("C_D", where={"mach": 0.8})``
+
+        Returns
+        -------
+        data:
+            (x, y) arrays keyed by case name. Cases that are missing either variable are skipped
+        """
+        selected_cases = set(self.cases(where))
+        rows = self._connection.execute(
+            "SELECT case_name, variable, dtype, shape, data FROM series "
+            "WHERE source = ? AND mesh = ? AND variable IN (?, ?)", (source, mesh, x_variable, y_variable))
+        found = {}
+        for case_name, variable, dtype, shape, data in rows:
+            if case_name in selected_cases:
+                found.setdefault(case_name, {})[variable] = _decode_array(dtype, shape, data)
+        return {case_name: (arrays[x_variable], arrays[y_variable]) for case_name, arrays in sorted(found.items())
+                if x_variable in arrays and y_variable in arrays}
+
+    def ingest_steady_history(self, case_name: str, data_directory: str, project_rootname: str,
+                              metadata: dict = None) -> bool:
+        """
+        Store the number of nodes and final hist values of each mesh of a steady FUN3D adaptation.
+
+        Returns
+        -------
+        ingested:
+            False if the files were unchanged since the last ingestion
+        """
+        files = [f"{data_directory}/{project_rootname}[0-9]*{suffix}"
+                 for suffix in [".grid_info", "_flow_out", "_hist.dat"]]
+        signature = _create_signature(files)
+        if not self._needs_ingestion(case_name, metadata, SOURCE_FUN3D_STEADY, 0, signature):
+            return False
+
+        reader = Fun3dAdaptationSteadyHistoryReader(data_directory, project_rootname)
+        arrays = {"Number of Nodes": reader.number_of_nodes}
+        arrays.update(reader.final_hist_values)
+        self._store_arrays(case_name, SOURCE_FUN3D_STEADY, 0, arrays, signature)
+        return True
+
+    def ingest_sfe_forward(self, case_name: str, data_directory: str, project_rootname: str,
+                           metadata: dict = None) -> List[int]:
+        """
+        Store the convergence, timing, and preconditioner histories of each SFE forward solve.
+
+        Returns
+        -------
+        ingested_meshes:
+            The mesh numbers whose log files were new or changed
+        """
+        self._update_case(case_name, metadata)
+        ingested_meshes = []
+        imesh = 1
+        while os.path.isfile(f"{data_directory}/flow{imesh:02}.out"):
+            signature = _create_signature([f"{data_directory}/flow{imesh:02}.out"])
+            if self._needs_ingestion(case_name, None, SOURCE_SFE_FORWARD, imesh, signature):
+                reader = SFEForwardHistoryReader(data_directory, project_rootname, imesh)
+                arrays = {}
+                for prefix, data in [("residual", reader.residual_convergence_data),
+                                     ("timing", reader.timing_data),
+                                     ("normalized timing", reader.norm_timing_data),
+                                     ("preconditioner", reader.preconditioner_data)]:
+                    for variable, values in data.items():
+                        arrays[f"{prefix}: {variable}"] = np.asarray(values)
+                self._store_arrays(case_name, SOURCE_SFE_FORWARD, imesh, arrays, signature)
+                ingested_meshes.append(imesh)
+            imesh += 1
+        return ingested_meshes
+
+    def ingest_sfe_adjoint(self, case_name: str, data_directory: str, project_rootname: str,
+                           metadata: dict = None) -> bool:
+        """
+        Store the adjoint history of an SFE goal oriented adaptation.
+
+        Returns
+        -------
+        ingested:
+            False if the files were unchanged since the last ingestion
+        """
+        signature = _create_signature([f"{data_directory}/adjoint[0-9]*.out"])
+        if not self._needs_ingestion(case_name, metadata, SOURCE_SFE_ADJOINT, 0, signature):
+            return False
+        reader = SFEGoalOrientedHistoryReader(data_directory, project_rootname)
+        arrays = {variable: np.asarray(values) for variable, values in reader.adjoint_data.items()}
+        self._store_arrays(case_name, SOURCE_SFE_ADJOINT, 0, arrays, signature)
+        return True
+
+    def ingest_flutter_history(self, case_name: str, history_file: str, metadata: dict = None) -> bool:
+        """
+        Store the columns of the ``history.dat`` file written by the LFD flutter simulations.
+
+        Returns
+        -------
+        ingested:
+            False if the file was unchanged since the last ingestion
+        """
+        signature = _create_signature([history_file])
+        if not self._needs_ingestion(case_name, metadata, SOURCE_FLUTTER, 0, signature):
+            return False
+        self._store_arrays(case_name, SOURCE_FLUTTER, 0, _read_flutter_history(history_file), signature)
+        return True
+
+    def _update_case(self, case_name: str, metadata: dict):
+        if metadata is not None:
+            self.add_case(case_name, metadata)
+        elif self._connection.execute("SELECT 1 FROM cases WHERE name = ?", (case_name,)).fetchone() is None:
+            self.add_case(case_name, {})
+
+    def _needs_ingestion(self, case_name: str, metadata: dict, source: str, mesh: int, signature: str) -> bool:
+        self._update_case(case_name, metadata)
+        row = self._connection.execute(
+            "SELECT signature FROM ingested WHERE case_name = ? AND source = ? AND mesh = ?",
+            (case_name, source, mesh)).fetchone()
+        return row is None or row[0] != signature
+
+    def _store_arrays(self, case_name: str, source: str, mesh: int, arrays: Dict[str, np.ndarray], signature: str):
+        with self._connection:
+            self._connection.execute("DELETE FROM series WHERE case_name = ? AND source = ? AND mesh = ?",
+                                     (case_name, source, mesh))
+            self._connection.executemany(
+                "INSERT INTO series (case_name, source, mesh, variable, dtype, shape, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(case_name, source, mesh, variable) + _encode_array(values) for variable, values in arrays.items()])
+            self._connection.execute(
+                "INSERT OR REPLACE INTO ingested (case_name, source, mesh, signature) VALUES (?, ?, ?, ?)",
+                (case_name, source, mesh, signature))
+
+
+def _values_match(stored, requested) -> bool:
+    if isinstance(stored, (int, float)) and isinstance(requested, (int, float)) and \
+            not isinstance(stored, bool) and not isinstance(requested, bool):
+        return bool(np.isclose(stored, requested))
+    return stored == requested
+
+
+def _create_signature(file_patterns: List[str]) -> str:
+    signature = []
+    for pattern in file_patterns:
+        for file in sorted(glob.glob(pattern)):
+            stat = os.stat(file)
+            signature.append([file, stat.st_mtime_ns, stat.st_size])
+    return json.dumps(signature)
+
+
+def _encode_array(values) -> tuple:
+    array = np.ascontiguousarray(values)
+    if array.dtype == object:
+        raise ValueError("Only numeric arrays can be stored")
+    return array.dtype.str, json.dumps(list(array.shape)), array.tobytes()
+
+
+def _decode_array(dtype: str, shape: str, data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.dtype(dtype)).reshape(json.loads(shape))
+
+
+def _read_flutter_history(history_file: str) -> Dict[str, np.ndarray]:
+    with open(history_file, "r") as fh:
+        lines = fh.readlines()
+    names = lines[0].split()
+    columns = {name: [] for name in names}
+    for line in lines[1:]:
+        # list-valued columns like R_flutter are written as python lists which can contain spaces
+        tokens = re.findall(r"\[[^\]]*\]|\S+", line)
+        for name, token in zip(names, tokens):
+            columns[name].append(ast.literal_eval(token))
+    return {name: np.array(values) for name, values in columns.items()}
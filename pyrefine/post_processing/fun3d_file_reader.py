@@ -1,3 +1,5 @@
+import json
+import os
 import numpy as np
 from pathlib import Path
 from typing import List
@@ -8,10 +10,15 @@ from pyrefine.shell_utils import grep, tail
 
 
 class Fun3dAdaptationSteadyHistoryReader:
-    def __init__(self, data_directory: str, project_rootname: str, number_of_meshes: int = -1):
+    def __init__(self, data_directory: str, project_rootname: str, number_of_meshes: int = -1,
+                 cache_file: str = None):
         """
         Class for post-processing an adaptation run with FUN3D.
 
+        The parsed values of each mesh are cached and keyed by the path, modification time, and size
+        of the files they came from. Calling :meth:`update` only reads meshes that are new or whose
+        files have changed, so the reader can be kept alive and refreshed while an adaptation is running.
+
         Parameters
         ----------
         data_directory:
@@ -23,6 +30,10 @@ class Fun3dAdaptationSteadyHistoryReader:
         number_of_meshes:
             number of meshes to read. If left as the default value of -1, the number of meshes
             will be counted based on the files found in the ``data_directory``
+
+        cache_file:
+            Optional sidecar file for persisting the per-mesh cache between sessions.
+            If the file exists, it is loaded before reading. The cache is saved after every read.
         """
         self.data_directory = data_directory
         self.project_rootname = project_rootname
@@ -38,18 +49,158 @@ class Fun3dAdaptationSteadyHistoryReader:
         #: dict: history of values. Key is the variable name. Value is the numpy array with the history of that variable.
         self.final_hist_values = {}
 
+        #: str: sidecar file for the per-mesh cache. If None, the cache is only held in memory
+        self.cache_file = cache_file
+
+        self._requested_number_of_meshes = number_of_meshes
+        self._mesh_cache = {}
+        self._variable_names = []
+        self._node_buffer = np.zeros(0)
+        self._hist_buffers = {}
+
         if self.data_directory != "" and project_rootname != "":
+            if self.cache_file is not None and os.path.isfile(self.cache_file):
+                self.load_cache(self.cache_file)
             self._read_data(number_of_meshes)
 
     def _read_data(self, number_of_meshes=0):
-        if number_of_meshes > 0:
-            self.number_of_meshes = number_of_meshes
-        else:
-            self.number_of_meshes = self._count_number_of_meshes()
-        self.number_of_nodes = self._read_number_of_nodes_for_all_meshes()
-        self.final_hist_values = self._read_final_line_of_hist_file_for_all_meshes()
+        self._requested_number_of_meshes = number_of_meshes
+        self.update()
+
+    def update(self) -> List[int]:
+        """
+        Read the meshes that are new or whose files changed since the last read.
+        Meshes with unchanged files are taken from the cache.
 
+        Returns
+        -------
+        updated_meshes:
+            The mesh numbers that were (re)read
+        """
+        if self._requested_number_of_meshes > 0:
+            number_of_meshes = self._requested_number_of_meshes
+        else:
+            number_of_meshes = self._count_number_of_meshes()
+
+        updated_meshes = []
+        for imesh in range(1, number_of_meshes + 1):
+            node_file, hist_file = self._get_files_for_mesh(imesh)
+            signature = self._create_file_signature([node_file, hist_file])
+            cached = self._mesh_cache.get(imesh)
+            if cached is not None and cached["signature"] == signature:
+                continue
+            self._mesh_cache[imesh] = self._read_mesh(imesh, node_file, hist_file, signature)
+            updated_meshes.append(imesh)
+
+        self._store_mesh_values(number_of_meshes, updated_meshes)
         self.execute_commands()
+        if self.cache_file is not None and len(updated_meshes) > 0:
+            self.save_cache(self.cache_file)
+        return updated_meshes
+
+    def save_cache(self, filename: str = None):
+        """
+        Write the per-mesh cache to a sidecar file
+
+        Parameters
+        ----------
+        filename:
+            The sidecar file. Defaults to ``cache_file``
+        """
+        filename = self.cache_file if filename is None else filename
+        cache = {"data_directory": str(self.data_directory),
+                 "project_rootname": self.project_rootname,
+                 "variable_names": self._variable_names,
+                 "meshes": {str(imesh): entry for imesh, entry in self._mesh_cache.items()}}
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, "w") as fh:
+            json.dump(cache, fh)
+        os.replace(tmp_filename, filename)
+
+    def load_cache(self, filename: str = None):
+        """
+        Load the per-mesh cache from a sidecar file. Cache files written for
+        a different data directory or project are ignored.
+
+        Parameters
+        ----------
+        filename:
+            The sidecar file. Defaults to ``cache_file``
+        """
+        filename = self.cache_file if filename is None else filename
+        with open(filename, "r") as fh:
+            cache = json.load(fh)
+        if cache.get("data_directory") != str(self.data_directory) or \
+                cache.get("project_rootname") != self.project_rootname:
+            return
+        self._variable_names = cache["variable_names"]
+        self._mesh_cache = {int(imesh): entry for imesh, entry in cache["meshes"].items()}
+
+    def _get_files_for_mesh(self, imesh: int):
+        project = f"{self.project_rootname}{imesh:02}"
+        node_file = Path(f"{self.data_directory}/{project}.grid_info")
+        if not node_file.exists():
+            node_file = Path(f"{self.data_directory}/{project}_flow_out")
+        hist_file = Path(f"{self.data_directory}/{project}_hist.dat")
+        return node_file, hist_file
+
+    def _create_file_signature(self, files: List[Path]) -> list:
+        signature = []
+        for file in files:
+            stat = os.stat(file)
+            signature.append([str(file), stat.st_mtime_ns, stat.st_size])
+        return signature
+
+    def _read_mesh(self, imesh: int, node_file: Path, hist_file: Path, signature: list) -> dict:
+        if node_file.suffix == ".grid_info":
+            number_of_nodes = self._read_number_of_nodes_from_grid_info(str(node_file))
+        else:
+            number_of_nodes = self._read_number_of_nodes_from_flow_out(node_file)
+
+        if imesh == 1 or len(self._variable_names) == 0:
+            self._variable_names = self._read_hist_variable_names(str(hist_file))
+        final_line = tail(str(hist_file), n=1)[0]
+        values = final_line.split()
+        hist_values = [float(values[ivar]) for ivar in range(len(self._variable_names))]
+        return {"signature": signature, "number_of_nodes": number_of_nodes, "hist_values": hist_values}
+
+    def _store_mesh_values(self, number_of_meshes: int, updated_meshes: List[int]):
+        if number_of_meshes > self._node_buffer.size or \
+                set(self._hist_buffers.keys()) != set(self._variable_names):
+            self._grow_buffers(number_of_meshes)
+        # meshes beyond the previous count may come from the cache without being reread
+        new_meshes = range(self.number_of_meshes + 1, number_of_meshes + 1)
+        for imesh in sorted(set(updated_meshes).union(new_meshes)):
+            entry = self._mesh_cache[imesh]
+            self._node_buffer[imesh - 1] = entry["number_of_nodes"]
+            for ivar, var in enumerate(self._variable_names):
+                self._hist_buffers[var][imesh - 1] = entry["hist_values"][ivar]
+
+        self.number_of_meshes = number_of_meshes
+        self.number_of_nodes = self._node_buffer[:number_of_meshes]
+        self.final_hist_values = {var: self._hist_buffers[var][:number_of_meshes] for var in self._variable_names}
+
+    def _grow_buffers(self, number_of_meshes: int):
+        """
+        Resize the buffers geometrically so that appending meshes is amortized O(1).
+        If the variable names changed, the buffers are rebuilt from the cache.
+        """
+        capacity = max(number_of_meshes, 2 * self._node_buffer.size, 8)
+        node_buffer = np.zeros(capacity)
+        node_buffer[:self._node_buffer.size] = self._node_buffer
+        self._node_buffer = node_buffer
+
+        hist_buffers = {}
+        for ivar, var in enumerate(self._variable_names):
+            hist_buffers[var] = np.zeros(capacity, dtype=float)
+            if var in self._hist_buffers:
+                old = self._hist_buffers[var]
+                hist_buffers[var][:old.size] = old
+            else:
+                for imesh, entry in self._mesh_cache.items():
+                    if imesh <= capacity:
+                        hist_buffers[var][imesh - 1] = entry["hist_values"][ivar]
+        self._hist_buffers = hist_buffers
 
     def execute_commands(self):
         """
@@ -83,18 +234,6 @@ class Fun3dAdaptationSteadyHistoryReader:
         else:
             raise ValueError("The command must be a subclass of PostProcessingCommand")
 
-    def _read_number_of_nodes_for_all_meshes(self) -> np.ndarray:
-        number_of_nodes = np.zeros(self.number_of_meshes)
-        for imesh in range(1, self.number_of_meshes + 1):
-            filepath = Path(f"{self.data_directory}/{self.project_rootname}{imesh:02}.grid_info")
-            if filepath.exists():
-                print(filepath)
-                number_of_nodes[imesh - 1] = self._read_number_of_nodes_from_grid_info(str(filepath))
-            else:
-                filepath = Path(f"{self.data_directory}/{self.project_rootname}{imesh:02}_flow_out")
-                number_of_nodes[imesh - 1] = self._read_number_of_nodes_from_flow_out(filepath)
-        return number_of_nodes
-
     def _read_number_of_nodes_from_grid_info(self, file: str):
         node_line = grep("number of nodes", file, head=1)[0]
         return int(node_line.split(":")[-1])
@@ -111,35 +250,28 @@ class Fun3dAdaptationSteadyHistoryReader:
 
     def _count_number_of_meshes(self):
         base_path = Path(self.data_directory)
-        grid_info_files = list(base_path.glob(f"{self.project_rootname}*.grid_info"))
-        flow_out_files = list(base_path.glob(f"{self.project_rootname}*flow_out"))
-        if len(grid_info_files) == 0 and len(flow_out_files) == 0:
-            raise RuntimeError(f"Could not find grid_info or flow_out files in {self.data_directory}")
+        if self.number_of_meshes == 0:
+            grid_info_files = list(base_path.glob(f"{self.project_rootname}*.grid_info"))
+            flow_out_files = list(base_path.glob(f"{self.project_rootname}*flow_out"))
+            if len(grid_info_files) == 0 and len(flow_out_files) == 0:
+                raise RuntimeError(f"Could not find grid_info or flow_out files in {self.data_directory}")
 
-        mesh_num = 1
-        while (base_path / f"{self.project_rootname}{mesh_num:02}.grid_info").exists():
-            mesh_num += 1
+        number_of_meshes = self._count_consecutive_files(base_path, ".grid_info")
 
         # Try to recover if grid info files were irregular
-        if mesh_num == 1:
-            while (base_path / f"{self.project_rootname}{mesh_num:02}_flow_out").exists():
-                mesh_num += 1
-        return mesh_num - 1
+        if number_of_meshes == 0:
+            number_of_meshes = self._count_consecutive_files(base_path, "_flow_out")
+        return number_of_meshes
 
-    def _read_final_line_of_hist_file_for_all_meshes(self) -> dict:
-        hist_data = {}
-        for imesh in range(1, self.number_of_meshes + 1):
-            project = f"{self.project_rootname}{imesh:02}"
-            file = f"{self.data_directory}/{project}_hist.dat"
-            if imesh == 1:
-                variable_names = self._read_hist_variable_names(file)
-                for var in variable_names:
-                    hist_data[var] = np.zeros(self.number_of_meshes, dtype=float)
-            final_line = tail(file, n=1)[0]
-            values = final_line.split()
-            for ivar, var in enumerate(variable_names):
-                hist_data[var][imesh - 1] = float(values[ivar])
-        return hist_data
+    def _count_consecutive_files(self, base_path: Path, suffix: str):
+        mesh_num = 1
+        # Resume the search from the previously read meshes
+        if self.number_of_meshes > 0 and \
+                (base_path / f"{self.project_rootname}{self.number_of_meshes:02}{suffix}").exists():
+            mesh_num = self.number_of_meshes + 1
+        while (base_path / f"{self.project_rootname}{mesh_num:02}{suffix}").exists():
+            mesh_num += 1
+        return mesh_num - 1
 
     def _read_hist_variable_names(self, hist_file: str):
         variable_line = grep("VARIABLES", hist_file)[0]
@@ -149,13 +281,15 @@ class Fun3dAdaptationSteadyHistoryReader:
             variables[ivar] = variables[ivar].replace('"', "").strip()
         return variables
 
-    def write_data_to_tec(self, filename: str):
+    def write_data_to_tec(self, filename: str, file_format: str = "ascii"):
         """
         Write the history information to a tecplot file
 
         Parameters
         ----------
         filename
+        file_format:
+            "ascii" or "binary"
         """
         title = f"{self.project_rootname}_adapt_hist"
         zone = f"{self.project_rootname}"
@@ -166,7 +300,7 @@ class Fun3dAdaptationSteadyHistoryReader:
         for ivar, (var, var_data) in enumerate(self.final_hist_values.items()):
             variables.append(var)
             data[:, ivar + 1] = var_data
-        write_data_to_tecplot_format(filename, title, data, variables, zone)
+        write_data_to_tecplot_format(filename, title, data, variables, zone, file_format)
 
     def write_data_to_csv(self, filename: str):
         """
@@ -0,0 +1,326 @@
+import os
+import re
+import time
+import numpy as np
+from typing import Dict, Iterator, List
+
+from pyrefine.shell_utils import tail
+
+from .post_processing_command import PostProcessingCommand
+
+
+# the Tecplot header lines, including the quoted variable names that continue a VARIABLES line
+_HEADER_LINE_PATTERN = re.compile(rb'^[ \t]*(?:(?:TITLE|VARIABLES|ZONE|AUXDATA|DATASETAUXDATA)\b|").*$',
+                                  flags=re.MULTILINE | re.IGNORECASE)
+
+
+class Fun3dHistFile:
+    def __init__(self, filename: str, use_cache: bool = True, must_exist: bool = True,
+                 chunk_size: int = 16 * 1024 * 1024):
+        """
+        Reader for the full iteration history in a FUN3D ``_hist.dat`` file.
+
+        The Tecplot header is parsed once and the numeric rows are converted in
+        bulk, one chunk of the file at a time. The byte offset of the last complete
+        line that was read is tracked, so :meth:`update` only parses lines appended
+        since the last read. This allows the history of a running job to be followed.
+
+        Parameters
+        ----------
+        filename:
+            The hist file to read
+
+        use_cache:
+            Whether to write and read a binary sidecar cache, ``{filename}.npz``, so that
+            reloading a large history does not need to parse the text again.
+            The cache is written at the end of :meth:`read` and :meth:`follow`, not by every :meth:`update`
+
+        must_exist:
+            If False, a missing file is treated as an empty history. This is useful when
+            following the history of a job that has not started writing yet
+
+        chunk_size:
+            Number of bytes that are parsed at a time
+        """
+        #: str: the hist file
+        self.filename = filename
+
+        #: bool: whether to use the binary sidecar cache
+        self.use_cache = use_cache
+
+        #: int: number of bytes that are parsed at a time
+        self.chunk_size = chunk_size
+
+        #: list: variable names from the Tecplot header
+        self.variables: List[str] = []
+
+        #: np.ndarray: the history with shape (number of rows, number of variables)
+        self.data = np.zeros((0, 0))
+
+        self._offset = 0
+        self._header_offset = 0
+        self._buffer = np.zeros((0, 0))
+        self._number_of_rows = 0
+        self._cached_number_of_rows = None
+
+        if must_exist and not os.path.isfile(filename):
+            raise FileNotFoundError(f"Could not find hist file: {filename}")
+        self.read()
+
+    @property
+    def cache_filename(self) -> str:
+        return f"{self.filename}.npz"
+
+    @property
+    def number_of_rows(self) -> int:
+        return self._number_of_rows
+
+    def __getitem__(self, variable: str) -> np.ndarray:
+        return self.data[:, self.variables.index(variable)]
+
+    def read(self):
+        """
+        Read the full file. The sidecar cache is used if it is valid and rewritten if rows were added
+        """
+        self._reset()
+        if self.use_cache:
+            self._load_cache()
+        self.update()
+        self._save_cache_if_stale()
+
+    def update(self) -> int:
+        """
+        Parse the lines that were appended to the file since the last read.
+        If the file was truncated or replaced, the full file is reread.
+        The sidecar cache is not rewritten, so following a long history stays linear in its size.
+
+        Returns
+        -------
+        number_of_new_rows:
+            The number of rows that were added to the history
+        """
+        if not os.path.isfile(self.filename):
+            return 0
+        file_size = os.path.getsize(self.filename)
+        if file_size < self._offset:
+            self._reset()
+
+        with open(self.filename, "rb") as fh:
+            if len(self.variables) == 0:
+                if not self._read_header(fh):
+                    return 0
+            fh.seek(self._offset)
+
+            rows_before = self._number_of_rows
+            remainder = b""
+            while True:
+                chunk = fh.read(self.chunk_size)
+                if not chunk:
+                    break
+                chunk = remainder + chunk
+                last_newline = chunk.rfind(b"\n")
+                if last_newline == -1:
+                    remainder = chunk
+                    continue
+                remainder = chunk[last_newline + 1:]
+                self._append_rows(self._parse_rows(chunk[:last_newline + 1]))
+                self._offset += last_newline + 1
+        return self._number_of_rows - rows_before
+
+    def follow(self, poll_interval: float = 1.0, timeout: float = None) -> Iterator[np.ndarray]:
+        """
+        Tail-follow the file of a running job. The sidecar cache is rewritten once
+        when following stops, including when the caller stops iterating.
+
+        Parameters
+        ----------
+        poll_interval:
+            Seconds between checks for new lines
+
+        timeout:
+            Stop following if the file has not grown for this many seconds.
+            If None, follow until the caller stops iterating.
+
+        Yields
+        ------
+        new_rows:
+            The rows that were appended since the previous check
+        """
+        last_growth = time.time()
+        try:
+            while True:
+                rows_before = self._number_of_rows
+                if self.update() > 0:
+                    last_growth = time.time()
+                    yield self.data[rows_before:]
+                elif timeout is not None and time.time() - last_growth > timeout:
+                    return
+                else:
+                    time.sleep(poll_interval)
+        finally:
+            self._save_cache_if_stale()
+
+    def save_cache(self):
+        """
+        Write the parsed history to the binary sidecar file
+        """
+        stat = os.stat(self.filename)
+        tmp_filename = f"{self.cache_filename}.tmp.npz"
+        np.savez(tmp_filename, data=self.data, variables=np.array(self.variables),
+                 offset=self._offset, header_offset=self._header_offset,
+                 source_mtime_ns=stat.st_mtime_ns, source_size=stat.st_size)
+        os.replace(tmp_filename, self.cache_filename)
+        self._cached_number_of_rows = self._number_of_rows
+
+    def _save_cache_if_stale(self):
+        if self.use_cache and self._number_of_rows > 0 and self._number_of_rows != self._cached_number_of_rows:
+            self.save_cache()
+
+    def _load_cache(self) -> bool:
+        if not os.path.isfile(self.cache_filename) or not os.path.isfile(self.filename):
+            return False
+        try:
+            with np.load(self.cache_filename) as cache:
+                source_size = int(cache["source_size"])
+                offset = int(cache["offset"])
+                file_size = os.path.getsize(self.filename)
+                unchanged = file_size == source_size and \
+                    os.stat(self.filename).st_mtime_ns == int(cache["source_mtime_ns"])
+                appended = file_size > source_size
+                if not (unchanged or appended):
+                    return False
+                self.variables = [str(var) for var in cache["variables"]]
+                self._header_offset = int(cache["header_offset"])
+                self._offset = offset
+                data = cache["data"]
+        except (OSError, KeyError, ValueError):
+            return False
+        if appended and not self._header_is_unchanged():
+            self._reset()
+            return False
+        self._buffer = data.copy()
+        self._number_of_rows = data.shape[0]
+        self._cached_number_of_rows = self._number_of_rows
+        self.data = self._buffer[:self._number_of_rows]
+        return True
+
+    def _header_is_unchanged(self) -> bool:
+        variables, offset = self.variables, self._offset
+        self.variables = []
+        with open(self.filename, "rb") as fh:
+            found_header = self._read_header(fh)
+        header_variables = self.variables
+        self.variables, self._offset = variables, offset
+        return found_header and header_variables == variables
+
+    def _reset(self):
+        self.variables = []
+        self._offset = 0
+        self._header_offset = 0
+        self._buffer = np.zeros((0, 0))
+        self._number_of_rows = 0
+        self._cached_number_of_rows = None
+        self.data = np.zeros((0, 0))
+
+    def _read_header(self, fh) -> bool:
+        """
+        Read the TITLE/VARIABLES/ZONE header. Returns False if the header is not complete yet
+        """
+        fh.seek(0)
+        header_lines = []
+        offset = 0
+        for line in fh:
+            if not line.endswith(b"\n"):
+                return False
+            offset += len(line)
+            header_lines.append(line.decode(errors="replace"))
+            if line.lstrip().upper().startswith(b"ZONE"):
+                break
+        else:
+            return False
+
+        self.variables = _parse_variable_names("".join(header_lines), self.filename)
+        self._buffer = np.zeros((0, len(self.variables)))
+        self.data = self._buffer
+        self._header_offset = offset
+        self._offset = offset
+        return True
+
+    def _parse_rows(self, text: bytes) -> np.ndarray:
+        # Restarted runs can have additional ZONE or header lines in the middle of the data
+        if _HEADER_LINE_PATTERN.search(text):
+            text = _HEADER_LINE_PATTERN.sub(b"", text)
+        values = np.fromstring(text.decode(), sep=" ")
+        number_of_variables = len(self.variables)
+        if values.size % number_of_variables != 0:
+            raise ValueError(f"Number of values in {self.filename} is not a multiple of "
+                             f"the number of variables, {number_of_variables}")
+        return values.reshape((-1, number_of_variables))
+
+    def _append_rows(self, rows: np.ndarray):
+        number_of_rows = self._number_of_rows + rows.shape[0]
+        if number_of_rows > self._buffer.shape[0]:
+            capacity = max(number_of_rows, 2 * self._buffer.shape[0], 1024)
+            buffer = np.zeros((capacity, len(self.variables)))
+            buffer[:self._number_of_rows] = self._buffer[:self._number_of_rows]
+            self._buffer = buffer
+        self._buffer[self._number_of_rows:number_of_rows] = rows
+        self._number_of_rows = number_of_rows
+        self.data = self._buffer[:number_of_rows]
+
+
+def read_final_hist_values(filename: str, header_size: int = 64 * 1024) -> Dict[str, float]:
+    """
+    Read the variable names and the last row of a hist file without parsing the rest of the file.
+
+    Returns
+    -------
+    values:
+        The final value of each variable. Empty if the file does not have any rows yet
+    """
+    with open(filename, "rb") as fh:
+        header = fh.read(header_size).decode(errors="replace")
+    variables = _parse_variable_names(header, filename)
+    for line in reversed(tail(filename, n=5)):
+        values = line.split()
+        if line.endswith("\n") and len(values) == len(variables) and not line.lstrip()[:1].isalpha():
+            return {variable: float(value) for variable, value in zip(variables, values)}
+    return {}
+
+
+def _parse_variable_names(header: str, filename: str) -> List[str]:
+    match = re.search("variables[ ]*=(.*?)zone", header, flags=re.IGNORECASE | re.DOTALL)
+    if match is None:
+        raise ValueError(f"Could not find the VARIABLES in the header of {filename}")
+    return [var.strip() for var in re.findall('"([^"]*)"', match.group(1))]
+
+
+class LoadFullHistoryCommand(PostProcessingCommand):
+    def __init__(self, target, use_cache: bool = True):
+        """
+        Post-processing command that loads the full iteration history of each mesh
+        into ``target.full_histories``, a dictionary of :class:`Fun3dHistFile` keyed
+        by the mesh number. Histories that were already loaded are updated with any
+        new lines.
+
+        Parameters
+        ----------
+        target: :class:`~pyrefine.post_processing.fun3d_file_reader.Fun3dAdaptationSteadyHistoryReader`
+            The reader to add the histories to
+
+        use_cache:
+            Whether the hist file readers should use their binary sidecar cache
+        """
+        super().__init__(target)
+        self.use_cache = use_cache
+
+    def execute(self):
+        full_histories = getattr(self.target, "full_histories", {})
+        for imesh in range(1, self.target.number_of_meshes + 1):
+            if imesh in full_histories:
+                full_histories[imesh].update()
+            else:
+                project = f"{self.target.project_rootname}{imesh:02}"
+                hist_file = f"{self.target.data_directory}/{project}_hist.dat"
+                full_histories[imesh] = Fun3dHistFile(hist_file, use_cache=self.use_cache)
+        self.target.full_histories = full_histories
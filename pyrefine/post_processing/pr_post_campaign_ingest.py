@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+"""
+A script to ingest the steady FUN3D adaptation histories of many cases into a campaign store.
+Cases whose files are unchanged since the last ingestion are skipped.
+"""
+import argparse
+import json
+import os
+from pyrefine.post_processing.campaign_store import CampaignStore
+
+
+def arg_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("store", help="Campaign store database file")
+    parser.add_argument("project_rootname", help="Base name of files, e.g. `{project_rootname}01_hist.dat`")
+    parser.add_argument("case_dirs", nargs="+", help="Case directories. The directory name is used as the case name")
+    parser.add_argument("--flow_dir", default="Flow", help="Location of files within each case directory")
+    parser.add_argument("--metadata_file", default="case_metadata.json",
+                        help="Optional json file of case metadata within each case directory")
+    return parser
+
+
+def main():
+    parser = arg_parser()
+    args = parser.parse_args()
+
+    with CampaignStore(args.store) as store:
+        for case_dir in args.case_dirs:
+            case_name = os.path.basename(os.path.abspath(case_dir))
+            metadata = None
+            metadata_file = f"{case_dir}/{args.metadata_file}"
+            if os.path.isfile(metadata_file):
+                with open(metadata_file, "r") as fh:
+                    metadata = json.load(fh)
+            ingested = store.ingest_steady_history(case_name, f"{case_dir}/{args.flow_dir}",
+                                                   args.project_rootname, metadata)
+            print(f"{case_name}: {'ingested' if ingested else 'unchanged'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ def arg_parser():
     parser.add_argument("--dir", default="./Flow", help="Location of files")
     parser.add_argument("--num_meshes", default=-1, type=int, help="Number of meshes, default finds all")
     parser.add_argument("--output_file", default="adapt_hist.dat", help="Tecplot file name")
+    parser.add_argument("--format", default="ascii", choices=["ascii", "binary"], help="Tecplot file format")
     return parser
 
 
@@ -20,7 +21,7 @@ def main():
     args = parser.parse_args()
 
     reader = Fun3dAdaptationSteadyHistoryReader(args.dir, args.project_rootname, number_of_meshes=args.num_meshes)
-    reader.write_data_to_tec(args.output_file)
+    reader.write_data_to_tec(args.output_file, file_format=args.format)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+A script to write static HTML (and optionally PNG) reports of finished adaptations without a Dash server.
+The cases are processed in parallel, and cases whose input files are unchanged since their last report are skipped.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from pyrefine.post_processing.report import CaseReport
+
+
+def arg_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("project_rootname", help="Base name of files, e.g. `{project_rootname}01_hist.dat`")
+    parser.add_argument("case_dirs", nargs="+", help="Case directories")
+    parser.add_argument("--flow_dir", default="Flow", help="Location of files within each case directory")
+    parser.add_argument("--output_dir", default="report", help="Location of the report within each case directory")
+    parser.add_argument("--sfe", action="store_true", help="Include the SFE convergence and timing of the final mesh")
+    parser.add_argument("--adjoint", action="store_true", help="Include the SFE adjoint history")
+    parser.add_argument("--png", action="store_true", help="Also write PNG images of the figures. Requires kaleido")
+    parser.add_argument("--force", action="store_true", help="Regenerate reports of unchanged cases")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of worker processes. The default is the number of cpus")
+    return parser
+
+
+def create_report(case_dir: str, args) -> str:
+    report = CaseReport(case_dir, args.project_rootname, args.flow_dir, args.output_dir)
+    report.include_sfe = args.sfe
+    report.include_adjoint = args.adjoint
+    report.write_png = args.png
+    if not args.force and report.is_up_to_date():
+        return "unchanged"
+    try:
+        report.generate()
+    except Exception as error:
+        return f"failed: {error}"
+    return f"wrote {report.html_filename}"
+
+
+def main():
+    parser = arg_parser()
+    args = parser.parse_args()
+
+    case_dirs = [os.path.abspath(case_dir) for case_dir in args.case_dirs]
+    if len(case_dirs) == 1 or args.jobs == 1:
+        statuses = [create_report(case_dir, args) for case_dir in case_dirs]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            statuses = list(executor.map(create_report, case_dirs, [args] * len(case_dirs)))
+
+    for case_dir, status in zip(args.case_dirs, statuses):
+        print(f"{case_dir}: {status}")
+
+
+if __name__ == "__main__":
+    main()
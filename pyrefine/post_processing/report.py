@@ -0,0 +1,218 @@
+"""
+Static reports of finished adaptations.
+
+The figures are built directly from the history readers and written to a self-contained
+HTML file, and optionally PNG images, without running a Dash server.
+plotly is only imported when a report is generated, and PNG output also requires kaleido.
+"""
+import glob
+import html
+import json
+import os
+import tempfile
+from typing import List
+
+import numpy as np
+
+from pyrefine.directory_utils import cd
+
+from .fun3d_file_reader import Fun3dAdaptationSteadyHistoryReader
+from .sfe_file_reader import SFEForwardHistoryReader, SFEGoalOrientedHistoryReader
+
+#: Name of the file in the report directory that records the inputs of the last report
+REPORT_SIGNATURE_FILE = "report_signature.json"
+
+
+class CaseReport:
+    def __init__(self, case_dir: str, project_rootname: str, flow_dir: str = "Flow",
+                 output_dir: str = "report"):
+        """
+        A report of one adaptation case
+
+        Parameters
+        ----------
+        case_dir:
+            The case directory
+        project_rootname:
+            Base name of files, e.g. `{project_rootname}01_hist.dat`
+        flow_dir:
+            Location of the solver files within the case directory
+        output_dir:
+            Location of the report within the case directory
+        """
+        #: str: the case directory
+        self.case_dir = os.path.abspath(case_dir)
+        #: str: base name of the files
+        self.project_rootname = project_rootname
+        #: str: directory of the solver files
+        self.data_directory = os.path.join(self.case_dir, flow_dir)
+        #: str: directory the report is written to
+        self.output_dir = os.path.join(self.case_dir, output_dir)
+
+        #: bool: include the SFE convergence and timing of the final mesh
+        self.include_sfe = False
+        #: bool: include the SFE adjoint history
+        self.include_adjoint = False
+        #: bool: also write a PNG image of each figure
+        self.write_png = False
+
+    @property
+    def html_filename(self) -> str:
+        return os.path.join(self.output_dir, "report.html")
+
+    def get_input_files(self) -> List[str]:
+        patterns = [f"{self.project_rootname}[0-9]*_hist.dat", f"{self.project_rootname}[0-9]*.grid_info",
+                    f"{self.project_rootname}[0-9]*_flow_out"]
+        if self.include_sfe:
+            patterns.append("flow[0-9]*.out")
+        if self.include_adjoint:
+            patterns.append("adjoint[0-9]*.out")
+        files = []
+        for pattern in patterns:
+            files.extend(glob.glob(os.path.join(glob.escape(self.data_directory), pattern)))
+        return sorted(files)
+
+    def create_signature(self) -> dict:
+        """
+        The options of the report and the modification time and size of each input file
+        """
+        files = []
+        for filename in self.get_input_files():
+            stat = os.stat(filename)
+            files.append([os.path.relpath(filename, self.case_dir), stat.st_mtime_ns, stat.st_size])
+        options = {"project_rootname": self.project_rootname, "include_sfe": self.include_sfe,
+                   "include_adjoint": self.include_adjoint, "write_png": self.write_png}
+        return {"options": options, "files": files}
+
+    def is_up_to_date(self) -> bool:
+        signature_file = os.path.join(self.output_dir, REPORT_SIGNATURE_FILE)
+        if not os.path.isfile(self.html_filename) or not os.path.isfile(signature_file):
+            return False
+        with open(signature_file, "r") as fh:
+            return json.load(fh) == self.create_signature()
+
+    def generate(self) -> List[str]:
+        """
+        Write the report
+
+        Returns
+        -------
+        filenames:
+            The files that were written
+        """
+        signature = self.create_signature()
+        if not any(filename.endswith("_hist.dat") for filename, _, _ in signature["files"]):
+            raise FileNotFoundError(f"No {self.project_rootname}##_hist.dat files found in {self.data_directory}")
+
+        # The SFE readers write scratch files to the current directory, so they are
+        # parsed in a private directory in case several reports are generated at once
+        with tempfile.TemporaryDirectory() as scratch_dir, cd(scratch_dir):
+            sections = self.create_sections()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        filenames = [self.html_filename]
+        self.write_html(sections)
+        if self.write_png:
+            for name, _, fig in sections:
+                filenames.append(os.path.join(self.output_dir, f"{name}.png"))
+                fig.write_image(filenames[-1])
+
+        with open(os.path.join(self.output_dir, REPORT_SIGNATURE_FILE), "w") as fh:
+            json.dump(signature, fh)
+        return filenames
+
+    def create_sections(self) -> list:
+        """
+        Returns
+        -------
+        sections:
+            List of (name, title, figure)
+        """
+        reader = Fun3dAdaptationSteadyHistoryReader(self.data_directory, self.project_rootname)
+        sections = [("adaptation_history", "Adaptation History", create_adaptation_history_fig(reader))]
+        if self.include_sfe:
+            sfe_reader = SFEForwardHistoryReader(self.data_directory, self.project_rootname, reader.number_of_meshes)
+            sections.append(("sfe_convergence", f"SFE Forward Convergence: Mesh {reader.number_of_meshes}",
+                             create_sfe_convergence_fig(sfe_reader)))
+            sections.append(("sfe_timing", f"SFE Timing Breakdown: Mesh {reader.number_of_meshes}",
+                             create_sfe_timing_breakdown_fig(sfe_reader)))
+        if self.include_adjoint:
+            goal_reader = SFEGoalOrientedHistoryReader(self.data_directory, self.project_rootname)
+            sections.append(("sfe_adjoint", "SFE Adjoint History", create_adjoint_history_fig(goal_reader)))
+        return sections
+
+    def write_html(self, sections: list):
+        case_name = html.escape(os.path.basename(self.case_dir))
+        body = [f"<h1>{case_name}: {html.escape(self.project_rootname)}</h1>"]
+        for isection, (_, title, fig) in enumerate(sections):
+            body.append(f"<h2>{html.escape(title)}</h2>")
+            body.append(fig.to_html(full_html=False, include_plotlyjs=isection == 0))
+        with open(self.html_filename, "w") as fh:
+            fh.write("<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\">"
+                     f"<title>{case_name}</title></head>\n<body>\n")
+            fh.write("\n".join(body))
+            fh.write("\n</body>\n</html>\n")
+
+
+def _create_figure(xaxis_title: str, yaxis_title: str, secondary_y: bool = False):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(specs=[[{"secondary_y": True}]]) if secondary_y else go.Figure()
+    axis_settings = dict(linecolor="black", showgrid=True, gridcolor="lightgray", ticks="outside",
+                         zerolinecolor="black", exponentformat="e")
+    fig.update_layout(plot_bgcolor="white", paper_bgcolor="white", height=600, width=1100,
+                      legend=dict(x=1.1, y=0.5))
+    fig.update_xaxes(title_text=xaxis_title, **axis_settings)
+    fig.update_yaxes(title_text=yaxis_title, **axis_settings)
+    return fig
+
+
+def create_adaptation_history_fig(reader: Fun3dAdaptationSteadyHistoryReader):
+    import plotly.graph_objects as go
+
+    fig = _create_figure("Number of Nodes", "Value")
+    for variable_name, var_data in reader.final_hist_values.items():
+        fig.add_trace(go.Scatter(x=reader.number_of_nodes, y=var_data, mode="lines+markers", name=variable_name,
+                                 visible=None if variable_name == "C_D" else "legendonly"))
+    return fig
+
+
+def create_sfe_convergence_fig(reader: SFEForwardHistoryReader):
+    import plotly.graph_objects as go
+
+    fig = _create_figure("Steps", "Residuals", secondary_y=True)
+    steps = np.arange(1, reader.number_of_steps + 1)
+    for variable_name, var_data in reader.residual_convergence_data.items():
+        sec_y = variable_name in ["CL", "CD"]
+        fig.add_trace(go.Scatter(x=steps, y=var_data, mode="lines", name=variable_name), secondary_y=sec_y)
+    fig.update_yaxes(type="log", secondary_y=False)
+    fig.update_yaxes(title_text="CL, CD", secondary_y=True)
+    return fig
+
+
+def create_sfe_timing_breakdown_fig(reader: SFEForwardHistoryReader):
+    """
+    Total wall clock time of each part of the nonlinear steps
+    """
+    import plotly.graph_objects as go
+
+    fig = _create_figure("", "Total Wall Clock Time [s]")
+    names = list(reader.timing_data.keys())
+    totals = [float(np.sum(reader.timing_data[name])) for name in names]
+    fig.add_trace(go.Bar(x=names, y=totals, name="Total time"))
+    return fig
+
+
+def create_adjoint_history_fig(reader: SFEGoalOrientedHistoryReader):
+    import plotly.graph_objects as go
+
+    fig = _create_figure("Mesh Numbers", "Value", secondary_y=True)
+    adjoint_numbers = np.arange(1, reader.number_of_adjoints + 1)
+    for variable_name, var_data in reader.adjoint_data.items():
+        sec_y = variable_name == "Preconditioner Rank"
+        fig.add_trace(go.Scatter(x=adjoint_numbers, y=var_data, mode="markers" if sec_y else "lines",
+                                 name=variable_name), secondary_y=sec_y)
+    fig.update_yaxes(type="log", secondary_y=False)
+    fig.update_yaxes(title_text="Preconditioner Rank", secondary_y=True)
+    return fig
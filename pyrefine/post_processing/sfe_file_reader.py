@@ -71,7 +71,7 @@ class SFEForwardHistoryReader:
 
         return timing_data
 
-    def write_convergence_data_to_tec(self, filename):
+    def write_convergence_data_to_tec(self, filename, file_format="ascii"):
         title = f'{self.project}_sfe_forward_convergence_hist'
         zone = f'{self.project}'
 
@@ -81,9 +81,9 @@ class SFEForwardHistoryReader:
         for ivar, (var, var_data) in enumerate(self.residual_convergence_data.items()):
             variables.append(var)
             data[:, ivar+1] = var_data
-        write_data_to_tecplot_format(filename, title, data, variables, zone)
+        write_data_to_tecplot_format(filename, title, data, variables, zone, file_format)
 
-    def write_timing_data_to_tec(self, filename):
+    def write_timing_data_to_tec(self, filename, file_format="ascii"):
         title = f'{self.project}_sfe_forward_timing_hist'
         zone = f'{self.project}'
 
@@ -93,9 +93,9 @@ class SFEForwardHistoryReader:
         for ivar, (var, var_data) in enumerate(self.timing_data.items()):
             variables.append(var)
             data[:, ivar+1] = var_data
-        write_data_to_tecplot_format(filename, title, data, variables, zone)
+        write_data_to_tecplot_format(filename, title, data, variables, zone, file_format)
 
-    def write_preconditioner_data_to_tec(self, filename):
+    def write_preconditioner_data_to_tec(self, filename, file_format="ascii"):
         title = f'{self.project}_sfe_forward_preconditioner_hist'
         zone = f'{self.project}'
 
@@ -105,7 +105,7 @@ class SFEForwardHistoryReader:
         for ivar, (var, var_data) in enumerate(self.preconditioner_data.items()):
             variables.append(var)
             data[:, ivar+1] = var_data
-        write_data_to_tecplot_format(filename, title, data, variables, zone)
+        write_data_to_tecplot_format(filename, title, data, variables, zone, file_format)
 
     def set_convergence_data(self) -> dict:
         nonlinear_residual_data = self.extract_nonlinear_residual()
@@ -293,7 +293,7 @@ class SFEGoalOrientedHistoryReader(SFEForwardHistoryReader):
         if self.number_of_adjoints > 0:
             self.adjoint_data = self.extract_adjoint_data()
 
-    def write_adjoint_data_to_tec(self, filename):
+    def write_adjoint_data_to_tec(self, filename, file_format="ascii"):
         title = f'{self.project}_sfe_adjoint_hist'
         zone = f'{self.project}'
 
@@ -303,7 +303,7 @@ class SFEGoalOrientedHistoryReader(SFEForwardHistoryReader):
         for ivar, (var, var_data) in enumerate(self.adjoint_data.items()):
             variables.append(var)
             data[:, ivar+1] = var_data
-        write_data_to_tecplot_format(filename, title, data, variables, zone)
+        write_data_to_tecplot_format(filename, title, data, variables, zone, file_format)
 
     def count_number_of_adjoints(self):
         adjoint_num = 1
@@ -0,0 +1,194 @@
+"""
+Read and write libMeshb solution files (.solb) of the fields at the vertices of a mesh.
+
+The values are memory mapped, so a field can be reduced without reading the whole file into memory.
+"""
+import os
+import struct
+from typing import List
+
+import numpy as np
+
+_KEYWORD_DIMENSION = 3
+_KEYWORD_END = 54
+_KEYWORD_SOL_AT_VERTICES = 62
+
+_FIELD_TYPE_SCALAR = 1
+_FIELD_TYPE_VECTOR = 2
+_FIELD_TYPE_SYMMETRIC_MATRIX = 3
+_FIELD_TYPE_MATRIX = 4
+
+
+class SolbFile:
+    def __init__(self, filename: str, use_mmap: bool = True):
+        """
+        Reader for the solution at the vertices of a libMeshb .solb file.
+
+        Raises FileNotFoundError if the file does not exist and ValueError if the file is not a solb file
+        or is incomplete, e.g., because the flow solver is still writing it.
+
+        Parameters
+        ----------
+        filename:
+            The solb file to read
+        use_mmap:
+            Whether to memory map the values instead of reading them into memory
+        """
+        if not os.path.isfile(filename):
+            raise FileNotFoundError(f"Could not find solb file: {filename}")
+
+        #: str: the solb file
+        self.filename = filename
+
+        #: int: the libMeshb version of the file, which sets the sizes of the reals, integers, and positions
+        self.version = None
+
+        #: int: the spatial dimension of the mesh
+        self.dimension = 3
+
+        #: int: the number of vertices
+        self.number_of_vertices = 0
+
+        #: list: the libMeshb type of each field; 1 scalar, 2 vector, 3 symmetric matrix, 4 matrix
+        self.field_types: List[int] = []
+
+        #: np.ndarray: the values with shape (number of vertices, number of values per vertex)
+        self.values = np.zeros((0, 0))
+
+        self._read(use_mmap)
+
+    @property
+    def number_of_values_per_vertex(self) -> int:
+        return self.values.shape[1]
+
+    def _read(self, use_mmap: bool):
+        file_size = os.path.getsize(self.filename)
+        with open(self.filename, "rb") as fh:
+            header = fh.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{self.filename} is too short to be a solb file")
+            byte_order = "<" if struct.unpack("<i", header[:4])[0] == 1 else ">"
+            if struct.unpack(f"{byte_order}i", header[:4])[0] != 1:
+                raise ValueError(f"{self.filename} is not a solb file")
+            self.version = struct.unpack(f"{byte_order}i", header[4:])[0]
+            if self.version not in (1, 2, 3, 4):
+                raise ValueError(f"{self.filename} has unsupported libMeshb version {self.version}")
+            position_format = f"{byte_order}{'i' if self.version < 3 else 'q'}"
+            integer_format = f"{byte_order}{'i' if self.version < 4 else 'q'}"
+            real_dtype = np.dtype(f"{byte_order}{'f4' if self.version == 1 else 'f8'}")
+
+            values_offset = None
+            position = 8
+            while True:
+                keyword = self._unpack(fh, position, f"{byte_order}i")
+                next_position = self._unpack(fh, position + 4, position_format)
+                if keyword == _KEYWORD_END:
+                    break
+                data_position = position + 4 + struct.calcsize(position_format)
+                if keyword == _KEYWORD_DIMENSION:
+                    self.dimension = self._unpack(fh, data_position, f"{byte_order}i")
+                elif keyword == _KEYWORD_SOL_AT_VERTICES:
+                    values_offset = self._read_field_header(fh, data_position, integer_format, byte_order)
+                if next_position <= position:
+                    raise ValueError(f"{self.filename} has no End keyword")
+                position = next_position
+
+        if values_offset is None:
+            raise ValueError(f"{self.filename} has no solution at the vertices")
+        shape = (self.number_of_vertices, _get_values_per_vertex(self.field_types, self.dimension))
+        if values_offset + shape[0] * shape[1] * real_dtype.itemsize > file_size:
+            raise ValueError(f"{self.filename} is incomplete")
+        if shape[0] * shape[1] == 0:
+            self.values = np.zeros(shape, dtype=real_dtype)
+        elif use_mmap:
+            self.values = np.memmap(self.filename, dtype=real_dtype, mode="r", offset=values_offset, shape=shape)
+        else:
+            with open(self.filename, "rb") as fh:
+                fh.seek(values_offset)
+                self.values = np.fromfile(fh, dtype=real_dtype, count=shape[0] * shape[1]).reshape(shape)
+
+    def _read_field_header(self, fh, position: int, integer_format: str, byte_order: str) -> int:
+        integer_size = struct.calcsize(integer_format)
+        self.number_of_vertices = self._unpack(fh, position, integer_format)
+        number_of_fields = self._unpack(fh, position + integer_size, f"{byte_order}i")
+        types_position = position + integer_size + 4
+        fh.seek(types_position)
+        types = fh.read(4 * number_of_fields)
+        if len(types) < 4 * number_of_fields:
+            raise ValueError(f"{self.filename} is incomplete")
+        self.field_types = list(struct.unpack(f"{byte_order}{number_of_fields}i", types))
+        return types_position + 4 * number_of_fields
+
+    def _unpack(self, fh, position: int, value_format: str):
+        fh.seek(position)
+        data = fh.read(struct.calcsize(value_format))
+        if len(data) < struct.calcsize(value_format):
+            raise ValueError(f"{self.filename} is incomplete")
+        return struct.unpack(value_format, data)[0]
+
+
+def write_solb(filename: str, values: np.ndarray, field_types: List[int] = None, dimension: int = 3):
+    """
+    Write the values at the vertices to a libMeshb .solb file with double precision reals.
+    The file is written to a temporary file which is then renamed, so readers never see a partial file.
+
+    Parameters
+    ----------
+    filename:
+        The solb file to write
+    values:
+        The values with shape (number of vertices,) or (number of vertices, number of values per vertex)
+    field_types:
+        The libMeshb type of each field. The default is one scalar field per value
+    dimension:
+        The spatial dimension of the mesh
+    """
+    values = np.ascontiguousarray(values, dtype="<f8")
+    if values.ndim == 1:
+        values = values.reshape((-1, 1))
+    if values.ndim != 2:
+        raise ValueError(f"solb values must have 1 or 2 dimensions, not {values.ndim}")
+    field_types = [_FIELD_TYPE_SCALAR] * values.shape[1] if field_types is None else list(field_types)
+    if _get_values_per_vertex(field_types, dimension) != values.shape[1]:
+        raise ValueError(f"field types {field_types} do not match {values.shape[1]} values per vertex")
+
+    number_of_vertices = values.shape[0]
+    # 32 bit positions are used unless they are too small to address the end of the file
+    version = 2
+    if number_of_vertices > np.iinfo(np.int32).max:
+        version = 4
+    elif values.nbytes + 4 * len(field_types) + 64 > np.iinfo(np.int32).max:
+        version = 3
+    position_format = "<i" if version < 3 else "<q"
+    integer_format = "<i" if version < 4 else "<q"
+    position_size = struct.calcsize(position_format)
+
+    dimension_position = 8
+    field_position = dimension_position + 4 + position_size + 4
+    values_position = field_position + 4 + position_size + struct.calcsize(integer_format) + 4 + 4 * len(field_types)
+    end_position = values_position + values.nbytes
+
+    temporary_filename = f"{filename}.{os.getpid()}.tmp"
+    with open(temporary_filename, "wb") as fh:
+        fh.write(struct.pack("<ii", 1, version))
+        fh.write(struct.pack("<i", _KEYWORD_DIMENSION) + struct.pack(position_format, field_position))
+        fh.write(struct.pack("<i", dimension))
+        fh.write(struct.pack("<i", _KEYWORD_SOL_AT_VERTICES) + struct.pack(position_format, end_position))
+        fh.write(struct.pack(integer_format, number_of_vertices))
+        fh.write(struct.pack(f"<{1 + len(field_types)}i", len(field_types), *field_types))
+        fh.write(values.data)
+        fh.write(struct.pack("<i", _KEYWORD_END) + struct.pack(position_format, 0))
+    os.replace(temporary_filename, filename)
+
+
+def _get_values_per_vertex(field_types: List[int], dimension: int) -> int:
+    sizes = {_FIELD_TYPE_SCALAR: 1,
+             _FIELD_TYPE_VECTOR: dimension,
+             _FIELD_TYPE_SYMMETRIC_MATRIX: dimension * (dimension + 1) // 2,
+             _FIELD_TYPE_MATRIX: dimension * dimension}
+    number_of_values = 0
+    for field_type in field_types:
+        if field_type not in sizes:
+            raise ValueError(f"unknown solb field type {field_type}")
+        number_of_values += sizes[field_type]
+    return number_of_values
@@ -2,12 +2,72 @@ from typing import List
 
 import numpy as np
 
+#: Tecplot binary zone types supported by the binary writer
+TECPLOT_ZONE_TYPES = {"ordered": 0, "fequadrilateral": 3}
+
+#: Tecplot binary data format codes for the supported precisions
+TECPLOT_PRECISIONS = {"single": (1, np.dtype("<f4")), "double": (2, np.dtype("<f8"))}
+
+_ZONE_MARKER = 299.0
+_END_OF_HEADER_MARKER = 357.0
+
+
+class TecplotZone:
+    def __init__(self, name: str, data: np.ndarray, zone_type: str = "ordered",
+                 connectivity: np.ndarray = None, solution_time: float = 0.0, strand_id: int = -1):
+        """
+        A zone for the binary Tecplot writer
+
+        Parameters
+        ----------
+        name:
+            Zone title
+        data:
+            Nodal data with shape (number of points, number of variables)
+        zone_type:
+            "ordered" or "fequadrilateral"
+        connectivity:
+            For finite element zones, the zero-based node indices of each element
+            with shape (number of elements, 4)
+        solution_time:
+            Solution time of the zone
+        strand_id:
+            Strand ID of the zone. -1 for a static zone
+        """
+        if zone_type not in TECPLOT_ZONE_TYPES:
+            raise ValueError(f"Unknown zone type: {zone_type}. Options are {list(TECPLOT_ZONE_TYPES)}")
+        if zone_type == "fequadrilateral" and (connectivity is None or np.shape(connectivity)[1] != 4):
+            raise ValueError("FE quadrilateral zones require connectivity with shape (number of elements, 4)")
+
+        #: str: zone title
+        self.name = name
+        #: np.ndarray: nodal data with shape (number of points, number of variables)
+        self.data = np.atleast_2d(data)
+        #: str: "ordered" or "fequadrilateral"
+        self.zone_type = zone_type
+        #: np.ndarray: zero-based element connectivity for finite element zones
+        self.connectivity = connectivity
+        #: float: solution time of the zone
+        self.solution_time = solution_time
+        #: int: strand ID of the zone
+        self.strand_id = strand_id
+
 
 def write_data_to_tecplot_format(filename: str, title: str, data: np.ndarray,
-                                 variables: List[str], zone: str):
+                                 variables: List[str], zone: str, file_format: str = "ascii"):
     """
     Writes line data to tecplot format
+
+    Parameters
+    ----------
+    file_format:
+        "ascii" for a text .dat file or "binary" for a binary .plt file
     """
+    if file_format == "binary":
+        write_binary_tecplot_file(filename, title, variables, [TecplotZone(zone, data)])
+        return
+    if file_format != "ascii":
+        raise ValueError(f"Unknown tecplot file format: {file_format}. Options are ascii or binary")
     vars = ''
     for var in variables:
         vars += f' "{var}"'
@@ -16,3 +76,86 @@ def write_data_to_tecplot_format(filename: str, title: str, data: np.ndarray,
               f'VARIABLES ={vars}\n' +
               f'ZONE T="{zone}"  I={columns}, ZONETYPE=Ordered DATAPACKING=POINT')
     np.savetxt(filename, data, header=header, comments='')
+
+
+def write_binary_tecplot_file(filename: str, title: str, variables: List[str], zones: List[TecplotZone],
+                              precision: str = "double"):
+    """
+    Write zones to a binary Tecplot file (version 112 of the .plt format)
+
+    Parameters
+    ----------
+    filename:
+        Output file, typically with a .plt extension
+    title:
+        Dataset title
+    variables:
+        Variable names
+    zones:
+        The zones to write. Each zone must have data for every variable
+    precision:
+        "double" or "single" precision for the nodal data
+    """
+    if precision not in TECPLOT_PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}. Options are {list(TECPLOT_PRECISIONS)}")
+    for zone in zones:
+        if zone.data.shape[1] != len(variables):
+            raise ValueError(f"Zone {zone.name} has {zone.data.shape[1]} variables instead of {len(variables)}")
+
+    with open(filename, "wb") as fh:
+        _write_header_section(fh, title, variables, zones)
+        for zone in zones:
+            _write_zone_data(fh, zone, precision)
+
+
+def _write_header_section(fh, title: str, variables: List[str], zones: List[TecplotZone]):
+    fh.write(b"#!TDV112")
+    _write_int32(fh, [1, 0])  # byte order, full file type
+    _write_string(fh, title)
+    _write_int32(fh, [len(variables)])
+    for variable in variables:
+        _write_string(fh, variable)
+
+    for zone in zones:
+        _write_float32(fh, [_ZONE_MARKER])
+        _write_string(fh, zone.name)
+        _write_int32(fh, [-1, zone.strand_id])  # parent zone, strand id
+        np.array([zone.solution_time], dtype="<f8").tofile(fh)
+        _write_int32(fh, [-1, TECPLOT_ZONE_TYPES[zone.zone_type]])  # unused zone color, zone type
+        _write_int32(fh, [0, 0, 0])  # var location, raw face neighbors, user-defined face neighbors
+        number_of_points = zone.data.shape[0]
+        if zone.zone_type == "ordered":
+            _write_int32(fh, [number_of_points, 1, 1])
+        else:
+            _write_int32(fh, [number_of_points, len(zone.connectivity), 0, 0, 0])
+        _write_int32(fh, [0])  # no auxiliary data
+    _write_float32(fh, [_END_OF_HEADER_MARKER])
+
+
+def _write_zone_data(fh, zone: TecplotZone, precision: str):
+    format_code, dtype = TECPLOT_PRECISIONS[precision]
+    number_of_variables = zone.data.shape[1]
+    _write_float32(fh, [_ZONE_MARKER])
+    _write_int32(fh, [format_code] * number_of_variables)
+    _write_int32(fh, [0, 0, -1])  # no passive variables, no variable sharing, no connectivity sharing
+    min_max = np.zeros((number_of_variables, 2), dtype="<f8")
+    if zone.data.shape[0] > 0:
+        min_max[:, 0] = zone.data.min(axis=0)
+        min_max[:, 1] = zone.data.max(axis=0)
+    min_max.tofile(fh)
+    # block format: all the values of each variable are contiguous
+    np.ascontiguousarray(zone.data.T, dtype=dtype).tofile(fh)
+    if zone.zone_type != "ordered":
+        np.ascontiguousarray(zone.connectivity, dtype="<i4").tofile(fh)
+
+
+def _write_int32(fh, values):
+    np.array(values, dtype="<i4").tofile(fh)
+
+
+def _write_float32(fh, values):
+    np.array(values, dtype="<f4").tofile(fh)
+
+
+def _write_string(fh, string: str):
+    _write_int32(fh, [ord(char) for char in string] + [0])
@@ -2,6 +2,7 @@ import os
 from typing import List
 
 from pyrefine.component_base import ComponentBase
+from pyrefine.shell_utils import cp
 from pbs4py import PBS
 from .uniform_region import UniformRegionBase
 
@@ -47,6 +48,11 @@ class RefineBase(ComponentBase):
         #: float: rescale the y (spanwise) direction to this length for 2D meshes
         self.rescale_2D_length = -1.0
 
+        #: :class:`~pyrefine.simulation.distance_base.DistanceBase`: If set, the distance field of the new
+        #:       mesh is computed at the end of the refine job with this calculator. Set
+        #:       ``distance_computed_by_refine`` of the simulation so the flow job does not recompute it.
+        self.distance = None
+
     def translate_mesh(self, istep=1):
         """
         Convert the meshb file into a ugrid file
@@ -88,6 +94,27 @@ class RefineBase(ComponentBase):
         """
         raise NotImplementedError("Refine classes must implement the run method")
 
+    def _add_distance_command_for_next_mesh(self, command_list: List[str], istep: int):
+        """
+        If a distance calculator is set, append the command to compute the distance field of the mesh
+        of the next adaptation cycle. The mapbc file of the next mesh is also created since
+        the distance calculators read it. A distance field left by an earlier attempt of the cycle is removed,
+        and the cache is not used since the new mesh does not exist until the refine job runs.
+        """
+        if self.distance is None:
+            return
+        current = self._create_project_rootname(istep)
+        next = self._create_project_rootname(istep + 1)
+        cp(f"{current}.mapbc", f"{next}.mapbc")
+        self.distance.pbs = self.pbs
+        self.distance.project_name = self.project_name
+        distance_file = self.distance.create_distance_filename(istep + 1)
+        if os.path.lexists(distance_file):
+            os.remove(distance_file)
+        distance_command = self.distance._create_distance_command(istep + 1)
+        if distance_command:
+            command_list.append(distance_command)
+
     def _add_aspect_ratio_to_ref_loop_command(self, command: str) -> str:
         if self.aspect_ratio >= (1 - 1e-7):
             return command + f" --aspect-ratio {self.aspect_ratio}"
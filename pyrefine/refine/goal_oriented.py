@@ -103,6 +103,7 @@ class RefineGoalOriented(RefineBase):
 
         if self.rescale_2D_length > 0:
             command_list.extend(self.create_rescale_2d_command_list(istep))
+        self._add_distance_command_for_next_mesh(command_list, istep)
         return command_list
 
     def _check_for_new_grid_and_solution_restart_files(self, istep):
@@ -60,6 +60,7 @@ class HeldenMultiscale(RefineBase):
         commands.append(self._get_command_to_run_heldenmesh(istep))
         commands.append(self._get_command_to_move_heldenmesh_output_mesh_to_next_iteration_number(istep))
         commands.append(self._get_command_to_interpolate_solution_to_new_mesh(istep))
+        self._add_distance_command_for_next_mesh(commands, istep)
         self.pbs.launch(f"refine{istep:02}", commands)
 
     def _get_command_to_generate_metric_file_with_ref_multiscale(self, istep, complexity):
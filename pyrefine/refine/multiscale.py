@@ -1,4 +1,5 @@
 import datetime
+import json
 import os
 
 from pbs4py import PBS
@@ -58,6 +59,7 @@ class RefineMultiscale(RefineBase):
         command_list = [time_command_start, self.pbs.create_mpi_command(ref_command, job_name)]
         if self.rescale_2D_length > 0:
             command_list.extend(self.create_rescale_2d_command_list(istep + 1))
+        self._add_distance_command_for_next_mesh(command_list, istep)
         command_list.append(time_command_end)
 
         self.pbs.launch(job_name, command_list)
@@ -135,6 +137,14 @@ class RefineMultiscaleFixedPoint(RefineMultiscale):
         self.mach = -1.0
         self.reynolds_number = -1.0
 
+        #: str or None: If set, the metric is computed from the snapshot statistic written by a
+        #:  :class:`~pyrefine.simulation.job_monitor.SnapshotReducer`, ``{project}_snapshot_{statistic}.solb``,
+        #:  instead of the fixed-point metric of the snapshots. The statistic is mean, rms, or max.
+        #:  The window does not need to be set in this mode.
+        self.reduced_statistic = None
+
+        self._stopped_at_timestep = None
+
     def set_timestep_range_and_frequency(self, first_step, last_step, metric_freq):
         """
         Set the window of timesteps from which refine should compute the metric
@@ -172,10 +182,29 @@ class RefineMultiscaleFixedPoint(RefineMultiscale):
         """
         Run refine in fixed-point mode for unsteady problems
         """
-        print("Running multiscale refine (fixed point)")
-        self._check_that_window_values_are_valid()
+        if self.reduced_statistic is None:
+            print("Running multiscale refine (fixed point)")
+            self._check_that_window_values_are_valid()
+        else:
+            print(f"Running multiscale refine (snapshot {self.reduced_statistic})")
+            self._check_for_reduced_snapshot_file(istep)
         self._run_multiscale_refine(istep, complexity)
 
+    def get_reduced_snapshot_filename(self, istep: int) -> str:
+        return f"{self._create_project_rootname(istep)}_snapshot_{self.reduced_statistic}.solb"
+
+    def _create_multiscale_refine_command(self, istep: int, complexity: float) -> str:
+        if self.reduced_statistic is None:
+            self._stopped_at_timestep = self._read_stopped_at_timestep(istep)
+            return super()._create_multiscale_refine_command(istep, complexity)
+        current = self._create_project_rootname(istep)
+        next = self._create_project_rootname(istep + 1)
+
+        command = f"refmpi loop {current} {next} {complexity}"
+        command += f" --norm-power {self.lp_norm} --interpolant {self.get_reduced_snapshot_filename(istep)}"
+        command += self._create_hrles_options()
+        return self._add_common_ref_loop_options(command)
+
     def _create_multiscale_command_line_options(self) -> str:
         options = super()._create_multiscale_command_line_options()
 
@@ -183,15 +212,35 @@ class RefineMultiscaleFixedPoint(RefineMultiscale):
         first_step = self.window_first_step
         freq = self.window_metric_freq
         last_step = self.window_last_step
+        if self._stopped_at_timestep is not None and self._stopped_at_timestep < last_step:
+            # the simulation was stopped once the snapshot statistics converged, so the window ends early
+            last_step = self._stopped_at_timestep - (self._stopped_at_timestep - first_step) % freq
         options += f" --fixed-point {file_body} {first_step} {freq} {last_step}"
-
-        if self.hlres:
-            self._check_that_hrles_values_are_valid()
-            # tags should be the same so just use the project01 mapbc
-            project = self._create_project_rootname(1)
-            options += f" --hrles {self.mach} {self.reynolds_number} --fun3d-mapbc {project}.mapbc"
+        options += self._create_hrles_options()
         return options
 
+    def _create_hrles_options(self) -> str:
+        if not self.hlres:
+            return ""
+        self._check_that_hrles_values_are_valid()
+        # tags should be the same so just use the project01 mapbc
+        project = self._create_project_rootname(1)
+        return f" --hrles {self.mach} {self.reynolds_number} --fun3d-mapbc {project}.mapbc"
+
+    def _read_stopped_at_timestep(self, istep: int):
+        summary_file = f"{self._create_project_rootname(istep)}_snapshot_summary.json"
+        if not os.path.isfile(summary_file):
+            return None
+        with open(summary_file, "r") as fh:
+            return json.load(fh).get("stopped_at_timestep")
+
+    def _check_for_reduced_snapshot_file(self, istep: int):
+        if self.reduced_statistic not in ("mean", "rms", "max"):
+            raise ValueError(f"Unknown reduced_statistic {self.reduced_statistic}. Must be mean, rms, or max")
+        expected_file = self.get_reduced_snapshot_filename(istep)
+        if not os.path.isfile(expected_file):
+            raise FileNotFoundError(f"Expected file: {expected_file} was not found. The snapshot reducer failed")
+
     def _check_that_window_values_are_valid(self):
         if self.window_first_step < 0:
             raise ValueError("Refine window_first_step not set. Must specify window parameters")
@@ -32,6 +32,7 @@ class TinfinityMultiscale(RefineBase):
 
         ugrid_file = self._get_ugrid_mesh_filename(istep+1)
         commands.append(self._create_translate_command(ugrid_file, istep+1))
+        self._add_distance_command_for_next_mesh(commands, istep)
 
         job_name = f'infinity{istep:02d}'
         self.pbs.launch(job_name, commands)
@@ -7,9 +7,11 @@ import os
 import shutil
 import glob
 import re
-from collections import deque
+import mmap
+import functools
+import contextlib
 
-from typing import List
+from typing import Dict, List, Union
 
 
 def unglob(pattern: str) -> List[str]:
@@ -20,43 +22,223 @@ def unglob(pattern: str) -> List[str]:
     return expanded
 
 
-def grep(pattern: str, filename: str, tail=-1, head=-1, match_only=False) -> List[str]:
-    found_lines = []
-    for file in unglob(filename):
-        grep_one_file(pattern, file, match_only, found_lines)
-
+def grep(pattern: Union[str, re.Pattern], filename: str, tail=-1, head=-1, match_only=False) -> List[str]:
+    """
+    Find the lines of the file(s) that match the pattern.
+
+    The files are memory mapped and scanned with a compiled regular expression. If ``tail`` is set,
+    the files are searched backwards from the end, so finding the last match of a large log does not
+    require reading the whole file. If ``head`` is set, the search stops after that many matches.
+
+    Parameters
+    ----------
+    pattern:
+        The regular expression or a compiled regular expression
+    filename:
+        The file name or a glob pattern for multiple files
+    tail:
+        If > 0, only return the last ``tail`` matches
+    head:
+        If > 0 and ``tail`` is not set, only return the first ``head`` matches
+    match_only:
+        If True, return the matched part of the line instead of the whole line
+    """
+    files = unglob(filename)
     if tail > 0:
-        return found_lines[-tail:]
-    if head > 0:
-        return found_lines[:head]
+        found_lines = []
+        for file in reversed(files):
+            found_lines = grep_last(pattern, file, n=tail - len(found_lines), match_only=match_only) + found_lines
+            if len(found_lines) >= tail:
+                break
+        return found_lines
+
+    found_lines = []
+    for file in files:
+        max_count = head - len(found_lines) if head > 0 else -1
+        grep_one_file(pattern, file, match_only, found_lines, max_count=max_count)
+        if head > 0 and len(found_lines) >= head:
+            break
     return found_lines
 
 
+def grep_multiple(patterns: List[Union[str, re.Pattern]], filename: str, tail=-1,
+                  match_only=False) -> Dict[Union[str, re.Pattern], List[str]]:
+    """
+    Find the lines that match each of the patterns with a single pass through the file(s).
+
+    Parameters
+    ----------
+    patterns:
+        The regular expressions
+    filename:
+        The file name or a glob pattern for multiple files
+    tail:
+        If > 0, search backwards from the end of the files and only return the last ``tail``
+        matches of each pattern. The search stops once all patterns have been found ``tail`` times.
+    match_only:
+        If True, return the matched part of the line instead of the whole line
+
+    Returns
+    -------
+    found_lines:
+        The matching lines for each pattern
+    """
+    regexes = [_compile_bytes_pattern(pattern) for pattern in patterns]
+    combined_flags = functools.reduce(lambda a, b: a | b, [regex.flags for regex in regexes], 0)
+    combined_regex = _compile_bytes_pattern(
+        b"|".join(b"(?:" + regex.pattern + b")" for regex in regexes), flags=combined_flags)
+    found_lines = {pattern: [] for pattern in patterns}
+
+    def add_matches(buffer, start, end, lines_by_pattern):
+        for line_start, line_end, _ in _find_matching_lines(combined_regex, buffer, start, end):
+            for pattern, regex in zip(patterns, regexes):
+                match = regex.search(buffer, line_start, line_end)
+                if match:
+                    lines_by_pattern[pattern].append(_get_line_or_match(buffer, line_start, line_end,
+                                                                        match, match_only))
+
+    files = unglob(filename)
+    if tail <= 0:
+        for file in files:
+            with _map_file(file) as buffer:
+                add_matches(buffer, 0, len(buffer), found_lines)
+        return found_lines
+
+    for file in reversed(files):
+        with _map_file(file) as buffer:
+            for start, end in _reverse_blocks(buffer):
+                block_lines = {pattern: [] for pattern in patterns}
+                add_matches(buffer, start, end, block_lines)
+                for pattern in patterns:
+                    found_lines[pattern] = block_lines[pattern] + found_lines[pattern]
+                if all(len(lines) >= tail for lines in found_lines.values()):
+                    break
+        if all(len(lines) >= tail for lines in found_lines.values()):
+            break
+    return {pattern: lines[-tail:] for pattern, lines in found_lines.items()}
+
+
 def get_file_basename(file: str):
     return os.path.basename(os.path.abspath(file))
 
 
-def grep_one_file(pattern: str, file: str, match_only: bool, found_lines: List[str]):
-    regex = re.compile(pattern)
-    with open(file, "r") as fh:
-        for line in fh:
-            match = regex.search(line)
-            if match:
-                if match_only:
-                    found_lines.append(match.group(0))
-                else:
-                    found_lines.append(line)
+def grep_one_file(pattern: Union[str, re.Pattern], file: str, match_only: bool, found_lines: List[str],
+                  max_count: int = -1):
+    regex = _compile_bytes_pattern(pattern)
+    with _map_file(file) as buffer:
+        for line_start, line_end, match in _find_matching_lines(regex, buffer, 0, len(buffer)):
+            found_lines.append(_get_line_or_match(buffer, line_start, line_end, match, match_only))
+            if max_count > 0 and len(found_lines) >= max_count:
+                break
 
 
-def tail(file: str, n=10) -> List[str]:
-    buffer = deque(maxlen=n)
-    with open(file, "r") as fh:
-        while True:
-            line = fh.readline()
-            if not line:
+def grep_last(pattern: Union[str, re.Pattern], file: str, n=1, match_only=False) -> List[str]:
+    """
+    Search backwards from the end of the file for the last ``n`` matching lines.
+    """
+    regex = _compile_bytes_pattern(pattern)
+    found_lines = []
+    if n <= 0:
+        return found_lines
+    with _map_file(file) as buffer:
+        for start, end in _reverse_blocks(buffer):
+            block_lines = [_get_line_or_match(buffer, line_start, line_end, match, match_only)
+                           for line_start, line_end, match in _find_matching_lines(regex, buffer, start, end)]
+            found_lines = block_lines + found_lines
+            if len(found_lines) >= n:
                 break
-            buffer.append(line)
-    return list(buffer)
+    return found_lines[-n:]
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_bytes_pattern(pattern: Union[str, bytes, re.Pattern], flags: int = 0) -> re.Pattern:
+    if isinstance(pattern, re.Pattern):
+        flags = pattern.flags & ~re.UNICODE
+        pattern = pattern.pattern
+    if isinstance(pattern, str):
+        pattern = pattern.encode()
+    return re.compile(pattern, flags | re.MULTILINE)
+
+
+def _map_file(file: str):
+    with open(file, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return contextlib.nullcontext(b"")
+        return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _find_matching_lines(regex: re.Pattern, buffer, start: int, end: int):
+    """
+    Yield the (line start, line end, match) of each line in buffer[start:end] that matches.
+    ``start`` must be at the beginning of a line. Like a line-by-line search, at most one
+    match is reported per line and matches do not extend beyond the line.
+    """
+    pos = start
+    while pos < end:
+        match = regex.search(buffer, pos, end)
+        if match is None:
+            return
+        if match.start() == end and buffer[end - 1:end] == b"\n":
+            return
+        line_start = buffer.rfind(b"\n", pos, match.start()) + 1
+        line_start = max(line_start, pos)
+        line_end = buffer.find(b"\n", line_start, end)
+        line_end = end if line_end == -1 else line_end + 1
+        if match.end() > line_end:
+            match = regex.search(buffer, line_start, line_end)
+        if match is not None:
+            yield line_start, line_end, match
+        pos = line_end
+
+
+def _reverse_blocks(buffer, block_size: int = 1024 * 1024):
+    """
+    Yield (start, end) ranges of the buffer from the end to the beginning with both ends on line boundaries.
+    """
+    end = len(buffer)
+    while end > 0:
+        start = max(0, end - block_size)
+        if start > 0:
+            start = buffer.rfind(b"\n", 0, start) + 1
+        yield start, end
+        end = start
+
+
+def _get_line_or_match(buffer, line_start: int, line_end: int, match, match_only: bool) -> str:
+    if match_only:
+        return match.group(0).decode()
+    return _decode_line(buffer[line_start:line_end])
+
+
+def _decode_line(line: bytes) -> str:
+    line = line.decode()
+    if line.endswith("\r\n"):
+        line = line[:-2] + "\n"
+    return line
+
+
+def tail(file: str, n=10, block_size: int = 64 * 1024) -> List[str]:
+    """
+    Get the last n lines of the file. The file is read backwards in blocks from the end,
+    so the cost depends on the length of the last lines rather than the size of the file.
+    """
+    if n <= 0:
+        return []
+    with open(file, "rb") as fh:
+        fh.seek(0, os.SEEK_END)
+        position = fh.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= n:
+            read_size = min(block_size, position)
+            position -= read_size
+            fh.seek(position)
+            data = fh.read(read_size) + data
+
+    lines = data.split(b"\n")
+    lines = [line + b"\n" for line in lines[:-1]] + ([lines[-1]] if lines[-1] else [])
+    if position > 0:
+        lines = lines[1:]
+    return [_decode_line(line) for line in lines[-n:]]
 
 
 def head(file: str, n=10) -> List[str]:
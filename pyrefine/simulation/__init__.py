@@ -3,5 +3,8 @@ from .fun3d import SimulationFun3dFV, SimulationFun3dSFE
 from .fun3d_adjoint import SimulationFun3dSFEAdjoint
 from .fun3d_flutter import SimulationFlutterFV
 from .fun3d_two_phase_unsteady import SimulationFun3dTwoPhase, SimulationSFETwoPhase
+from .iteration_budget import IterationBudget
+from .job_monitor import Fun3dConvergenceMonitor, JobMonitorBase, SnapshotReducer
+from .phase import SimulationPhase
 
 from .sfe_cfg import SFEconfig
@@ -1,4 +1,6 @@
 #!/usr/bin/env python
+from typing import Dict
+
 from pyrefine.component_base import ComponentBase
 
 
@@ -7,8 +9,19 @@ class SimulationBase(ComponentBase):
     Driver for the simulation step
     """
 
+    #: float: The complexity of the mesh of the current adaptation cycle. This is set by the
+    #:   adaptation driver before each call to run and is None when it is not known, e.g., the first cycle
+    complexity = None
+
     def run(self, istep: int):
         """
         Run the sequence of simulations for a given adaptation cycle
         """
         raise NotImplementedError("Simulation classes must implement run method")
+
+    def get_final_monitor_values(self, istep: int) -> Dict[str, float]:
+        """
+        The final residual and force values of the simulation of a cycle. These are
+        reported by the adaptation telemetry. Simulations that do not provide them return an empty dictionary.
+        """
+        return {}
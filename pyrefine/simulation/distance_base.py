@@ -1,17 +1,148 @@
+import hashlib
+import os
+import shutil
+
+from pbs4py import PBS
+
 from pyrefine.component_base import ComponentBase
 
+# hashes of the meshes keyed by path, modification time, and size, shared by all distance calculators
+_mesh_hashes = {}
+
 
 class DistanceBase(ComponentBase):
     """
     Calculator for the distance field
+
+    If :attr:`cache_directory` is set, the computed distance fields are stored in the cache keyed on a hash of
+    the lb8.ugrid mesh and the viscous wall tags of the mapbc file. When the distance field of a mesh is
+    already in the cache, it is linked into place and no distance command is run.
     """
 
+    def __init__(self, project_name: str, pbs: PBS = None):
+        super().__init__(project_name, pbs)
+
+        #: str: Directory of the distance field cache. None disables the cache
+        self.cache_directory = None
+
     def create_distance_command(self, istep: int) -> str:
         """
-        Create a string with the distance command
+        Create a string with the distance command. If the distance field is linked from the cache,
+        the command is an empty string.
         """
-        return ''
+        if self.link_cached_distance_file(istep):
+            return ''
+        return self._create_distance_command(istep)
 
     def create_distance_filename(self, istep: int) -> str:
         project = self._create_project_rootname(istep)
         return f'{project}-distance.solb'
+
+    def get_cache_key(self, istep: int):
+        """
+        The cache key of the distance field of step `istep`: a hash of the lb8.ugrid mesh, the wall tags
+        of the mapbc file, and the distance calculator
+
+        Returns
+        -------
+        key:
+            The key or None if the mesh does not exist yet
+        """
+        project = self._create_project_rootname(istep)
+        grid_file = f'{project}.lb8.ugrid'
+        mapbc_file = f'{project}.mapbc'
+        if not os.path.isfile(grid_file):
+            return None
+        wall_tags = self._get_wall_boundary_tags(mapbc_file) if os.path.isfile(mapbc_file) else ''
+        key = hashlib.blake2b(digest_size=16)
+        key.update(self._hash_mesh(grid_file).encode())
+        key.update(f'{type(self).__name__}:{wall_tags}'.encode())
+        return key.hexdigest()
+
+    def link_cached_distance_file(self, istep: int) -> bool:
+        """
+        Link the cached distance field of step `istep` into place
+
+        Returns
+        -------
+        found:
+            Whether the distance field was in the cache
+        """
+        cached_file = self._get_cached_filename(istep)
+        if cached_file is None or not os.path.isfile(cached_file):
+            return False
+        distance_file = self.create_distance_filename(istep)
+        if os.path.lexists(distance_file):
+            os.remove(distance_file)
+        os.symlink(cached_file, distance_file)
+        print(f'Using the cached distance field {cached_file} for {distance_file}')
+        return True
+
+    def cache_distance_file(self, istep: int):
+        """
+        Store the distance field of step `istep` in the cache
+        """
+        distance_file = self.create_distance_filename(istep)
+        if not os.path.isfile(distance_file) or os.path.islink(distance_file):
+            return
+        cached_file = self._get_cached_filename(istep)
+        if cached_file is None or os.path.isfile(cached_file):
+            return
+        os.makedirs(os.path.dirname(cached_file), exist_ok=True)
+        temporary_file = f'{cached_file}.{os.getpid()}.tmp'
+        try:
+            os.link(distance_file, temporary_file)
+        except OSError:
+            shutil.copy2(distance_file, temporary_file)
+        os.replace(temporary_file, cached_file)
+
+    def _create_distance_command(self, istep: int) -> str:
+        return ''
+
+    def _get_cached_filename(self, istep: int):
+        if self.cache_directory is None:
+            return None
+        key = self.get_cache_key(istep)
+        if key is None:
+            return None
+        return os.path.join(os.path.abspath(self.cache_directory), f'{key}-distance.solb')
+
+    def _hash_mesh(self, grid_file: str) -> str:
+        stat = os.stat(grid_file)
+        signature = (os.path.abspath(grid_file), stat.st_mtime_ns, stat.st_size)
+        if signature not in _mesh_hashes:
+            mesh_hash = hashlib.blake2b(digest_size=16)
+            with open(grid_file, 'rb') as fh:
+                for block in iter(lambda: fh.read(1 << 24), b''):
+                    mesh_hash.update(block)
+            _mesh_hashes[signature] = mesh_hash.hexdigest()
+        return _mesh_hashes[signature]
+
+    def _get_wall_boundary_tags(self, mapbc_file: str):
+        """
+        find the viscous wall (4000) boundary tags in the mapbc file
+
+        Parameters
+        ----------
+        mapbc_file: str
+            The mapbc file to read
+
+        Returns
+        -------
+        wall_tags_string: str
+            The list of wall bc tags in a string delimited by commas
+        """
+
+        wall_tags = []
+
+        with open(mapbc_file, 'r') as fh:
+            line = fh.readline()
+            nbc = int(line)
+            for bc in range(1, nbc+1):
+                line = fh.readline()
+                if '4000' in line:
+                    wall_tags.append(str(bc))
+
+        comma = ","
+        wall_tags_string = comma.join(wall_tags)
+        return wall_tags_string
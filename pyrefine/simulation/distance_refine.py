@@ -13,7 +13,7 @@ class DistanceRefine(DistanceBase):
         PBS queue helper
     """
 
-    def create_distance_command(self, istep: int) -> str:
+    def _create_distance_command(self, istep: int) -> str:
         project = self._create_project_rootname(istep)
         grid_file = f'{project}.lb8.ugrid'
         mapbc_file = f'{project}.mapbc'
@@ -1,13 +1,24 @@
+import contextlib
 import datetime
+import json
 import os
-from typing import List
+import pickle
+import shlex
+import sys
+from typing import Dict, List
 
 import f90nml
 
+from pyrefine.post_processing.fun3d_hist_file import read_final_hist_values
 from pyrefine.shell_utils import cp
+from pyrefine.work_queue import PersistentWorkerLauncher
 
 from .base import SimulationBase
 from .distance_refine import DistanceRefine
+from .input_renderer import InputRenderer
+from .iteration_budget import IterationBudget
+from .job_monitor import JobMonitorBase, SnapshotReducer
+from .phase import SimulationPhase
 
 
 class SimulationFun3dFV(SimulationBase):
@@ -61,6 +72,12 @@ class SimulationFun3dFV(SimulationBase):
         #: :class:`~pyrefine.simulation.distance_base.DistanceBase`: the distance calculator
         self.distance = DistanceRefine(project_name, pbs)
 
+        #: bool: Whether the refine component computes the distance field of the new mesh at the end of the
+        #:       refine job (see :attr:`~pyrefine.refine.base.RefineBase.distance`). If True, the flow job only
+        #:       computes the distance field when the file does not exist, e.g., for the first mesh, or is not
+        #:       newer than the mesh.
+        self.distance_computed_by_refine = False
+
         #: str: type of file to write expect for fields written
         self.field_file_extension = "solb"
 
@@ -76,6 +93,35 @@ class SimulationFun3dFV(SimulationBase):
         #: bool: Whether to launch NVIDIA MPS with pyrefine
         self.launch_mps = False
 
+        #: list: monitors that follow the output of the solver jobs while they run, e.g.,
+        #:       :class:`~pyrefine.simulation.job_monitor.Fun3dConvergenceMonitor`
+        self.job_monitors: List[JobMonitorBase] = []
+
+        #: :class:`~pyrefine.simulation.iteration_budget.IterationBudget`: If set, predicts the steps
+        #:       of each flow job from the iterations the previous cycles needed to converge
+        self.iteration_budget: IterationBudget = None
+
+        #: bool: Whether to run all phases of a multi-phase simulation in one job instead of one job per phase.
+        #:       The inputs of every phase are prepared before the job is launched, and the Python work between
+        #:       phases runs inside the job with ``python -m pyrefine.phase_hook``. The job monitors only know
+        #:       when the whole job starts and ends, so the only monitor allowed with batched phases is a
+        #:       :class:`~pyrefine.simulation.job_monitor.SnapshotReducer` of the last phase
+        self.batch_phases = False
+
+        #: str: The python interpreter that runs the phase hooks inside batched jobs
+        self.phase_hook_python_command = sys.executable
+
+        #: :class:`~pyrefine.simulation.input_renderer.InputRenderer`: Renders the solver inputs
+        #:       from the templates in the root directory and their overlays
+        self.input_renderer = InputRenderer()
+
+    def __getstate__(self):
+        # the job monitors poll in threads of the driver process, so they are left out of the
+        # copies of the simulation that run the phase hooks
+        state = self.__dict__.copy()
+        state["job_monitors"] = []
+        return state
+
     def get_expected_file_list(self):
         expected_files = [self.fun3d_nml]
         if self.expect_moving_body_input:
@@ -95,11 +141,122 @@ class SimulationFun3dFV(SimulationBase):
         print(f'Flow{istep} Queue End Time: {end_time}')
         print(f'Flow{istep} Elapsed Time: {elapsed_time}')
 
+    def get_final_monitor_values(self, istep: int) -> Dict[str, float]:
+        hist_file = f"{self._create_project_rootname(istep)}_hist.dat"
+        if not os.path.isfile(hist_file):
+            return {}
+        try:
+            return read_final_hist_values(hist_file)
+        except ValueError:
+            return {}
+
+    def _run_phases(self, istep: int, phases: List[SimulationPhase]):
+        """
+        Run the phases in order, each in its own job, or all of them in one job if :attr:`batch_phases` is True
+        """
+        if self.batch_phases and len(phases) > 1:
+            self._run_batched_phases(istep, phases)
+            return
+        for phase in phases:
+            self._run_phase(istep, phase)
+
+    def _run_phase(self, istep: int, phase: SimulationPhase):
+        if phase.message is not None:
+            print(phase.message)
+        self._apply_phase_settings(phase)
+        self._run_fun3d_simulation(istep, phase.job_name, phase.skip_external_distance)
+        for hook in phase.hooks:
+            getattr(self, hook)(istep)
+
+    def _apply_phase_settings(self, phase: SimulationPhase):
+        for name, value in phase.settings.items():
+            setattr(self, name, value)
+
+    def _run_batched_phases(self, istep: int, phases: List[SimulationPhase]):
+        self._check_monitors_of_batched_phases(phases)
+        job_name = f"phases{istep:02d}"
+        state_filename = f"{job_name}.pkl"
+        completed_filename = f"{job_name}_hooks_completed.txt"
+        if os.path.isfile(completed_filename):
+            os.remove(completed_filename)
+
+        print(f"Running {len(phases)} phases in one job: {', '.join(phase.job_name for phase in phases)}")
+        command_list = []
+        expected_hooks = []
+        distance_computed = False
+        for phase in phases:
+            self._apply_phase_settings(phase)
+            # the mesh is the same in every phase, so the distance field is computed at most once per job
+            skip_external_distance = phase.skip_external_distance or distance_computed
+            distance_computed = distance_computed or not skip_external_distance
+            self._prepare_input_files(istep, phase.job_name)
+            self._save_a_copy_of_solver_inputs(istep, phase.job_name)
+            command_list.extend(self._create_restore_solver_inputs_commands(istep, phase.job_name))
+            command_list.extend(self._create_list_of_commands_to_run(istep, phase.job_name, skip_external_distance))
+            hooks = [("_check_for_output_files", [istep, phase.job_name])]
+            hooks.extend((hook, [istep]) for hook in phase.hooks)
+            for method, args in hooks:
+                command_list.append(self._create_phase_hook_command(state_filename, method, args, phase.settings,
+                                                                    completed_filename, job_name))
+                expected_hooks.append(f"{method} {json.dumps(args)}")
+
+        with open(state_filename, "wb") as fh:
+            pickle.dump(self, fh)
+        with contextlib.ExitStack() as stack:
+            for monitor in self.job_monitors:
+                stack.enter_context(monitor.monitoring(istep, phases[-1].job_name))
+            self.pbs.launch(job_name, command_list)
+        self._check_for_completed_phase_hooks(completed_filename, expected_hooks, job_name)
+
+    def _check_monitors_of_batched_phases(self, phases: List[SimulationPhase]):
+        """
+        The monitors run for the whole batched job. A snapshot reducer only reads the snapshots of its own
+        phase, but every phase writes the same hist file, so other monitors would act on the wrong phase.
+        """
+        for monitor in self.job_monitors:
+            monitored_phases = [phase.job_name for phase in phases if monitor.should_monitor(phase.job_name)]
+            if len(monitored_phases) == 0:
+                continue
+            if not isinstance(monitor, SnapshotReducer) or monitored_phases != [phases[-1].job_name]:
+                raise ValueError(f"{type(monitor).__name__} of the phases {monitored_phases} can not run with"
+                                 " batch_phases. Only a SnapshotReducer of the last phase can")
+
+    def _create_phase_hook_command(self, state_filename: str, method: str, args: list, settings: dict,
+                                   completed_filename: str, job_name: str) -> str:
+        command = [self.phase_hook_python_command, "-m", "pyrefine.phase_hook", state_filename, method,
+                   "--args", json.dumps(args), "--settings", json.dumps(settings),
+                   "--completed", completed_filename]
+        # shlex.join needs python 3.8
+        return f"{' '.join(shlex.quote(part) for part in command)} >> {job_name}_hooks.out 2>&1 || exit 1"
+
+    def _check_for_completed_phase_hooks(self, completed_filename: str, expected_hooks: List[str], job_name: str):
+        completed_hooks = []
+        if os.path.isfile(completed_filename):
+            with open(completed_filename, "r") as fh:
+                completed_hooks = fh.read().splitlines()
+        for hook in expected_hooks:
+            if hook not in completed_hooks:
+                raise RuntimeError(f"Phase hook '{hook}' of {job_name} did not complete. See {job_name}_hooks.out")
+
+    def _create_restore_solver_inputs_commands(self, istep: int, job_name: str) -> List[str]:
+        """
+        The commands that put the saved solver inputs of a phase into place inside a batched job
+        """
+        job_name_with_step_number = f"{job_name}{istep:02d}"
+        # a stop file written for an earlier phase must not stop this one
+        commands = ["rm -f killsign", f"cp fun3d.nml_{job_name_with_step_number} fun3d.nml"]
+        if self.expect_moving_body_input:
+            commands.append(f"cp moving_body.input_{job_name_with_step_number} moving_body.input")
+        return commands
+
     def _run_fun3d_simulation(self, istep: int, job_name: str, skip_external_distance=False):
         self._prepare_input_files(istep, job_name)
         self._save_a_copy_of_solver_inputs(istep, job_name)
         command_list = self._create_list_of_commands_to_run(istep, job_name, skip_external_distance)
-        self.pbs.launch(f"{job_name}{istep:02d}", command_list)
+        with contextlib.ExitStack() as stack:
+            for monitor in self.job_monitors:
+                stack.enter_context(monitor.monitoring(istep, job_name))
+            self.pbs.launch(f"{job_name}{istep:02d}", command_list)
         self._check_for_output_files(istep, job_name)
 
     def _check_for_output_files(self, istep, job_name):
@@ -111,6 +268,7 @@ class SimulationFun3dFV(SimulationBase):
         expected_file = self.distance.create_distance_filename(istep)
         if not os.path.isfile(expected_file):
             raise FileNotFoundError(f"Expected file: {expected_file} was not found. Distance calculator failed.")
+        self.distance.cache_distance_file(istep)
 
     def _check_for_volume_output(self, istep):
         project = self._create_project_rootname(istep)
@@ -126,10 +284,12 @@ class SimulationFun3dFV(SimulationBase):
             self._prepare_ascent_visualization_input(istep, job_name)
 
     def _prepare_fun3d_nml(self, istep, job_name):
-        nml = f90nml.read(self._get_template_fun3d_nml_filename(job_name))
+        nml = self.input_renderer.read_namelist(self._get_template_fun3d_nml_filename(job_name), istep)
         import_from = self._read_restart_solb(istep)
         self._update_fun3d_nml_fields(istep, job_name, nml, import_from)
-        nml.write("fun3d.nml", force=True)
+        if self.iteration_budget is not None and job_name == "flow":
+            self.iteration_budget.update_nml(istep, nml, self.complexity)
+        self.input_renderer.write_namelist(nml, "fun3d.nml")
 
     def _get_template_fun3d_nml_filename(self, job_name):
         return f"../{self.fun3d_nml}"
@@ -190,10 +350,17 @@ class SimulationFun3dFV(SimulationBase):
 
     def _create_list_of_commands_to_run(self, istep, job_name, skip_external_distance=False) -> List[str]:
         command_list = []
-        if self.external_wall_distance and not skip_external_distance:
-            command_list.append(self._create_distance_command(istep))
+        if self.external_wall_distance and not skip_external_distance and not self._distance_file_from_refine(istep):
+            distance_command = self._create_distance_command(istep)
+            if distance_command:
+                command_list.append(distance_command)
         if self.launch_mps:
-            command_list.append(self.pbs.create_mpi_command("nvidia-cuda-mps-control -d", "mps", ranks_per_node=1))
+            mps_command = self.pbs.create_mpi_command("nvidia-cuda-mps-control -d", "mps", ranks_per_node=1)
+            if isinstance(self.pbs, PersistentWorkerLauncher):
+                # MPS keeps running between the tasks of the worker, so it is started once per worker job
+                self.pbs.add_startup_command(mps_command)
+            else:
+                command_list.append(mps_command)
         command_list.append(self._create_fun3d_command(istep, job_name))
         time_command_start = f'printf "Flow{istep} Start Time: " && date'
         time_command_end = f'printf "Flow{istep} End Time: " && date'
@@ -201,6 +368,19 @@ class SimulationFun3dFV(SimulationBase):
         command_list.append(time_command_end)
         return command_list
 
+    def _distance_file_from_refine(self, istep: int) -> bool:
+        """
+        Whether the refine job computed the distance field of this mesh. A distance field that is not newer than
+        the mesh belongs to an older mesh, e.g., from an earlier attempt of the cycle.
+        """
+        if not self.distance_computed_by_refine:
+            return False
+        distance_file = self.distance.create_distance_filename(istep)
+        grid_file = f"{self._create_project_rootname(istep)}.lb8.ugrid"
+        if not os.path.isfile(distance_file) or not os.path.isfile(grid_file):
+            return False
+        return os.stat(distance_file).st_mtime_ns > os.stat(grid_file).st_mtime_ns
+
     def _create_distance_command(self, istep: int):
         self.distance.pbs = self.pbs
         self.distance.project_name = self.project_name
@@ -262,12 +442,17 @@ class SimulationFun3dSFE(SimulationFun3dFV):
         super()._save_a_copy_of_solver_inputs(istep, job_name)
         cp("sfe.cfg", f"sfe.cfg_{job_name}{istep:02d}")
 
+    def _create_restore_solver_inputs_commands(self, istep: int, job_name: str) -> List[str]:
+        commands = super()._create_restore_solver_inputs_commands(istep, job_name)
+        commands.append(f"cp sfe.cfg_{job_name}{istep:02d} sfe.cfg")
+        return commands
+
     def _prepare_input_files(self, istep: int, job_name: str):
         self._prepare_sfe_cfg(istep, job_name)
         super()._prepare_input_files(istep, job_name)
 
     def _prepare_sfe_cfg(self, istep: int, job_name: str):
-        cp(self._get_template_sfe_cfg_filename(job_name), "sfe.cfg")
+        self.input_renderer.render_sfe_cfg(self._get_template_sfe_cfg_filename(job_name), "sfe.cfg", istep)
 
     def _get_template_sfe_cfg_filename(self, job_name):
         return f"../{self.sfe_cfg}"
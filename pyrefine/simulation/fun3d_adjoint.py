@@ -3,6 +3,7 @@ import f90nml
 
 from .sfe_cfg import SFEconfig
 from .fun3d import SimulationFun3dSFE
+from .phase import SimulationPhase
 
 
 class SimulationFun3dSFEAdjoint(SimulationFun3dSFE):
@@ -66,21 +67,24 @@ class SimulationFun3dSFEAdjoint(SimulationFun3dSFE):
         """
         Perform a forward SFE solve and then the adjoint
         """
-        self._run_forward_simulation(istep)
-        self._run_adjoint_simulation(istep)
+        self._run_phases(istep, [self._create_forward_phase(), self._create_adjoint_phase()])
 
     def _run_forward_simulation(self, istep):
         """
-        Perform a forward SFE solve and then the adjoint
+        Perform a forward SFE solve
         """
-        print('Running the flow forward solver')
-        self.omp_threads = self.fwd_omp_threads
-        self._run_fun3d_simulation(istep, 'forward')
+        self._run_phase(istep, self._create_forward_phase())
 
     def _run_adjoint_simulation(self, istep):
-        print('Running the flow adjoint solver')
-        self.omp_threads = self.adj_omp_threads
-        self._run_fun3d_simulation(istep, 'adjoint', skip_external_distance=True)
+        self._run_phase(istep, self._create_adjoint_phase())
+
+    def _create_forward_phase(self) -> SimulationPhase:
+        return SimulationPhase('forward', 'Running the flow forward solver',
+                               settings={'omp_threads': self.fwd_omp_threads})
+
+    def _create_adjoint_phase(self) -> SimulationPhase:
+        return SimulationPhase('adjoint', 'Running the flow adjoint solver', skip_external_distance=True,
+                               settings={'omp_threads': self.adj_omp_threads})
 
     def _check_for_output_files(self, istep, job_name):
         if job_name == 'forward':
@@ -107,9 +111,9 @@ class SimulationFun3dSFEAdjoint(SimulationFun3dSFE):
             super()._prepare_sfe_cfg(istep, job_name)
 
     def _prepare_sfe_cfg_for_adjoint(self, istep):
-        sfe_cfg = SFEconfig(f'../{self.sfe_cfg_adjoint}')
+        sfe_cfg = self.input_renderer.read_sfe_cfg(f'../{self.sfe_cfg_adjoint}', istep)
         self._update_sfe_cfg_fields_for_adjoint(istep, sfe_cfg)
-        sfe_cfg.write('sfe.cfg', force=True)
+        self.input_renderer.write_sfe_cfg(sfe_cfg, 'sfe.cfg')
 
     def _set_nml_to_not_write_restart_file(self, nml: f90nml.Namelist):
         nml['code_run_control']['no_restart'] = True
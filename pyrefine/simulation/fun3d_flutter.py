@@ -2,6 +2,7 @@ import os
 import f90nml
 
 from .fun3d import SimulationFun3dFV
+from .phase import SimulationPhase
 from pyrefine.shell_utils import mv, mkdir
 
 
@@ -51,20 +52,13 @@ class SimulationFlutterFV(SimulationFun3dFV):
         """
         Prep the fun3d namelist and submit a job to run the flow solver
         """
-
-        print('Running the fixed flow simulation')
-        self.expect_moving_body_input = False
-        self._run_fun3d_simulation(istep, job_name='fixed')
-
-        self._project_mode_shapes(istep)
-
-        print('Running the static aeroelastic simulation')
-        self.expect_moving_body_input = True
-        self._run_fun3d_simulation(istep, job_name='static', skip_external_distance=True)
-
-        print('Running the dynamic aeroelastic simulation')
-        self._run_fun3d_simulation(istep, job_name='dynamic', skip_external_distance=True)
-        self._move_aehist_to_keep(istep)
+        phases = [SimulationPhase('fixed', 'Running the fixed flow simulation',
+                                  settings={'expect_moving_body_input': False}, hooks=['_project_mode_shapes']),
+                  SimulationPhase('static', 'Running the static aeroelastic simulation', skip_external_distance=True,
+                                  settings={'expect_moving_body_input': True}),
+                  SimulationPhase('dynamic', 'Running the dynamic aeroelastic simulation', skip_external_distance=True,
+                                  settings={'expect_moving_body_input': True}, hooks=['_move_aehist_to_keep'])]
+        self._run_phases(istep, phases)
 
     def _get_simulation_specific_fun3d_command_line_args_str(self, job_name):
         if job_name == 'fixed':
@@ -3,9 +3,11 @@ import os
 import f90nml
 import numpy as np
 
+from pyrefine.post_processing.tecplot_writer import TecplotZone, write_binary_tecplot_file
 from pyrefine.shell_utils import cp, mkdir, mv, rm
 
 from .fun3d import SimulationFun3dSFE
+from .phase import SimulationPhase
 
 try:
     from pk_flutter_solver.pk_solver import PK
@@ -60,6 +62,9 @@ class SimulationFlutterLfd(SimulationFun3dSFE):
         #: int: the number of small-perturbation mach snapshots to create
         self.number_of_snapshots = 20
 
+        #: str: format of the deformed surface pressure file, "ascii" (.dat) or "binary" (.plt)
+        self.surface_output_format = 'ascii'
+
         #: float: the amplitude scaling of the unsteady Mach field about the steady field
         self.linear_perturbation = 0.01
 
@@ -72,15 +77,11 @@ class SimulationFlutterLfd(SimulationFun3dSFE):
         return expected_files
 
     def run(self, istep):
-        print('Running the steady fun3d simulation')
-        self.expect_moving_body_input = False
-        self._run_fun3d_simulation(istep, 'steady')
-        self._project_mode_shapes(istep)
-
-        print('Running the LFD simulation')
-        self.expect_moving_body_input = True
-        self._run_fun3d_simulation(istep, 'lfd', skip_external_distance=True)
-        self._check_for_lfd_output(istep)
+        phases = [SimulationPhase('steady', 'Running the steady fun3d simulation',
+                                  settings={'expect_moving_body_input': False}, hooks=['_project_mode_shapes']),
+                  SimulationPhase('lfd', 'Running the LFD simulation', skip_external_distance=True,
+                                  settings={'expect_moving_body_input': True}, hooks=['_check_for_lfd_output'])]
+        self._run_phases(istep, phases)
 
         print('Running the PK flutter simulation')
         pk = self._run_pk_flutter_solver(istep)
@@ -397,12 +398,23 @@ class SimulationFlutterLfd(SimulationFun3dSFE):
         Cp_0 = Cp_0[ID-1]
         Cp_lfd = Cp_lfd[ID-1]
 
+        if self.surface_output_format == 'binary':
+            data = np.column_stack((x, y, z, ID, dx_0, dy_0, dz_0,
+                                    np.real(dx_lfd), np.imag(dx_lfd), np.real(dy_lfd), np.imag(dy_lfd),
+                                    np.real(dz_lfd), np.imag(dz_lfd), Cp_0, np.real(Cp_lfd), np.imag(Cp_lfd)))
+            zone = TecplotZone('mdo body 1', data, zone_type='fequadrilateral', connectivity=quad - 1,
+                               solution_time=1.0, strand_id=0)
+            write_binary_tecplot_file(f'{project}_deformed_surface_pressures.plt',
+                                      'surface data of wing deformation and Cp',
+                                      self._surface_flutter_variables, [zone])
+            return
+
         surface_file = f'{project}_deformed_surface_pressures.dat'
         f = open(surface_file, mode='w')
 
         lines = []
         lines.append('title="surface data of wing deformation and Cp"\n')
-        lines.append('variables="x_rigid","y_rigid","z_rigid","id","dx_0","dy_0","dz_0","dx_lfd_r","dx_lfd_i","dy_lfd_r","dy_lfd_i","dz_lfd_r","dz_lfd_i","Cp_0","Cp_lfd_r","Cp_lfd_i"\n')
+        lines.append('variables=' + ','.join(f'"{var}"' for var in self._surface_flutter_variables) + '\n')
         lines.append('zone t="mdo body 1", i=' + str(Nn) + ', j=' + str(Ne) +
                      ', f=fepoint,  solutiontime= 0.1000000E+01, strandid=0\n')
         for i in range(0, Nn):
@@ -417,6 +429,11 @@ class SimulationFlutterLfd(SimulationFun3dSFE):
         f.writelines(lines)
         f.close()
 
+    @property
+    def _surface_flutter_variables(self):
+        return ["x_rigid", "y_rigid", "z_rigid", "id", "dx_0", "dy_0", "dz_0", "dx_lfd_r", "dx_lfd_i",
+                "dy_lfd_r", "dy_lfd_i", "dz_lfd_r", "dz_lfd_i", "Cp_0", "Cp_lfd_r", "Cp_lfd_i"]
+
     def _read_mode_shapes(self, project, N_modes):
         mode_file = f'{project}_body1_mode1.dat'
 
@@ -654,20 +671,13 @@ class SimulationModalFlutterLfd(SimulationFlutterLfd):
         return expected_files
 
     def run(self, istep):
-        print('Running the steady fun3d simulation to output the massoud file')
-        self.expect_moving_body_input = False
-        self._run_fun3d_simulation(istep, 'output_massoud')
-        self._project_mode_shapes(istep)
-
-        print('Running the steady fun3d simulation')
-        self.expect_moving_body_input = True
-        self._run_fun3d_simulation(istep, 'steady')
-        self._move_aehist(istep)
-
-        print('Running the LFD simulation')
-        self.expect_moving_body_input = True
-        self._run_fun3d_simulation(istep, 'lfd', skip_external_distance=True)
-        self._check_for_lfd_output(istep)
+        phases = [SimulationPhase('output_massoud', 'Running the steady fun3d simulation to output the massoud file',
+                                  settings={'expect_moving_body_input': False}, hooks=['_project_mode_shapes']),
+                  SimulationPhase('steady', 'Running the steady fun3d simulation',
+                                  settings={'expect_moving_body_input': True}, hooks=['_move_aehist']),
+                  SimulationPhase('lfd', 'Running the LFD simulation', skip_external_distance=True,
+                                  settings={'expect_moving_body_input': True}, hooks=['_check_for_lfd_output'])]
+        self._run_phases(istep, phases)
 
         print('Running the PK flutter simulation')
         pk = self._run_pk_flutter_solver(istep)
@@ -3,6 +3,7 @@ import os
 import f90nml
 
 from .fun3d import SimulationFun3dFV, SimulationFun3dSFE
+from .phase import SimulationPhase
 
 
 class SimulationFun3dTwoPhase(SimulationFun3dFV):
@@ -44,11 +45,9 @@ class SimulationFun3dTwoPhase(SimulationFun3dFV):
         """
         Prep the fun3d namelist and submit a job to run the flow solver
         """
-        print('Running the flow simulation to settle transients')
-        self._run_fun3d_simulation(istep, 'transient')
-
-        print('Running the flow simulation to collect metric')
-        self._run_fun3d_simulation(istep, 'metric', skip_external_distance=False)
+        phases = [SimulationPhase('transient', 'Running the flow simulation to settle transients'),
+                  SimulationPhase('metric', 'Running the flow simulation to collect metric')]
+        self._run_phases(istep, phases)
 
     def _update_transient_phase_inputs_in_nml(self, istep: int, nml: f90nml.Namelist):
         if self.transient_steps is None:
@@ -87,12 +86,14 @@ class SimulationFun3dTwoPhase(SimulationFun3dFV):
         if job_name == 'transient':
             super()._check_for_output_files(istep, job_name)
         else:
-            self._check_for_metric_file(self, istep)
+            self._check_for_metric_file(istep)
 
     def _check_for_metric_file(self, istep: int):
         project = self._create_project_rootname(istep)
         expected_file = f'{project}_volume_timestep{self.metric_frequency}.solb'
-        if not os.path.exists(expected_file):
+        # a snapshot reducer that deletes the reduced snapshots records them in its summary
+        reducer_summary_file = f'{project}_snapshot_summary.json'
+        if not os.path.exists(expected_file) and not os.path.exists(reducer_summary_file):
             raise FileNotFoundError(
                 f'Expected file: {expected_file} was not found. Something likely failed with flow solver.')
 
@@ -133,11 +134,9 @@ class SimulationSFETwoPhase(SimulationFun3dSFE):
         return expected_files
 
     def run(self, istep):
-        print('Running steady fun3d solver')
-        self._run_fun3d_simulation(istep, 'steady')
-
-        print('Running unsteady fun3d solver')
-        self._run_fun3d_simulation(istep, 'unsteady', skip_external_distance=True)
+        phases = [SimulationPhase('steady', 'Running steady fun3d solver'),
+                  SimulationPhase('unsteady', 'Running unsteady fun3d solver', skip_external_distance=True)]
+        self._run_phases(istep, phases)
 
     def _get_template_sfe_cfg_filename(self, job_name):
         if job_name == 'steady':
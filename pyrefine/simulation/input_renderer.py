@@ -0,0 +1,220 @@
+"""
+Rendering of solver inputs from the templates in the adaptation root directory.
+
+Each template is parsed once and parsed again only when its modification time or size changes.
+Components that adjust the inputs of every cycle, e.g., a controller that sets the angle of attack,
+store overlays instead of rewriting the templates. The overlays are stored by adaptation cycle, so the
+inputs of each cycle can be recovered, and an overlay applies from its cycle on. The overlays are applied
+whenever the template is read, and an output file is only written when its content changes.
+"""
+import copy
+import io
+import json
+import os
+import shutil
+from typing import Dict
+
+import f90nml
+
+from .sfe_cfg import SFEconfig
+
+# parsed templates keyed by absolute path and parser. The values are the modification time and size of
+# the template when it was parsed and the parsed template
+_parsed_templates = {}
+
+
+class InputRenderer:
+    def __init__(self, overlay_filename: str = 'input_overlays.json'):
+        """
+        Render fun3d namelists and sfe.cfg files from cached templates with overlays
+
+        Parameters
+        ----------
+        overlay_filename:
+            The file that stores the overlays of the templates, relative to the run directory.
+            The overlays are stored as ``{istep: {template: overlay}}``
+        """
+        #: str: The file that stores the overlays of the templates, relative to the run directory
+        self.overlay_filename = overlay_filename
+
+    def read_namelist(self, template: str, istep: int = None) -> f90nml.Namelist:
+        """
+        A copy of the parsed namelist template with its overlay for the cycle applied.
+        Changes to the copy do not affect the template.
+        """
+        nml = copy.deepcopy(self._get_parsed_template(template, f90nml.read))
+        for group, values in self.get_overlay(template, istep).items():
+            if group not in nml:
+                nml[group] = {}
+            for key, value in values.items():
+                nml[group][key] = value
+        return nml
+
+    def read_sfe_cfg(self, template: str, istep: int = None) -> SFEconfig:
+        """
+        A copy of the parsed sfe.cfg template with its overlay for the cycle applied.
+        Changes to the copy do not affect the template.
+        """
+        sfe_cfg = copy.deepcopy(self._get_parsed_template(template, SFEconfig))
+        sfe_cfg.update(self.get_overlay(template, istep))
+        return sfe_cfg
+
+    def write_namelist(self, nml: f90nml.Namelist, output_file: str) -> bool:
+        """
+        Write the namelist if the content of the output file would change
+
+        Returns
+        -------
+        written:
+            Whether the file was written
+        """
+        buffer = io.StringIO()
+        nml.write(buffer)
+        return write_if_changed(output_file, buffer.getvalue())
+
+    def write_sfe_cfg(self, sfe_cfg: SFEconfig, output_file: str) -> bool:
+        """
+        Write the sfe.cfg if the content of the output file would change
+
+        Returns
+        -------
+        written:
+            Whether the file was written
+        """
+        return write_if_changed(output_file, sfe_cfg.to_string())
+
+    def render_namelist(self, template: str, output_file: str, istep: int = None) -> bool:
+        """
+        Write the namelist template with its overlay for the cycle applied
+        """
+        return self.write_namelist(self.read_namelist(template, istep), output_file)
+
+    def render_sfe_cfg(self, template: str, output_file: str, istep: int = None) -> bool:
+        """
+        Write the sfe.cfg template with its overlay for the cycle applied. Templates without an overlay
+        are copied as is, so their comments and formatting are kept.
+        """
+        if len(self.get_overlay(template, istep)) == 0:
+            if _files_are_equal(template, output_file):
+                return False
+            shutil.copyfile(template, output_file)
+            return True
+        return self.write_sfe_cfg(self.read_sfe_cfg(template, istep), output_file)
+
+    def get_overlay(self, template: str, istep: int = None) -> dict:
+        """
+        The overlay of the template in a cycle, which merges the overlays set in that cycle and the cycles
+        before it, with the later cycles taking precedence. For namelists, the overlay is a dictionary of
+        groups with dictionaries of the variables. For sfe.cfg files, it is a dictionary of the variables.
+
+        Parameters
+        ----------
+        template:
+            The template file name, relative to the run directory
+        istep:
+            The adaptation cycle. If None, the overlays of all stored cycles are merged
+        """
+        overlay = {}
+        for cycle, cycle_overlay in sorted(self.get_overlays_by_cycle(template).items()):
+            if istep is not None and cycle > istep:
+                break
+            _merge_overlay(overlay, cycle_overlay)
+        return overlay
+
+    def get_overlays_by_cycle(self, template: str) -> Dict[int, dict]:
+        """
+        The overlays that were set for the template, keyed by the cycle they were set in
+        """
+        template = os.path.normpath(template)
+        return {cycle: overlays[template] for cycle, overlays in self._read_overlays().items()
+                if template in overlays}
+
+    def set_overlay(self, template: str, overlay: dict, istep: int):
+        """
+        Merge the overlay into the stored overlay of the template in the cycle
+
+        Parameters
+        ----------
+        template:
+            The template file name, relative to the run directory
+        overlay:
+            For namelists, ``{group: {variable: value}}``. For sfe.cfg files, ``{variable: value}``
+        istep:
+            The adaptation cycle the overlay applies from
+        """
+        overlays = self._read_overlays()
+        cycle_overlays = overlays.setdefault(istep, {})
+        _merge_overlay(cycle_overlays.setdefault(os.path.normpath(template), {}), overlay)
+        self._write_overlays(overlays)
+
+    def clear_overlay(self, template: str):
+        """
+        Remove the stored overlays of the template in all cycles
+        """
+        overlays = self._read_overlays()
+        template = os.path.normpath(template)
+        removed = [cycle_overlays.pop(template, None) for cycle_overlays in overlays.values()]
+        if any(overlay is not None for overlay in removed):
+            self._write_overlays({cycle: cycle_overlays for cycle, cycle_overlays in overlays.items()
+                                  if len(cycle_overlays) > 0})
+
+    def _read_overlays(self) -> Dict[int, dict]:
+        if not os.path.isfile(self.overlay_filename):
+            return {}
+        with open(self.overlay_filename, 'r') as fh:
+            return {int(cycle): cycle_overlays for cycle, cycle_overlays in json.load(fh).items()}
+
+    def _write_overlays(self, overlays: Dict[int, dict]):
+        # json keys are strings, so the cycles are sorted numerically before they are converted
+        content = {str(cycle): overlays[cycle] for cycle in sorted(overlays)}
+        write_if_changed(self.overlay_filename, json.dumps(content, indent=2))
+
+    def _get_parsed_template(self, template: str, parser):
+        if not os.path.isfile(template):
+            raise FileNotFoundError(f'Template {template} was not found')
+        path = os.path.abspath(template)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = (path, parser.__name__)
+        cached = _parsed_templates.get(key)
+        if cached is None or cached[0] != signature:
+            cached = (signature, parser(path))
+            _parsed_templates[key] = cached
+        return cached[1]
+
+
+def _merge_overlay(stored: dict, overlay: dict):
+    for key, value in overlay.items():
+        if isinstance(value, dict):
+            stored.setdefault(key, {}).update(value)
+        else:
+            stored[key] = value
+
+
+def write_if_changed(filename: str, content: str) -> bool:
+    """
+    Write the content to the file unless the file already has that content
+
+    Returns
+    -------
+    written:
+        Whether the file was written
+    """
+    if os.path.isfile(filename):
+        with open(filename, 'r') as fh:
+            if fh.read() == content:
+                return False
+    temporary_file = f'{filename}.{os.getpid()}.tmp'
+    with open(temporary_file, 'w') as fh:
+        fh.write(content)
+    os.replace(temporary_file, filename)
+    return True
+
+
+def _files_are_equal(filename: str, other_filename: str) -> bool:
+    if not os.path.isfile(other_filename):
+        return False
+    if os.path.getsize(filename) != os.path.getsize(other_filename):
+        return False
+    with open(filename, 'rb') as fh, open(other_filename, 'rb') as other_fh:
+        return fh.read() == other_fh.read()
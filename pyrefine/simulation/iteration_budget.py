@@ -0,0 +1,187 @@
+import json
+import math
+import os
+from typing import List
+
+import f90nml
+import numpy as np
+
+from pyrefine.post_processing.fun3d_hist_file import Fun3dHistFile
+
+
+class IterationBudget:
+    def __init__(self, project_name: str):
+        """
+        Predict the number of flow solver iterations of each adaptation cycle from the number of
+        iterations the previous cycles needed to converge.
+
+        After each cycle, the hist file is parsed for the first iteration at which the residuals dropped
+        :attr:`residual_drop_orders` orders of magnitude. The ``code_run_control.steps`` of the next cycle
+        is the largest number of iterations needed by the last :attr:`history_window` cycles times
+        :attr:`safety_factor`, which is further multiplied by :attr:`complexity_change_factor` when the
+        complexity just changed. A cycle that did not converge counts as needing its iterations run times
+        :attr:`unconverged_factor`. The prediction is capped by :attr:`maximum_steps`, which defaults to
+        the steps of the template fun3d.nml. If the template has a CFL ramp,
+        ``nonlinear_solver_parameters.schedule_iteration``, the ramp is shortened in proportion to the steps,
+        except after a complexity change when the template ramp is kept.
+
+        Parameters
+        ----------
+        project_name:
+            The root name of the project (without any mesh numbers)
+        """
+        #: str: The root name of the project (without any mesh numbers)
+        self.project_name = project_name
+
+        #: float: Orders of magnitude of residual drop that define convergence
+        self.residual_drop_orders = 6.0
+
+        #: list: The residuals used to determine convergence
+        self.residual_variables = ['R_1']
+
+        #: float: Multiplier applied to the number of iterations the previous cycles needed
+        self.safety_factor = 1.5
+
+        #: float: Additional multiplier when the complexity changed since the previous cycle
+        self.complexity_change_factor = 2.0
+
+        #: float: Multiplier of the iterations run by a cycle that did not converge, which needed more than it ran
+        self.unconverged_factor = 2.0
+
+        #: int: The number of previous cycles used in the prediction
+        self.history_window = 2
+
+        #: int: The fewest steps of a prediction
+        self.minimum_steps = 100
+
+        #: int: The most steps of a prediction. If None, the steps of the template fun3d.nml are the cap
+        self.maximum_steps = None
+
+        #: str: The file that stores the history for restarts
+        self.history_filename = 'iteration_budget.json'
+
+        #: list: The adaptation step, complexity, iterations run, and iterations needed of each cycle.
+        #:   The iterations needed is None if the cycle did not converge
+        self.history: List[dict] = []
+
+        self._pending_cycle = None
+        self._history_loaded = False
+
+    def update_nml(self, istep: int, nml: f90nml.Namelist, complexity: float = None):
+        """
+        Record the previous cycle and set the predicted steps and CFL ramp for cycle `istep`
+
+        Parameters
+        ----------
+        istep:
+            Adaptation step number
+        nml:
+            The fun3d.nml of the cycle, as read from the template
+        complexity:
+            The complexity of the mesh of cycle `istep`. None if unknown
+        """
+        self._load_history()
+        self._record_pending_cycle(istep)
+
+        template_steps = nml.get('code_run_control', {}).get('steps')
+        maximum_steps = self.maximum_steps if self.maximum_steps is not None else template_steps
+        complexity_changed = self._complexity_changed(complexity)
+        steps = self.predict_steps(maximum_steps, complexity_changed)
+        self._pending_cycle = {'istep': istep, 'complexity': complexity}
+        self._save_history()
+        if steps is None:
+            return
+
+        print(f'Iteration budget for step {istep}: {steps} steps')
+        nml['code_run_control']['steps'] = steps
+        if template_steps is not None and not complexity_changed:
+            self._scale_cfl_ramp(nml, steps / template_steps)
+
+    def predict_steps(self, maximum_steps: int = None, complexity_changed: bool = False):
+        """
+        Returns
+        -------
+        steps:
+            The predicted number of steps or None if there is no history to predict from
+        """
+        if len(self.history) == 0:
+            return None
+        needed = []
+        for cycle in self.history[-self.history_window:]:
+            if cycle['iterations_needed'] is None:
+                # the cycle did not converge, so it needed more than it was given
+                needed.append(self.unconverged_factor * cycle['iterations_run'])
+            else:
+                needed.append(cycle['iterations_needed'])
+        steps = max(needed) * self.safety_factor
+        if complexity_changed:
+            steps *= self.complexity_change_factor
+        steps = max(int(math.ceil(steps)), self.minimum_steps)
+        if maximum_steps is not None:
+            steps = min(steps, maximum_steps)
+        return steps
+
+    def find_iterations_needed(self, hist: Fun3dHistFile):
+        """
+        The first iteration at which the residuals dropped :attr:`residual_drop_orders` orders of magnitude
+        from their largest value, or None if they never did
+        """
+        if hist.number_of_rows == 0:
+            return None
+        residuals = np.column_stack([hist[name] for name in self.residual_variables])
+        log_residuals = np.log10(np.maximum(np.abs(residuals), np.finfo(float).tiny))
+        drop = np.min(np.maximum.accumulate(log_residuals, axis=0) - log_residuals, axis=1)
+        converged = np.nonzero(drop >= self.residual_drop_orders)[0]
+        if converged.size == 0:
+            return None
+        return int(hist['Iteration'][converged[0]])
+
+    def _complexity_changed(self, complexity: float) -> bool:
+        if len(self.history) == 0:
+            return False
+        previous_complexity = self.history[-1]['complexity']
+        if complexity is None or previous_complexity is None:
+            return False
+        return not np.isclose(complexity, previous_complexity)
+
+    def _record_pending_cycle(self, istep: int):
+        cycle = self._pending_cycle
+        if cycle is None or cycle['istep'] != istep - 1:
+            return
+        self._pending_cycle = None
+        hist_filename = f'{self.project_name}{cycle["istep"]:02d}_hist.dat'
+        if not os.path.isfile(hist_filename):
+            return
+        hist = Fun3dHistFile(hist_filename, use_cache=False)
+        if hist.number_of_rows == 0:
+            return
+        cycle['iterations_run'] = int(hist['Iteration'][-1])
+        cycle['iterations_needed'] = self.find_iterations_needed(hist)
+        self.history.append(cycle)
+
+    def _save_history(self):
+        with open(self.history_filename, 'w') as fh:
+            json.dump({'history': self.history, 'pending_cycle': self._pending_cycle}, fh, indent=2)
+
+    def _load_history(self):
+        if self._history_loaded:
+            return
+        self._history_loaded = True
+        if not os.path.isfile(self.history_filename):
+            return
+        with open(self.history_filename, 'r') as fh:
+            state = json.load(fh)
+        self.history = state['history']
+        self._pending_cycle = state['pending_cycle']
+
+    def _scale_cfl_ramp(self, nml: f90nml.Namelist, ratio: float):
+        solver_parameters = nml.get('nonlinear_solver_parameters', {})
+        if 'schedule_iteration' not in solver_parameters or ratio >= 1.0:
+            return
+        schedule = solver_parameters['schedule_iteration']
+        if not isinstance(schedule, list):
+            return
+        scaled = [schedule[0]]
+        for iteration in schedule[1:]:
+            scaled.append(max(int(math.ceil(iteration * ratio)), scaled[-1] + 1))
+        solver_parameters['schedule_iteration'] = scaled
@@ -0,0 +1,595 @@
+"""
+Monitors that follow the output of a running solver job.
+
+The simulation components start their monitors before launching a job and stop them once the
+job returns. Each monitor polls the output of the job in a background thread.
+"""
+import contextlib
+import datetime
+import json
+import os
+import re
+import threading
+from typing import List
+
+import numpy as np
+
+from pyrefine.file_watcher import create_file_watcher
+from pyrefine.post_processing.fun3d_hist_file import Fun3dHistFile
+from pyrefine.post_processing.solb_file import SolbFile, write_solb
+
+
+class JobMonitorBase:
+    def __init__(self, poll_interval: float = 30.0):
+        """
+        Base class of monitors that poll a running job in a background thread.
+        Subclasses implement :meth:`poll`.
+
+        Parameters
+        ----------
+        poll_interval:
+            Seconds between polls of the job output
+        """
+        #: float: seconds between polls of the job output
+        self.poll_interval = poll_interval
+
+        #: list: the names of the jobs that are monitored, e.g., ['flow']
+        self.job_names: List[str] = ['flow']
+
+        #: str: the name of the job that is being monitored
+        self.job_name = None
+
+        #: int: the adaptation step of the job that is being monitored
+        self.istep = None
+
+        #: str: the absolute path of the directory the job runs in
+        self.run_directory = None
+
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def should_monitor(self, job_name: str) -> bool:
+        return job_name in self.job_names
+
+    @contextlib.contextmanager
+    def monitoring(self, istep: int, job_name: str):
+        """
+        Context manager to monitor the job launched within it. The job runs in the current directory.
+        """
+        if not self.should_monitor(job_name):
+            yield
+            return
+        self.start(istep, job_name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def start(self, istep: int, job_name: str):
+        """
+        Prepare for a new job and start polling in a background thread
+        """
+        self.istep = istep
+        self.job_name = job_name
+        self.run_directory = os.path.abspath('.')
+        self.prepare()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f'{type(self).__name__}-{job_name}{istep:02d}',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop polling and finalize the job
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.finalize()
+
+    def prepare(self):
+        """
+        Called before the job is launched
+        """
+        pass
+
+    def poll(self) -> bool:
+        """
+        Check the output of the running job
+
+        Returns
+        -------
+        done:
+            True if the monitor does not need to poll the job anymore
+        """
+        raise NotImplementedError('job monitors must implement poll')
+
+    def finalize(self):
+        """
+        Called after the job returns
+        """
+        pass
+
+    def _run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            if self.poll():
+                return
+
+
+class Fun3dConvergenceMonitor(JobMonitorBase):
+    def __init__(self, project_name: str, poll_interval: float = 30.0):
+        """
+        Follow the ``{project}_hist.dat`` file of a running FUN3D job and write FUN3D's stop file
+        once the convergence criteria hold. The enabled criteria are:
+
+        * residual drop - the residuals dropped :attr:`residual_drop_orders` orders of magnitude from their
+          largest value
+        * force variation - the relative variation, ``(max - min) / |mean|``, of the forces over the last
+          :attr:`force_window` iterations is less than :attr:`force_variation_tolerance`
+        * stall - the residuals dropped by less than :attr:`stall_orders` orders of magnitude over the last
+          :attr:`stall_window` iterations
+
+        The job is stopped when any enabled criterion holds, or when all of them hold if
+        :attr:`require_all_criteria` is True. The criteria and the iteration at which each job was stopped
+        are appended to :attr:`log_filename`.
+
+        Parameters
+        ----------
+        project_name:
+            The root name of the project (without any mesh numbers)
+        poll_interval:
+            Seconds between reads of the hist file
+        """
+        super().__init__(poll_interval)
+
+        #: str: The root name of the project (without any mesh numbers)
+        self.project_name = project_name
+
+        #: str: The file that tells FUN3D to stop. It is written in the run directory of the job
+        self.stop_filename = 'killsign'
+
+        #: str: The log of the criteria and stopping iterations in the run directory
+        self.log_filename = 'convergence_monitor.log'
+
+        #: int: Never stop a job before this many iterations
+        self.minimum_iterations = 100
+
+        #: list: The residuals used by the residual drop and stall criteria
+        self.residual_variables = ['R_1']
+
+        #: list: The forces used by the force variation criterion
+        self.force_variables = ['C_L', 'C_D']
+
+        #: float: Orders of magnitude of residual drop to stop at. None disables the criterion
+        self.residual_drop_orders = None
+
+        #: float: Relative variation of the forces to stop at. None disables the criterion
+        self.force_variation_tolerance = None
+
+        #: int: Number of iterations of the force variation criterion
+        self.force_window = 200
+
+        #: float: The residuals are stalled if they drop less than this many orders of magnitude
+        #:   over the stall window. None disables the criterion
+        self.stall_orders = None
+
+        #: int: Number of iterations of the stall criterion
+        self.stall_window = 500
+
+        #: bool: Whether all enabled criteria need to hold instead of any of them
+        self.require_all_criteria = False
+
+        #: dict: The iteration each monitored job was stopped at, keyed by job name with step number
+        self.stop_iterations = {}
+
+        self._hist = None
+        self._stale_hist_signature = None
+        self._stop_requested = False
+
+    def prepare(self):
+        hist_filename = os.path.join(self.run_directory, f'{self.project_name}{self.istep:02d}_hist.dat')
+        self._remove_stop_file()
+        # a hist file left by an earlier run of this step is ignored until the job overwrites it
+        self._stale_hist_signature = _get_file_signature(hist_filename)
+        self._hist = Fun3dHistFile(hist_filename, use_cache=False, must_exist=False)
+        self._stop_requested = False
+
+    def poll(self) -> bool:
+        job_overwrote_stale_hist = False
+        if self._stale_hist_signature is not None:
+            if _get_file_signature(self._hist.filename) == self._stale_hist_signature:
+                return False
+            self._stale_hist_signature = None
+            job_overwrote_stale_hist = True
+        # a malformed hist line raises in the reader, so it has to stop the monitor instead of its thread
+        try:
+            if job_overwrote_stale_hist:
+                self._hist.read()
+            self._hist.update()
+            if self._hist.number_of_rows < self.minimum_iterations:
+                return False
+            met_criteria = self.check_criteria(self._hist)
+        except ValueError as error:
+            print(f'Stopping the convergence monitor of {self.job_name}{self.istep:02d}: {error}')
+            self._log(f'stopped monitoring: {error}')
+            return True
+        if len(met_criteria) == 0:
+            return False
+        iteration = int(self._hist['Iteration'][-1])
+        with open(os.path.join(self.run_directory, self.stop_filename), 'w') as fh:
+            fh.write('\n')
+        self._stop_requested = True
+        self._log(f'requested stop at iteration {iteration}: {"; ".join(met_criteria)}')
+        return True
+
+    def finalize(self):
+        job = f'{self.job_name}{self.istep:02d}'
+        iteration = 0
+        if _get_file_signature(self._hist.filename) != self._stale_hist_signature:
+            try:
+                self._hist.read()
+            except ValueError as error:
+                self._log(f'could not read the final iteration: {error}')
+            if self._hist.number_of_rows > 0:
+                iteration = int(self._hist['Iteration'][-1])
+        if self._stop_requested:
+            self.stop_iterations[job] = iteration
+            self._log(f'stopped at iteration {iteration}')
+        else:
+            self._log(f'ran to iteration {iteration} without meeting the criteria')
+        self._remove_stop_file()
+
+    def get_criteria_description(self) -> str:
+        criteria = []
+        if self.residual_drop_orders is not None:
+            criteria.append(f'residual drop of {self.residual_drop_orders} orders in {self.residual_variables}')
+        if self.force_variation_tolerance is not None:
+            criteria.append(f'relative variation of {self.force_variables} below {self.force_variation_tolerance}'
+                            f' over {self.force_window} iterations')
+        if self.stall_orders is not None:
+            criteria.append(f'residual drop of {self.residual_variables} below {self.stall_orders} orders'
+                            f' over {self.stall_window} iterations')
+        combination = 'all of' if self.require_all_criteria else 'any of'
+        return f'{combination} [{", ".join(criteria)}] after {self.minimum_iterations} iterations'
+
+    def check_criteria(self, hist: Fun3dHistFile) -> List[str]:
+        """
+        Evaluate the enabled criteria on the history
+
+        Returns
+        -------
+        met_criteria:
+            Descriptions of the criteria that hold. Empty if the job should keep running
+        """
+        results = []
+        if self.residual_drop_orders is not None:
+            residuals = self._get_log_residuals(hist)
+            drop = np.min(np.max(residuals, axis=0) - residuals[-1, :])
+            results.append((drop >= self.residual_drop_orders, f'residual drop of {drop:.2f} orders'))
+
+        if self.force_variation_tolerance is not None:
+            met = False
+            variation = np.inf
+            if hist.number_of_rows >= self.force_window:
+                forces = np.column_stack([hist[name] for name in self.force_variables])[-self.force_window:, :]
+                scale = np.maximum(np.abs(np.mean(forces, axis=0)), np.finfo(float).tiny)
+                variation = np.max((np.max(forces, axis=0) - np.min(forces, axis=0)) / scale)
+                met = variation < self.force_variation_tolerance
+            results.append((met, f'force variation of {variation:.3e}'))
+
+        if self.stall_orders is not None:
+            met = False
+            drop = np.inf
+            if hist.number_of_rows > self.stall_window:
+                residuals = self._get_log_residuals(hist)
+                drop = np.max(np.max(residuals[-self.stall_window - 1:-1, :], axis=0) - residuals[-1, :])
+                met = drop < self.stall_orders
+            results.append((met, f'stalled with a residual drop of {drop:.2f} orders'))
+
+        if len(results) == 0:
+            return []
+        met_results = [description for met, description in results if met]
+        if self.require_all_criteria and len(met_results) < len(results):
+            return []
+        return met_results
+
+    def _get_log_residuals(self, hist: Fun3dHistFile) -> np.ndarray:
+        residuals = np.column_stack([hist[name] for name in self.residual_variables])
+        return np.log10(np.maximum(np.abs(residuals), np.finfo(float).tiny))
+
+    def _remove_stop_file(self):
+        stop_file = os.path.join(self.run_directory, self.stop_filename)
+        if os.path.isfile(stop_file):
+            os.remove(stop_file)
+
+    def _log(self, message: str):
+        job = f'{self.job_name}{self.istep:02d}'
+        with open(os.path.join(self.run_directory, self.log_filename), 'a') as fh:
+            fh.write(f'{datetime.datetime.now().isoformat(timespec="seconds")} {job}: {message}'
+                     f' (criteria: {self.get_criteria_description()})\n')
+
+
+class SnapshotReducer(JobMonitorBase):
+    def __init__(self, project_name: str, poll_interval: float = 5.0):
+        """
+        Reduce the flow field snapshots of a running unsteady job as they are written, e.g., the
+        ``{project}_volume_timestep{N}.solb`` files of the metric phase of
+        :class:`~pyrefine.simulation.fun3d_two_phase_unsteady.SimulationFun3dTwoPhase`.
+
+        The run directory is watched for new snapshots. Each complete snapshot is memory mapped, and the running
+        mean, root mean square, and maximum of the interpolant are updated. The reduced timesteps are written to
+        ``{project}_snapshot_summary.json`` as the job runs, and the statistics are written to
+        ``{project}_snapshot_{statistic}.solb`` when the job returns. If :attr:`delete_consumed_snapshots` is True, each snapshot is
+        deleted once it is reduced, so the disk use of the job stays bounded. Refine then needs to compute the
+        metric from the reduced fields, see
+        :attr:`~pyrefine.refine.multiscale.RefineMultiscaleFixedPoint.reduced_statistic`.
+
+        If :attr:`statistics_tolerance` is set, the job is stopped early with FUN3D's stop file once the
+        statistics converged: the relative change, ``||s_k - s_k-1|| / ||s_k||``, of each statistic in
+        :attr:`convergence_statistics` stayed below the tolerance for :attr:`convergence_window` consecutive
+        snapshots after at least :attr:`minimum_snapshots` snapshots. The summary records the relative changes
+        and the timestep the job was stopped at.
+
+        Parameters
+        ----------
+        project_name:
+            The root name of the project (without any mesh numbers)
+        poll_interval:
+            Seconds between scans for new snapshots if the directory is polled
+        """
+        super().__init__(poll_interval)
+
+        #: str: The root name of the project (without any mesh numbers)
+        self.project_name = project_name
+
+        self.job_names = ['metric', 'unsteady']
+
+        #: str: The middle part of the snapshot filenames between the project name with the step number
+        #:   and the timestep number
+        self.snapshot_filename_body = '_volume_timestep'
+
+        #: int: The column of the interpolant in the snapshots
+        self.field_index = 0
+
+        #: int: Snapshots of earlier timesteps are not reduced. Negative values disable the limit
+        self.window_first_step = -1
+
+        #: int: Snapshots of later timesteps are not reduced. Negative values disable the limit
+        self.window_last_step = -1
+
+        #: bool: Whether to delete each snapshot once it is reduced
+        self.delete_consumed_snapshots = False
+
+        #: bool: Whether to watch the run directory with inotify. Polling is needed for file systems that do not
+        #:   deliver inotify events for writes from other hosts
+        self.use_inotify = True
+
+        #: float: Relative change of the statistics at which the job is stopped. None disables the early stop
+        self.statistics_tolerance = None
+
+        #: list: The statistics that need to converge for the early stop
+        self.convergence_statistics = ['mean', 'rms']
+
+        #: int: Never stop a job before this many snapshots were reduced
+        self.minimum_snapshots = 10
+
+        #: int: The number of consecutive snapshots the relative change needs to stay below the tolerance
+        self.convergence_window = 3
+
+        #: str: The file that tells FUN3D to stop. It is written in the run directory of the job
+        self.stop_filename = 'killsign'
+
+        #: list: The timesteps of the snapshots that were reduced in the current job
+        self.consumed_timesteps: List[int] = []
+
+        #: list: The largest relative change of the convergence statistics at each reduced snapshot
+        self.relative_changes: List[float] = []
+
+        #: int: The timestep at which the statistics converged and the stop was requested. None if the job
+        #:   was not stopped early
+        self.stopped_at_timestep = None
+
+        self._snapshot_pattern = None
+        self._stale_signatures = {}
+        self._sum = None
+        self._sum_of_squares = None
+        self._maximum = None
+        self._failed = False
+
+    def set_timestep_range(self, first_step: int, last_step: int):
+        """
+        Set the window of timesteps of the snapshots that are reduced
+        """
+        self.window_first_step = first_step
+        self.window_last_step = last_step
+
+    @property
+    def number_of_snapshots(self) -> int:
+        return len(self.consumed_timesteps)
+
+    def get_statistics(self) -> dict:
+        """
+        The running statistics of the interpolant
+
+        Returns
+        -------
+        statistics:
+            The mean, rms, and max arrays keyed by name. Empty if no snapshots were reduced
+        """
+        if self.number_of_snapshots == 0:
+            return {}
+        return {'mean': self._sum / self.number_of_snapshots,
+                'rms': np.sqrt(self._sum_of_squares / self.number_of_snapshots),
+                'max': self._maximum.copy()}
+
+    def prepare(self):
+        project = f'{self.project_name}{self.istep:02d}'
+        self._snapshot_pattern = re.compile(rf'^{re.escape(project + self.snapshot_filename_body)}(\d+)\.solb$')
+        self.consumed_timesteps = []
+        self.relative_changes = []
+        self.stopped_at_timestep = None
+        self._remove_stop_file()
+        self._sum = None
+        self._sum_of_squares = None
+        self._maximum = None
+        self._failed = False
+        # snapshots left by an earlier run of this step are ignored until the job overwrites them
+        self._stale_signatures = {filename: _get_file_signature(filename)
+                                  for _, filename in self._find_new_snapshots()}
+        for suffix in ['summary.json', 'mean.solb', 'rms.solb', 'max.solb']:
+            if os.path.isfile(self._get_output_filename(suffix)):
+                os.remove(self._get_output_filename(suffix))
+
+    def poll(self) -> bool:
+        try:
+            self.reduce_available_snapshots()
+        except ValueError as error:
+            print(f'Stopping the snapshot reducer of {self.job_name}{self.istep:02d}: {error}')
+            self._failed = True
+            return True
+        return False
+
+    def finalize(self):
+        if not self._failed:
+            try:
+                self.reduce_available_snapshots()
+            except ValueError as error:
+                print(f'Snapshot reducer of {self.job_name}{self.istep:02d}: {error}')
+                self._failed = True
+        if self.stopped_at_timestep is not None:
+            self._remove_stop_file()
+        if self._failed or self.number_of_snapshots == 0:
+            return
+        for name, values in self.get_statistics().items():
+            write_solb(self._get_output_filename(f'{name}.solb'), values)
+        self._write_summary(statistics_written=True)
+        print(f'Reduced {self.number_of_snapshots} snapshots of {self.job_name}{self.istep:02d}'
+              f' from timestep {self.consumed_timesteps[0]} to {self.consumed_timesteps[-1]}')
+
+    def statistics_converged(self) -> bool:
+        """
+        Whether the relative change of the statistics stayed below :attr:`statistics_tolerance` for
+        :attr:`convergence_window` consecutive snapshots
+        """
+        if self.statistics_tolerance is None or self.number_of_snapshots < self.minimum_snapshots:
+            return False
+        recent_changes = self.relative_changes[-self.convergence_window:]
+        return len(recent_changes) == self.convergence_window and max(recent_changes) < self.statistics_tolerance
+
+    def reduce_available_snapshots(self):
+        """
+        Reduce the complete snapshots that appeared since the last call in the order of their timesteps.
+        Raises ValueError if a snapshot does not match the earlier ones.
+        """
+        number_of_snapshots = self.number_of_snapshots
+        try:
+            self._reduce_new_snapshots()
+        finally:
+            if self.number_of_snapshots > number_of_snapshots:
+                self._write_summary(statistics_written=False)
+
+    def _reduce_new_snapshots(self):
+        for timestep, filename in self._find_new_snapshots():
+            if filename in self._stale_signatures:
+                if _get_file_signature(filename) == self._stale_signatures[filename]:
+                    continue
+                del self._stale_signatures[filename]
+            try:
+                snapshot = SolbFile(filename)
+            except (ValueError, FileNotFoundError):
+                # the solver is still writing it
+                return
+            previous_statistics = self.get_statistics()
+            self._add_snapshot(snapshot.values[:, self.field_index])
+            del snapshot
+            self.consumed_timesteps.append(timestep)
+            self.relative_changes.append(self._compute_relative_change(previous_statistics))
+            if self.delete_consumed_snapshots:
+                os.remove(filename)
+            if self.stopped_at_timestep is None and self.statistics_converged():
+                self._request_stop(timestep)
+
+    def _add_snapshot(self, interpolant: np.ndarray):
+        if self._sum is None:
+            self._sum = np.zeros(interpolant.shape[0])
+            self._sum_of_squares = np.zeros(interpolant.shape[0])
+            self._maximum = np.full(interpolant.shape[0], -np.inf)
+        elif interpolant.shape[0] != self._sum.shape[0]:
+            raise ValueError(f'snapshot has {interpolant.shape[0]} vertices instead of {self._sum.shape[0]}')
+        interpolant = np.asarray(interpolant, dtype=float)
+        self._sum += interpolant
+        self._sum_of_squares += interpolant * interpolant
+        np.maximum(self._maximum, interpolant, out=self._maximum)
+
+    def _compute_relative_change(self, previous_statistics: dict) -> float:
+        if len(previous_statistics) == 0:
+            return np.inf
+        statistics = self.get_statistics()
+        changes = []
+        for name in self.convergence_statistics:
+            scale = max(np.linalg.norm(statistics[name]), np.finfo(float).tiny)
+            changes.append(np.linalg.norm(statistics[name] - previous_statistics[name]) / scale)
+        return float(max(changes))
+
+    def _request_stop(self, timestep: int):
+        with open(os.path.join(self.run_directory, self.stop_filename), 'w') as fh:
+            fh.write('\n')
+        self.stopped_at_timestep = timestep
+        print(f'Snapshot statistics of {self.job_name}{self.istep:02d} converged at timestep {timestep}:'
+              f' relative change of {self.relative_changes[-1]:.3e}. Requested stop')
+
+    def _remove_stop_file(self):
+        stop_file = os.path.join(self.run_directory, self.stop_filename)
+        if os.path.isfile(stop_file):
+            os.remove(stop_file)
+
+    def _find_new_snapshots(self):
+        snapshots = []
+        with os.scandir(self.run_directory) as entries:
+            for entry in entries:
+                match = self._snapshot_pattern.match(entry.name)
+                if match is None:
+                    continue
+                timestep = int(match.group(1))
+                if timestep in self.consumed_timesteps or not self._in_window(timestep):
+                    continue
+                snapshots.append((timestep, entry.path))
+        return sorted(snapshots)
+
+    def _in_window(self, timestep: int) -> bool:
+        if self.window_first_step >= 0 and timestep < self.window_first_step:
+            return False
+        if self.window_last_step >= 0 and timestep > self.window_last_step:
+            return False
+        return True
+
+    def _get_output_filename(self, suffix: str) -> str:
+        return os.path.join(self.run_directory, f'{self.project_name}{self.istep:02d}_snapshot_{suffix}')
+
+    def _write_summary(self, statistics_written: bool):
+        summary = {'job': f'{self.job_name}{self.istep:02d}',
+                   'number_of_snapshots': self.number_of_snapshots,
+                   'timesteps': self.consumed_timesteps,
+                   'field_index': self.field_index,
+                   'statistics_written': statistics_written,
+                   'relative_changes': [change if np.isfinite(change) else None for change in self.relative_changes],
+                   'statistics_tolerance': self.statistics_tolerance,
+                   'stopped_at_timestep': self.stopped_at_timestep}
+        with open(self._get_output_filename('summary.json'), 'w') as fh:
+            json.dump(summary, fh, indent=2)
+
+    def _run(self):
+        with create_file_watcher([self.run_directory], self.use_inotify, self.poll_interval) as watcher:
+            while not self._stop_event.is_set():
+                if self.poll():
+                    return
+                watcher.wait(self.poll_interval)
+
+
+def _get_file_signature(filename: str):
+    if not os.path.isfile(filename):
+        return None
+    stat = os.stat(filename)
+    return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,39 @@
+from typing import List
+
+
+class SimulationPhase:
+    def __init__(self, job_name: str, message: str = None, skip_external_distance: bool = False,
+                 settings: dict = None, hooks: List[str] = None):
+        """
+        One solver call of a multi-phase simulation, e.g., the forward or adjoint phase
+
+        Parameters
+        ----------
+        job_name:
+            The job name of the phase, which selects the templates of the solver inputs
+        message:
+            Printed when the phase starts
+        skip_external_distance:
+            Whether the phase uses the distance field of an earlier phase
+        settings:
+            Attributes of the simulation set before the inputs and commands of the phase are created,
+            e.g., ``{'omp_threads': 20}``
+        hooks:
+            Names of methods of the simulation called with the step number after the phase finishes.
+            If the phases are batched into one job, the hooks run inside the job, so they can only
+            pass information to later phases through files.
+        """
+        #: str: The job name of the phase
+        self.job_name = job_name
+
+        #: str: Printed when the phase starts
+        self.message = message
+
+        #: bool: Whether the phase uses the distance field of an earlier phase
+        self.skip_external_distance = skip_external_distance
+
+        #: dict: Attributes of the simulation set before the inputs and commands of the phase are created
+        self.settings = {} if settings is None else settings
+
+        #: list: Names of methods of the simulation called with the step number after the phase
+        self.hooks = [] if hooks is None else hooks
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 import os
 from collections import OrderedDict
-from io import TextIOWrapper
+from io import StringIO, TextIOWrapper
 
 import numpy as np
 
@@ -58,13 +58,24 @@ class SFEconfig(OrderedDict):
             raise FileExistsError(f'{output_file} file exist and will not be overwritten')
         else:
             with open(output_file, 'w') as fh:
-                for key, value in self.items():
-                    if isinstance(value, np.ndarray):
-                        self._write_array(key, value, fh)
-                    elif isinstance(value, list):
-                        self._write_array(key, np.array(value), fh)
-                    else:
-                        self._write_single_value(key, value, fh)
+                self._write_entries(fh)
+
+    def to_string(self) -> str:
+        """
+        The content of the SFE configuration file
+        """
+        buffer = StringIO()
+        self._write_entries(buffer)
+        return buffer.getvalue()
+
+    def _write_entries(self, fh: TextIOWrapper):
+        for key, value in self.items():
+            if isinstance(value, np.ndarray):
+                self._write_array(key, value, fh)
+            elif isinstance(value, list):
+                self._write_array(key, np.array(value), fh)
+            else:
+                self._write_single_value(key, value, fh)
 
     def _convert_read_arrays_to_numpy(self):
         self._convert_plus_sign_arrays_to_numpy()
@@ -85,56 +96,47 @@ class SFEconfig(OrderedDict):
         self[key] = np.array([self._convert_type(item) for item in items])
 
     def _convert_parentheses_arrays_to_numpy(self):
-        array_keys = self._find_parentheses_array_keys()
-
-        for key in array_keys:
-            array = self._create_zeros_array_of_correct_shape_and_type(key)
-            self._fill_array_from_parentheses_key(key, array)
-
-    def _create_zeros_array_of_correct_shape_and_type(self, array_key: str):
+        # group the indexed keys by array name in one sweep
+        array_elements = OrderedDict()
         for key, value in self.items():
-            if array_key in key:
-                dtype = type(self._convert_type(value))
-                ndims = key.count(',') + 1
-                break
-
-        dims = np.ones(ndims, dtype=int)
-        for key in self.keys():
-            if array_key == self._strip_parentheses_from_key(key):
-                for dim in range(ndims):
-                    dims[dim] = np.max((dims[dim], self._get_array_index(key, dim)+1))
-
-        return np.zeros(dims, dtype=dtype)
-
-    def _fill_array_from_parentheses_key(self, array_key: str, array: np.ndarray):
-        old_keys = []
-        for key, value in self.items():
-            if array_key == self._strip_parentheses_from_key(key):
-                ind = []
-                for dim in range(array.ndim):
-                    ind.append(self._get_array_index(key, dim))
-                index = tuple(ind)
-                array[index] = self._convert_type(value)
-                old_keys.append(key)
-
-        for key in old_keys:
-            self.pop(key)
-        self[array_key] = array
+            if '(' in key:
+                array_elements.setdefault(self._strip_parentheses_from_key(key), []).append((key, value))
+
+        for array_key, elements in array_elements.items():
+            array = self._create_array_from_elements(elements)
+            for key, _ in elements:
+                self.pop(key)
+            self[array_key] = array
+
+    def _create_array_from_elements(self, elements: list) -> np.ndarray:
+        values = [self._convert_type(value) for _, value in elements]
+        dtype = type(values[0])
+        index_lists = [self._get_array_indices(key) for key, _ in elements]
+        ndims = len(index_lists[0])
+        if any(len(index) < ndims for index in index_lists):
+            raise IndexError(f'Array {self._strip_parentheses_from_key(elements[0][0])} has inconsistent dimensions')
+        indices = np.array([index[:ndims] for index in index_lists], dtype=int)
+        dims = np.maximum(indices.max(axis=0) + 1, 1)
+
+        if dtype in (bool, int, float, str) and all(type(value) is dtype for value in values):
+            if dtype is str:
+                # size the strings to the longest value so they are not truncated
+                array = np.zeros(dims, dtype=f'<U{max(len(value) for value in values)}')
+            else:
+                array = np.zeros(dims, dtype=dtype)
+            array[tuple(indices.T)] = values
+        else:
+            array = np.zeros(dims, dtype=dtype)
+            for index, value in zip(indices, values):
+                array[tuple(index)] = value
+        return array
 
     def _strip_parentheses_from_key(self, key: str):
         return key.split('(')[0]
 
-    def _get_array_index(self, key: str, dim=0):
+    def _get_array_indices(self, key: str) -> list:
         str_between_parentheses = key.split('(')[1].split(')')[0]
-        return int(str_between_parentheses.split(',')[dim])
-
-    def _find_parentheses_array_keys(self):
-        array_keys = []
-        for array_key in self.keys():
-            strip_key = array_key.split('(')[0]
-            if '(' in array_key and strip_key not in array_keys:
-                array_keys.append(strip_key)
-        return array_keys
+        return [int(index) for index in str_between_parentheses.split(',')]
 
     def _convert_type(self, val_string: str):
         if not isinstance(val_string, str):
@@ -168,40 +170,32 @@ class SFEconfig(OrderedDict):
 
     def _write_array(self, array_key: str, value: np.ndarray, fh: TextIOWrapper):
         ndim = value.ndim
-        if ndim == 1:
-            self._write_1D_array(array_key, value, fh)
-        elif ndim == 2:
-            self._write_2D_array(array_key, value, fh)
-        elif ndim == 3:
-            self._write_3D_array(array_key, value, fh)
-        elif ndim == 4:
-            self._write_4D_array(array_key, value, fh)
-        else:
+        if ndim < 1 or ndim > 4:
             raise ValueError('5D+ arrays not supported in sfe_cfg writer')
-
-    def _write_1D_array(self, array_key: str, value: np.ndarray, fh: TextIOWrapper):
-        for i in range(value.shape[0]):
-            self._write_single_value(f'{array_key}({i})', value[i], fh)
-
-    def _write_2D_array(self, array_key: str, value: np.ndarray, fh: TextIOWrapper):
-        for i in range(value.shape[0]):
-            for j in range(value.shape[1]):
-                self._write_single_value(f'{array_key}({i},{j})', value[i, j], fh)
-
-    def _write_3D_array(self, array_key: str, value: np.ndarray, fh: TextIOWrapper):
-        for i in range(value.shape[0]):
-            for j in range(value.shape[1]):
-                for k in range(value.shape[2]):
-                    self._write_single_value(f'{array_key}({i},{j},{k})', value[i, j, k], fh)
-
-    def _write_4D_array(self, array_key: str, value: np.ndarray, fh: TextIOWrapper):
-        for i in range(value.shape[0]):
-            for j in range(value.shape[1]):
-                for k in range(value.shape[2]):
-                    for m in range(value.shape[2]):
-                        self._write_single_value(f'{array_key}({i},{j},{k},{m})', value[i, j, k, m], fh)
+        if value.size == 0:
+            return
+
+        # the index strings of every element in C order, e.g., "1,0,2"
+        indices = np.indices(value.shape).reshape(ndim, -1)
+        index_strings = indices[0].astype(str)
+        for dim in range(1, ndim):
+            index_strings = np.char.add(np.char.add(index_strings, ','), indices[dim].astype(str))
+
+        lines = np.char.add(np.char.add(f'{array_key}(', index_strings), ') = ')
+        lines = np.char.add(lines, self._format_array_values(value))
+        fh.write('\n'.join(lines.tolist()) + '\n')
+
+    def _format_array_values(self, value: np.ndarray) -> np.ndarray:
+        if value.dtype == np.bool_:
+            return np.where(value, '.true.', '.false.').ravel()
+        if value.dtype.kind in 'iuU' or value.dtype == np.float64:
+            return value.astype(str).ravel()
+        return np.array([self._format_single_value(item) for item in value.ravel()], dtype=str)
 
     def _write_single_value(self, key: str, value, fh: TextIOWrapper):
+        fh.write(f'{key} = {self._format_single_value(value)}\n')
+
+    def _format_single_value(self, value) -> str:
         if isinstance(value, (bool, np.bool_)):
             value = '.true.' if value else '.false.'
-        fh.write(f'{key} = {value}\n')
+        return f'{value}'
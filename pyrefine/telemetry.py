@@ -0,0 +1,259 @@
+"""
+Live telemetry of an adaptation.
+
+The adaptation driver records the current cycle, phase, complexity, mesh size, node requests,
+phase durations, and latest monitored values as events. Each event updates the in-memory state
+and is appended to a JSON lines event log. The state can be served over HTTP in the Prometheus
+text format at ``/metrics`` and as JSON at ``/metrics.json`` so dashboards can poll it without
+parsing the solver logs.
+"""
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+
+class AdaptationTelemetry:
+    def __init__(self, project_name: str, event_log_filename: str = None):
+        """
+        Parameters
+        ----------
+        project_name:
+            The root name of the project. Used as a label of the metrics
+        event_log_filename:
+            JSON lines file that each event is appended to. If None, the events are only kept in memory
+        """
+        #: str: The root name of the project
+        self.project_name = project_name
+
+        #: str: JSON lines file that each event is appended to
+        self.event_log_filename = event_log_filename
+
+        self._lock = threading.Lock()
+        self._server = None
+        self._server_thread = None
+        self._reset_state()
+
+    def _reset_state(self):
+        self.state = {
+            "project": self.project_name,
+            "cycle": None,
+            "phase": None,
+            "complexity": None,
+            "vertex_count": None,
+            "node_requests": {},
+            "phase_durations": {},
+            "total_phase_durations": {},
+            "monitor_values": {},
+            "start_time": None,
+            "last_update_time": None,
+        }
+
+    def record_event(self, event: str, **fields):
+        """
+        Update the state with an event and append it to the event log
+
+        Parameters
+        ----------
+        event:
+            The type of event: ``start``, ``cycle_start``, ``phase_start``, ``phase_end``,
+            ``mesh_size``, ``complexity``, ``monitor_values``, or ``finish``
+        fields:
+            The values of the event
+        """
+        entry = {"time": time.time(), "event": event}
+        entry.update(fields)
+        with self._lock:
+            self._apply_event(entry)
+        if self.event_log_filename is not None:
+            with open(self.event_log_filename, "a") as fh:
+                fh.write(json.dumps(entry) + "\n")
+
+    def load_event_log(self, filename: str = None):
+        """
+        Rebuild the state by replaying an existing event log, e.g., when an adaptation is restarted
+        """
+        filename = self.event_log_filename if filename is None else filename
+        with self._lock:
+            self._reset_state()
+            try:
+                with open(filename, "r") as fh:
+                    for line in fh:
+                        if line.strip():
+                            self._apply_event(json.loads(line))
+            except FileNotFoundError:
+                pass
+
+    def start_cycle(self, istep: int):
+        self.record_event("cycle_start", cycle=istep)
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Context manager that records the start and duration of a phase of the current cycle
+        """
+        self.record_event("phase_start", phase=name)
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record_event("phase_end", phase=name, duration=time.time() - start)
+
+    def record_mesh_size(self, vertex_count: int, node_requests: Dict[str, int]):
+        self.record_event("mesh_size", vertex_count=int(vertex_count),
+                          node_requests={key: int(value) for key, value in node_requests.items()})
+
+    def record_complexity(self, complexity: float):
+        self.record_event("complexity", complexity=None if complexity is None else float(complexity))
+
+    def record_monitor_values(self, values: Dict[str, float]):
+        if values:
+            self.record_event("monitor_values", values={key: float(value) for key, value in values.items()})
+
+    def snapshot(self) -> dict:
+        """
+        A copy of the current state
+        """
+        with self._lock:
+            return json.loads(json.dumps(self.state))
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus_text(self) -> str:
+        """
+        The current state in the Prometheus text exposition format
+        """
+        state = self.snapshot()
+        project = {"project": state["project"]}
+        lines = []
+
+        def add_metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                if value is not None:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        add_metric("pyrefine_cycle", "gauge", "Current adaptation cycle", [(project, state["cycle"])])
+        add_metric("pyrefine_phase", "gauge", "Phase of the adaptation cycle that is running",
+                   [({**project, "phase": state["phase"]}, 1)] if state["phase"] else [])
+        add_metric("pyrefine_complexity", "gauge", "Complexity requested for the next mesh",
+                   [(project, state["complexity"])])
+        add_metric("pyrefine_vertex_count", "gauge", "Number of vertices of the current mesh",
+                   [(project, state["vertex_count"])])
+        add_metric("pyrefine_node_request", "gauge", "Number of compute nodes requested by each component",
+                   [({**project, "component": component}, value)
+                    for component, value in sorted(state["node_requests"].items())])
+        add_metric("pyrefine_phase_duration_seconds", "gauge", "Duration of the last completed run of each phase",
+                   [({**project, "phase": phase}, value) for phase, value in sorted(state["phase_durations"].items())])
+        add_metric("pyrefine_phase_duration_seconds_total", "counter", "Total duration of each phase",
+                   [({**project, "phase": phase}, value)
+                    for phase, value in sorted(state["total_phase_durations"].items())])
+        add_metric("pyrefine_monitor_value", "gauge", "Latest monitored residual and force values",
+                   [({**project, "variable": variable}, value)
+                    for variable, value in sorted(state["monitor_values"].items())])
+        add_metric("pyrefine_last_update_timestamp_seconds", "gauge", "Time of the last event",
+                   [(project, state["last_update_time"])])
+        return "\n".join(lines) + "\n"
+
+    def start_server(self, port: int, host: str = "127.0.0.1") -> int:
+        """
+        Serve the metrics in a background thread
+
+        Parameters
+        ----------
+        port:
+            The port to listen on. If 0, a free port is chosen
+        host:
+            The interface to listen on. The default only accepts local connections
+
+        Returns
+        -------
+        port:
+            The port the server is listening on
+        """
+        telemetry = self
+
+        class TelemetryRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0].rstrip("/")
+                if path == "/metrics":
+                    self._send(telemetry.to_prometheus_text(), "text/plain; version=0.0.4; charset=utf-8")
+                elif path in ["/metrics.json", ""]:
+                    self._send(telemetry.to_json(), "application/json")
+                else:
+                    self.send_error(404)
+
+            def _send(self, body: str, content_type: str):
+                body = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), TelemetryRequestHandler)
+        self._server.daemon_threads = True
+        self._server_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._server_thread.start()
+        return self._server.server_address[1]
+
+    def stop_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server_thread.join()
+            self._server = None
+            self._server_thread = None
+
+    def _apply_event(self, entry: dict):
+        state = self.state
+        event = entry["event"]
+        state["last_update_time"] = entry["time"]
+        if event == "start" and state["start_time"] is None:
+            state["start_time"] = entry["time"]
+        elif event == "cycle_start":
+            state["cycle"] = entry["cycle"]
+            state["phase"] = None
+        elif event == "phase_start":
+            state["phase"] = entry["phase"]
+        elif event == "phase_end":
+            phase = entry["phase"]
+            state["phase"] = None
+            state["phase_durations"][phase] = entry["duration"]
+            state["total_phase_durations"][phase] = state["total_phase_durations"].get(phase, 0.0) + entry["duration"]
+        elif event == "mesh_size":
+            state["vertex_count"] = entry["vertex_count"]
+            state["node_requests"] = dict(entry["node_requests"])
+        elif event == "complexity":
+            state["complexity"] = entry["complexity"]
+        elif event == "monitor_values":
+            state["monitor_values"] = dict(entry["values"])
+        elif event == "finish":
+            state["phase"] = None
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value) -> str:
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
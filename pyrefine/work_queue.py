@@ -0,0 +1,547 @@
+#!/usr/bin/env python
+"""
+Hand the jobs of a component to a persistent worker job through a file-based work queue.
+
+On hybrid CPU/GPU runs, refine runs on CPU nodes and the flow solver on GPU nodes, so every cycle waits in the
+queue for GPU nodes again. The :class:`PersistentWorkerLauncher` replaces the PBS helper of the simulation.
+It submits one worker job that holds the GPU nodes and sends it the commands of each flow job through a
+queue directory in the run directory. The worker claims tasks by renaming them, which is atomic,
+and it updates a heartbeat file while it runs. It exits once it has been idle for the idle timeout.
+The launcher submits a new worker job when the old one exits or its heartbeat goes stale, deleting the stale
+job first, and when the requested number of nodes changes.
+
+Run a worker with ``python -m pyrefine.work_queue {queue_directory}``.
+"""
+import argparse
+import json
+import os
+import shlex
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import List
+
+from pbs4py import PBS, FakePBS
+
+from pyrefine.file_watcher import create_file_watcher
+
+
+class FileWorkQueue:
+    def __init__(self, directory: str):
+        """
+        A queue of shell command lists in a directory.
+
+        A task moves from ``pending`` to ``running`` when a worker claims it and its result is written to ``done``.
+        Every file is written to a temporary name and renamed into place, so readers never see a partial file.
+
+        Parameters
+        ----------
+        directory:
+            The queue directory
+        """
+        #: str: the absolute path of the queue directory
+        self.directory = os.path.abspath(directory)
+
+        #: str: the file the worker updates while it runs
+        self.heartbeat_filename = os.path.join(self.directory, 'worker_heartbeat.json')
+
+        #: str: the file that tells the worker to exit
+        self.stop_filename = os.path.join(self.directory, 'worker_stop')
+
+        #: str: the file each worker job appends its launch id to once the worker command returned,
+        #:      even if the worker failed to start
+        self.job_ended_filename = os.path.join(self.directory, 'worker_job_ended')
+
+        for name in ['pending', 'running', 'done']:
+            os.makedirs(self._get_directory(name), exist_ok=True)
+
+    def submit(self, job_name: str, commands: List[str], working_directory: str = None) -> str:
+        """
+        Add a task to the queue
+
+        Parameters
+        ----------
+        job_name:
+            The name of the job the commands belong to
+        commands:
+            The shell commands to run in order
+        working_directory:
+            The directory the commands run in. The default is the current directory
+
+        Returns
+        -------
+        task_id:
+            The id of the task, which orders the tasks in the queue
+        """
+        task_id = f'{time.time_ns():020d}_{job_name}'
+        task = {'task_id': task_id, 'job_name': job_name, 'commands': list(commands),
+                'working_directory': os.path.abspath('.' if working_directory is None else working_directory)}
+        self._write_json(self._get_task_filename('pending', task_id), task)
+        return task_id
+
+    def claim(self):
+        """
+        Claim the oldest pending task
+
+        Returns
+        -------
+        task:
+            The task or None if the queue is empty
+        """
+        for filename in sorted(os.listdir(self._get_directory('pending'))):
+            if not filename.endswith('.json'):
+                continue
+            running_filename = os.path.join(self._get_directory('running'), filename)
+            try:
+                os.rename(os.path.join(self._get_directory('pending'), filename), running_filename)
+            except FileNotFoundError:
+                # another worker claimed it first
+                continue
+            with open(running_filename, 'r') as fh:
+                return json.load(fh)
+        return None
+
+    def complete(self, task: dict, return_codes: List[int]):
+        """
+        Record the result of a claimed task
+        """
+        result = {'task_id': task['task_id'], 'job_name': task['job_name'], 'return_codes': return_codes,
+                  'number_of_failures': sum(1 for code in return_codes if code != 0)}
+        self._write_json(self._get_task_filename('done', task['task_id']), result)
+        running_filename = self._get_task_filename('running', task['task_id'])
+        if os.path.isfile(running_filename):
+            os.remove(running_filename)
+
+    def get_result(self, task_id: str):
+        """
+        Returns
+        -------
+        result:
+            The return codes and number of failures of the task or None if it has not completed
+        """
+        filename = self._get_task_filename('done', task_id)
+        if not os.path.isfile(filename):
+            return None
+        with open(filename, 'r') as fh:
+            return json.load(fh)
+
+    def discard_tasks(self, state: str) -> List[str]:
+        """
+        Remove the tasks in the 'pending' or 'running' state, e.g., the tasks left by an earlier driver
+
+        Returns
+        -------
+        task_ids:
+            The removed tasks
+        """
+        task_ids = []
+        for filename in sorted(os.listdir(self._get_directory(state))):
+            if filename.endswith('.json'):
+                os.remove(os.path.join(self._get_directory(state), filename))
+                task_ids.append(filename[:-len('.json')])
+        return task_ids
+
+    def discard_task(self, task_id: str):
+        """
+        Remove a task that has not completed, e.g., when the launcher gives up on it
+        """
+        for state in ['pending', 'running']:
+            filename = self._get_task_filename(state, task_id)
+            if os.path.isfile(filename):
+                os.remove(filename)
+
+    def requeue_running_tasks(self) -> List[str]:
+        """
+        Move the tasks of a worker that died back to the pending tasks
+
+        Returns
+        -------
+        task_ids:
+            The requeued tasks
+        """
+        task_ids = []
+        for filename in sorted(os.listdir(self._get_directory('running'))):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                os.rename(os.path.join(self._get_directory('running'), filename),
+                          os.path.join(self._get_directory('pending'), filename))
+            except FileNotFoundError:
+                continue
+            task_ids.append(filename[:-len('.json')])
+        return task_ids
+
+    def write_heartbeat(self, state: str = 'running'):
+        self._write_json(self.heartbeat_filename, {'state': state, 'time': time.time(), 'pid': os.getpid(),
+                                                   'host': socket.gethostname(),
+                                                   'job_id': os.environ.get('PBS_JOBID')})
+
+    def read_heartbeat(self):
+        """
+        Returns
+        -------
+        heartbeat:
+            The state, time, process, host, and PBS job id of the worker or None if no worker has started
+        """
+        try:
+            with open(self.heartbeat_filename, 'r') as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+
+    def get_worker_status(self, heartbeat_timeout: float) -> str:
+        """
+        Returns
+        -------
+        status:
+            'alive' if the worker updated its heartbeat within the timeout, 'exited' if it exited or its
+            heartbeat is stale, and 'absent' if no worker has started
+        """
+        heartbeat = self.read_heartbeat()
+        if heartbeat is None:
+            return 'absent'
+        if heartbeat['state'] != 'running' or time.time() - heartbeat['time'] > heartbeat_timeout:
+            return 'exited'
+        return 'alive'
+
+    def request_stop(self):
+        """
+        Tell the worker to exit once it finishes its current task
+        """
+        with open(self.stop_filename, 'w') as fh:
+            fh.write('\n')
+
+    def _get_directory(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _get_task_filename(self, name: str, task_id: str) -> str:
+        return os.path.join(self._get_directory(name), f'{task_id}.json')
+
+    def _write_json(self, filename: str, data: dict):
+        temporary_filename = f'{filename}.{os.getpid()}.tmp'
+        with open(temporary_filename, 'w') as fh:
+            json.dump(data, fh)
+        os.replace(temporary_filename, filename)
+
+
+def run_worker(queue_directory: str, idle_timeout: float = 600.0, heartbeat_interval: float = 30.0,
+               poll_interval: float = 5.0):
+    """
+    Run the tasks of the queue until the worker has been idle for `idle_timeout` seconds or a stop is requested
+
+    Parameters
+    ----------
+    queue_directory:
+        The queue directory
+    idle_timeout:
+        Seconds without a task after which the worker exits
+    heartbeat_interval:
+        Seconds between updates of the heartbeat file
+    poll_interval:
+        Seconds between checks of the queue if the directory is polled
+    """
+    queue = FileWorkQueue(queue_directory)
+    queue.write_heartbeat()
+    stop_heartbeat = threading.Event()
+
+    def beat():
+        while not stop_heartbeat.wait(heartbeat_interval):
+            queue.write_heartbeat()
+
+    heartbeat_thread = threading.Thread(target=beat, daemon=True)
+    heartbeat_thread.start()
+    shell = shutil.which('bash')
+    idle_start = time.time()
+    try:
+        with create_file_watcher([queue._get_directory('pending'), queue.directory],
+                                 poll_interval=poll_interval) as watcher:
+            while not os.path.isfile(queue.stop_filename):
+                task = queue.claim()
+                if task is None:
+                    idle_time = time.time() - idle_start
+                    if idle_time >= idle_timeout:
+                        print(f'Worker idle for {idle_time:.0f} seconds. Exiting')
+                        break
+                    watcher.wait(min(poll_interval, idle_timeout - idle_time))
+                    continue
+                print(f'Running task {task["task_id"]}', flush=True)
+                return_codes = []
+                for command in task['commands']:
+                    print(command, flush=True)
+                    return_codes.append(subprocess.run(command, shell=True, executable=shell,
+                                                       cwd=task['working_directory']).returncode)
+                queue.complete(task, return_codes)
+                idle_start = time.time()
+    finally:
+        stop_heartbeat.set()
+        heartbeat_thread.join()
+        queue.write_heartbeat('exited')
+
+
+class PersistentWorkerLauncher:
+    def __init__(self, pbs: PBS, queue_directory: str = 'work_queue', worker_job_name: str = 'worker'):
+        """
+        Launch jobs through a persistent worker job instead of submitting a new job each time.
+
+        It is used in place of the PBS helper of a component, e.g., ``simulation.pbs``. The MPI commands are
+        still created by the wrapped PBS helper, which also submits the worker job with its resources.
+        Every other attribute is read from and set on the wrapped helper. When the requested number of nodes
+        changes, the worker is stopped so the next job runs on a worker with the new number of nodes.
+
+        Parameters
+        ----------
+        pbs:
+            The PBS helper of the nodes the worker holds
+        queue_directory:
+            The queue directory, relative to the directory the jobs are launched from
+        worker_job_name:
+            The name of the worker job
+        """
+        #: :class:`PBS`: the PBS helper of the nodes the worker holds
+        self.pbs = pbs
+
+        #: str: the queue directory
+        self.queue_directory = queue_directory
+
+        #: str: the name of the worker job
+        self.worker_job_name = worker_job_name
+
+        #: float: seconds without a task after which the worker exits and gives up its nodes
+        self.idle_timeout = 600.0
+
+        #: float: seconds between updates of the worker heartbeat
+        self.heartbeat_interval = 30.0
+
+        #: float: a worker whose heartbeat is older than this many seconds is considered dead
+        self.heartbeat_timeout = 300.0
+
+        #: float: seconds between checks for the result of a task if the directory is polled
+        self.poll_interval = 5.0
+
+        #: int: the most worker jobs launched for one task before giving up
+        self.max_worker_launches = 3
+
+        #: float: seconds a launched worker job has to start before another one is launched. The default, None,
+        #:        waits as long as the job is in the PBS queue, since it can wait there for a long time.
+        #:        A job that ends or leaves the queue before its worker starts is relaunched either way
+        self.worker_start_timeout = None
+
+        #: list: commands run once at the start of each worker job, e.g., to start NVIDIA MPS
+        self.startup_commands: List[str] = []
+
+        #: bool: Whether to run the worker in the background of the launch command. This is needed with a
+        #:       FakePBS helper, which runs the worker command in the foreground, and must be False with PBS
+        self.detach_worker_launch = False
+
+        #: str: the python interpreter that runs the worker
+        self.python_command = sys.executable
+
+        self._worker_launch_time = None
+        self._worker_job_id = None
+        self._worker_launch_id = None
+        self._last_job_check_time = None
+        self._session_started = False
+
+    def __getattr__(self, name):
+        if name == 'pbs' or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.pbs, name)
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__ or 'pbs' not in self.__dict__ or not hasattr(self.pbs, name):
+            object.__setattr__(self, name, value)
+            return
+        if name == 'requested_number_of_nodes' and value != self.pbs.requested_number_of_nodes:
+            self._release_worker()
+        setattr(self.pbs, name, value)
+
+    def add_startup_command(self, command: str):
+        """
+        Add a command run once at the start of each worker job, unless it was already added
+        """
+        if command not in self.startup_commands:
+            self.startup_commands.append(command)
+
+    def launch(self, job_name: str, job_body: List[str], blocking: bool = True, dependency: str = None) -> str:
+        """
+        Send the commands to the worker and wait for them to finish
+
+        Parameters
+        ----------
+        job_name:
+            The name of the job
+        job_body:
+            List of commands to run
+        blocking:
+            If False, return the task id without waiting
+        dependency:
+            [ignored]
+
+        Returns
+        -------
+        output:
+            ``PersistentWorker.{number of failed commands}`` or the task id if not blocking
+        """
+        queue = FileWorkQueue(self.queue_directory)
+        if not self._session_started:
+            self._start_session(queue)
+        task_id = queue.submit(job_name, job_body)
+        print(f'Sent {job_name} to the persistent worker as task {task_id}')
+        if not blocking:
+            self.ensure_worker(queue)
+            return task_id
+        result = self.wait(queue, task_id)
+        return f'PersistentWorker.{result["number_of_failures"]}'
+
+    def wait(self, queue: FileWorkQueue, task_id: str) -> dict:
+        """
+        Wait for the result of a task and launch new worker jobs if the worker exits before finishing it
+        """
+        worker_launches = 0
+        with create_file_watcher([queue._get_directory('done')], poll_interval=self.poll_interval) as watcher:
+            while True:
+                result = queue.get_result(task_id)
+                if result is not None:
+                    return result
+                if self._needs_worker(queue):
+                    if worker_launches >= self.max_worker_launches:
+                        queue.discard_task(task_id)
+                        raise RuntimeError(f'Launched {self.max_worker_launches} workers for task {task_id}'
+                                           ' without a result')
+                    self._launch_worker(queue)
+                    worker_launches += 1
+                watcher.wait(self.poll_interval)
+
+    def ensure_worker(self, queue: FileWorkQueue) -> bool:
+        """
+        Launch a worker job unless a worker is alive or one was launched and has not started yet
+
+        Returns
+        -------
+        launched:
+            Whether a worker job was launched
+        """
+        if not self._needs_worker(queue):
+            return False
+        self._launch_worker(queue)
+        return True
+
+    def stop_worker(self):
+        """
+        Tell the worker to exit, e.g., at the end of the adaptation, instead of waiting for the idle timeout.
+        A worker job that has not started yet is deleted.
+        """
+        if not self._session_started:
+            return
+        queue = FileWorkQueue(self.queue_directory)
+        queue.request_stop()
+        if queue.get_worker_status(self.heartbeat_timeout) == 'absent':
+            self._delete_job(self._worker_job_id)
+        self._worker_launch_time = None
+        self._worker_job_id = None
+
+    def _release_worker(self):
+        """
+        Stop the worker so the next job launches a new one, e.g., with a different number of nodes
+        """
+        if not self._session_started:
+            return
+        print('Requested number of nodes changed. Stopping the persistent worker')
+        self.stop_worker()
+
+    def _needs_worker(self, queue: FileWorkQueue) -> bool:
+        """
+        Check if a worker job has to be launched. The tasks of an exited worker are requeued, and its job is
+        deleted first in case it is still running with a stale heartbeat
+        """
+        status = queue.get_worker_status(self.heartbeat_timeout)
+        if status == 'alive' or (status == 'absent' and self._worker_is_starting(queue)):
+            return False
+        if status == 'exited':
+            heartbeat = queue.read_heartbeat()
+            if heartbeat['state'] == 'running':
+                self._delete_job(heartbeat.get('job_id') or self._worker_job_id)
+            requeued_tasks = queue.requeue_running_tasks()
+            if len(requeued_tasks) > 0:
+                print(f'Requeued the tasks of the exited worker: {", ".join(requeued_tasks)}')
+            os.remove(queue.heartbeat_filename)
+        return True
+
+    def _start_session(self, queue: FileWorkQueue):
+        self._session_started = True
+        stale_tasks = queue.discard_tasks('pending')
+        if queue.get_worker_status(self.heartbeat_timeout) != 'alive':
+            stale_tasks += queue.discard_tasks('running')
+        if len(stale_tasks) > 0:
+            print(f'Discarded the tasks of an earlier run: {", ".join(stale_tasks)}')
+
+    def _worker_is_starting(self, queue: FileWorkQueue) -> bool:
+        if self._worker_launch_time is None:
+            return False
+        if self._worker_job_ended(queue) or not self._job_exists(self._worker_job_id):
+            print('The worker job ended before the worker started')
+            self._worker_launch_time = None
+            return False
+        return self.worker_start_timeout is None or time.time() - self._worker_launch_time < self.worker_start_timeout
+
+    def _launch_worker(self, queue: FileWorkQueue):
+        self._worker_launch_time = time.time()
+        self._worker_launch_id = f'{time.time_ns()}'
+        if os.path.isfile(queue.stop_filename):
+            os.remove(queue.stop_filename)
+        self._worker_job_id = self.pbs.launch(self.worker_job_name,
+                                              self.startup_commands + [self._create_worker_command(queue)],
+                                              blocking=False)
+
+    def _worker_job_ended(self, queue: FileWorkQueue) -> bool:
+        # the id of the launch tells this job apart from an earlier job that is still finishing
+        if not os.path.isfile(queue.job_ended_filename):
+            return False
+        with open(queue.job_ended_filename, 'r') as fh:
+            return self._worker_launch_id in fh.read().split()
+
+    def _job_exists(self, job_id: str) -> bool:
+        # qstat is only asked once per heartbeat interval to keep the load on the PBS server low
+        if isinstance(self.pbs, FakePBS):
+            return True
+        now = time.time()
+        if self._last_job_check_time is not None and now - self._last_job_check_time < self.heartbeat_interval:
+            return True
+        self._last_job_check_time = now
+        return subprocess.run(['qstat', str(job_id)], stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL).returncode == 0
+
+    def _delete_job(self, job_id: str):
+        if job_id is None or isinstance(self.pbs, FakePBS):
+            return
+        print(f'Deleting worker job {job_id}')
+        os.popen(f'qdel {job_id}').read()
+
+    def _create_worker_command(self, queue: FileWorkQueue) -> str:
+        command = (f'{self.python_command} -m pyrefine.work_queue {queue.directory}'
+                   f' --idle-timeout {self.idle_timeout} --heartbeat-interval {self.heartbeat_interval}'
+                   f' --poll-interval {self.poll_interval} >> {queue.directory}/worker.out 2>&1;'
+                   f' echo {self._worker_launch_id} >> {queue.job_ended_filename}')
+        if self.detach_worker_launch:
+            return f'nohup sh -c {shlex.quote(command)} > /dev/null 2>&1 &'
+        return command
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('queue_directory', help='The queue directory.')
+    parser.add_argument('--idle-timeout', type=float, default=600.0,
+                        help='Seconds without a task after which the worker exits.')
+    parser.add_argument('--heartbeat-interval', type=float, default=30.0,
+                        help='Seconds between updates of the heartbeat file.')
+    parser.add_argument('--poll-interval', type=float, default=5.0,
+                        help='Seconds between checks of the queue if the directory is polled.')
+    args = parser.parse_args()
+    run_worker(args.queue_directory, args.idle_timeout, args.heartbeat_interval, args.poll_interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,11 @@
 import pytest
 import f90nml
 import os
+import shutil
 
 from pyrefine.directory_utils import cd
 from pyrefine.controller.aoa_sweep import ControllerAoaSweep
+from pyrefine.simulation.input_renderer import InputRenderer
 
 test_dir = f'{os.path.dirname(os.path.abspath(__file__))}/test_controller_aoa_sweep_files'
 
@@ -137,20 +139,30 @@ def test_compute_aoa_and_complexity_negative_step_size(controller: ControllerAoa
             assert complexity == pytest.approx(initial_complexity * 32)
 
 
-def test_update_aoa_in_nml(controller: ControllerAoaSweep):
-    with cd(f'{test_dir}/Flow'):
-        nml_list = ['fun3d.nml_forward', 'fun3d.nml_adjoint']
+def test_update_aoa_in_nml(controller: ControllerAoaSweep, tmp_path):
+    nml_list = ['fun3d.nml_forward', 'fun3d.nml_adjoint']
+    for nml_file in nml_list:
+        shutil.copy(f'{test_dir}/{nml_file}', tmp_path)
+    os.mkdir(tmp_path / 'Flow')
+
+    with cd(str(tmp_path / 'Flow')):
         controller.fun3d_nml_list = nml_list
+        renderer = InputRenderer()
 
-        aoa = 3.0
-        controller._set_angle_of_attack_in_fun3d_nmls(aoa)
-        for nml_file in nml_list:
-            nml = f90nml.read(f'../{nml_file}')
-            assert pytest.approx(aoa) == nml['reference_physical_properties']['angle_of_attack']
+        for istep, aoa in [(1, 3.0), (2, 2.5)]:
+            controller._set_angle_of_attack_in_fun3d_nmls(istep, aoa)
+            for nml_file in nml_list:
+                nml = renderer.read_namelist(f'../{nml_file}', istep)
+                assert pytest.approx(aoa) == nml['reference_physical_properties']['angle_of_attack']
+
+                # the root templates are not modified
+                nml = f90nml.read(f'../{nml_file}')
+                assert pytest.approx(2.0) == nml['reference_physical_properties']['angle_of_attack']
 
-        # reset to original values
-        aoa = 2.0
-        controller._set_angle_of_attack_in_fun3d_nmls(aoa)
+        # the angle of attack of each cycle is kept
         for nml_file in nml_list:
-            nml = f90nml.read(f'../{nml_file}')
-            assert pytest.approx(aoa) == nml['reference_physical_properties']['angle_of_attack']
+            nml = renderer.read_namelist(f'../{nml_file}', 1)
+            assert pytest.approx(3.0) == nml['reference_physical_properties']['angle_of_attack']
+            overlays = renderer.get_overlays_by_cycle(f'../{nml_file}')
+            assert [overlays[istep]['reference_physical_properties']['angle_of_attack'] for istep in [1, 2]] == \
+                pytest.approx([3.0, 2.5])
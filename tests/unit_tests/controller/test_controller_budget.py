@@ -0,0 +1,155 @@
+import pytest
+from pbs4py import PBS
+
+from pyrefine.controller.budget import ControllerBudget
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def controller(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    controller = ControllerBudget('test')
+    controller.measure_vertex_count = False
+    return controller
+
+
+def run_cycle(controller: ControllerBudget, clock: FakeClock, istep: int, seconds_per_complexity: float):
+    controller.update_inputs(istep)
+    clock.now += seconds_per_complexity * (controller.level_complexity or controller.initial_complexity)
+    return controller.compute_complexity(istep + 1, None)
+
+
+def test_cost_model_fit(controller: ControllerBudget):
+    controller.cycle_history = [{'istep': i, 'complexity': c, 'vertex_count': 2.0 * c,
+                                 'wall_time': 1e-6 * (2.0 * c) ** 1.2, 'core_hours': 0.0}
+                                for i, c in enumerate([1000.0, 1000.0, 2000.0, 4000.0])]
+    controller.wall_time_budget = 1.0
+    coefficient, exponent = controller.fit_cost_model()
+    assert exponent == pytest.approx(1.2)
+    assert coefficient == pytest.approx(1e-6)
+    assert controller.predict_cycle_cost(8000.0) == pytest.approx(1e-6 * 16000.0 ** 1.2)
+
+
+def test_default_exponent_with_one_mesh_size(controller: ControllerBudget):
+    controller.cycle_history = [{'istep': 1, 'complexity': 1000.0, 'vertex_count': 1000.0,
+                                 'wall_time': 0.0, 'core_hours': 2.0}]
+    controller.core_hour_budget = 10.0
+    assert controller.fit_cost_model() == pytest.approx((2e-3, 1.0))
+    assert controller.get_remaining_budget() == pytest.approx(8.0)
+
+
+def test_plan_prefers_more_steps_for_equivalent_final_complexity(controller: ControllerBudget):
+    controller.cycle_history = [{'istep': 1, 'complexity': 1000.0, 'vertex_count': 1000.0,
+                                 'wall_time': 1.0, 'core_hours': 0.0}]
+    controller.wall_time_budget = 1000.0
+    controller.level_complexity = 1000.0
+    controller.steps_at_current_complexity = 1
+    controller.final_complexity = 4000.0
+
+    steps, multiplier, final_complexity = controller.plan_schedule(100.0)
+    assert final_complexity == pytest.approx(4000.0)
+    assert steps == controller.maximum_steps_per_complexity
+    assert multiplier == pytest.approx(2.0)
+
+    # a tight budget needs fewer steps per level to reach a higher complexity
+    steps, multiplier, final_complexity = controller.plan_schedule(10.0)
+    assert steps == controller.minimum_steps_per_complexity
+    assert final_complexity > 2500.0
+
+    assert controller.plan_schedule(1.5) is None
+
+
+def test_schedule_within_budget(controller: ControllerBudget, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr('pyrefine.controller.budget.time.time', clock.time)
+    controller.wall_time_budget = 1.0
+    seconds_per_complexity = 0.1
+
+    complexities = []
+    for istep in range(1, 50):
+        complexities.append(run_cycle(controller, clock, istep, seconds_per_complexity))
+        if controller.check_for_early_stop_condition(istep):
+            break
+    assert controller.budget_exhausted
+    assert complexities == sorted(complexities)
+    assert complexities[-1] > controller.initial_complexity
+    assert controller.get_remaining_budget() > -seconds_per_complexity * complexities[-1] / 3600.0
+
+
+def test_restart_from_state_file(controller: ControllerBudget, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr('pyrefine.controller.budget.time.time', clock.time)
+    controller.wall_time_budget = 1.0
+    for istep in range(1, 4):
+        run_cycle(controller, clock, istep, 0.1)
+
+    restarted = ControllerBudget('test')
+    restarted.measure_vertex_count = False
+    restarted.wall_time_budget = 1.0
+    restarted._read_state()
+    assert restarted.cycle_history == controller.cycle_history
+    assert restarted.level_complexity == controller.level_complexity
+    assert restarted.get_remaining_budget() == pytest.approx(controller.get_remaining_budget())
+
+    restarted = ControllerBudget('test')
+    restarted.measure_vertex_count = False
+    restarted.wall_time_budget = 1.0
+    run_cycle(restarted, clock, 4, 0.1)
+    assert restarted.cycle_history[:3] == controller.cycle_history
+    assert len(restarted.cycle_history) == 4
+
+
+def test_new_run_ignores_old_state_file(controller: ControllerBudget, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr('pyrefine.controller.budget.time.time', clock.time)
+    controller.wall_time_budget = 1.0
+    for istep in range(1, 4):
+        run_cycle(controller, clock, istep, 0.1)
+
+    new_run = ControllerBudget('test')
+    new_run.measure_vertex_count = False
+    new_run.wall_time_budget = 1.0
+    run_cycle(new_run, clock, 1, 0.1)
+    assert len(new_run.cycle_history) == 1
+    assert new_run.level_complexity == new_run.initial_complexity
+
+
+def write_job_log(filename: str, label: str, start: str, end: str):
+    with open(filename, 'w') as fh:
+        fh.write(f'{label} Start Time: {start}\nsolver output\n{label} End Time: {end}\n')
+
+
+def test_core_hours_charge_the_run_time_of_the_jobs(controller: ControllerBudget, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr('pyrefine.controller.budget.time.time', clock.time)
+    controller.core_hour_budget = 1e6
+    controller.pbs = PBS(ncpus_per_node=40, requested_number_of_nodes=1)
+    controller.simulation_pbs = PBS(ncpus_per_node=40, requested_number_of_nodes=8)
+    controller.refine_pbs = PBS(ncpus_per_node=40, requested_number_of_nodes=2)
+
+    # without job logs, the wall time is charged with the largest node request
+    controller.update_inputs(1)
+    clock.now += 3600.0
+    controller.compute_complexity(2, None)
+    assert controller.cycle_history[0]['core_hours'] == pytest.approx(320.0)
+
+    # the queue waits between the jobs are not charged
+    write_job_log('refine01_pbs.log', 'Refine1', 'Mon Oct 19 05:00:00 UTC 2026', 'Mon Oct 19 05:30:00 UTC 2026')
+    write_job_log('flow02_pbs.log', 'Flow2', 'Mon Oct 19 23:00:00 UTC 2026', 'Tue Oct 20 01:00:00 UTC 2026')
+    controller.refine_pbs.requested_number_of_nodes = 4
+    clock.now += 10.0 * 3600.0
+    controller.compute_complexity(3, None)
+    assert controller.cycle_history[1]['wall_time'] == pytest.approx(10.0)
+    assert controller.cycle_history[1]['core_hours'] == pytest.approx(0.5 * 80.0 + 2.0 * 320.0)
+
+
+def test_budget_is_required(controller: ControllerBudget):
+    with pytest.raises(ValueError):
+        controller.compute_complexity(2, None)
@@ -1,7 +1,8 @@
 import pytest
 import os
 
-from pyrefine.controller.monitor_forces import ControllerMonitorForcesFUN3D, ControllerMonitorForcesSFE
+from pyrefine.controller.monitor_forces import (ControllerMonitorForcesFUN3D, ControllerMonitorForcesSFE,
+                                                read_last_cost_function_values)
 from pyrefine.directory_utils import cd
 
 test_dir = f'{os.path.dirname(os.path.abspath(__file__))}/test_controller_monitor_forces_files'
@@ -51,6 +52,17 @@ def test_fv_get_monitored_quantities(fv_controller: ControllerMonitorForcesFUN3D
             a == pytest.approx(e)
 
 
+def test_read_all_forces_in_one_pass():
+    expected = {'Cl': 0.1320172E-06, 'Cd': 0.8737128E-05, 'Cmx': 0.3004480E-06, 'Cmy': -0.6043072E-06,
+                'Cmz': -0.4155098E-02, 'Cx': 0.8717623E-05, 'Cy': -0.1427028E-01, 'Cz': 0.5982316E-06}
+    with cd(test_dir):
+        values = read_last_cost_function_values(fv_forces_file, list(expected.keys()))
+        assert values == pytest.approx(expected)
+        assert read_last_cost_function_values(fv_forces_file, []) == {}
+        with pytest.raises(ValueError):
+            read_last_cost_function_values(fv_forces_file, ['Cq'])
+
+
 def test_sfe_read_cost_function_from_forces_file(sfe_controller: ControllerMonitorForcesSFE):
 
     expected_cl = 1.3850644752e-01
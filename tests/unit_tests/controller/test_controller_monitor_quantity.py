@@ -131,6 +131,28 @@ def test_controller_state_reading_and_writing(controller: ControllerMonitorQuant
         os.system(f'rm {test_output}')
 
 
+def test_legacy_controller_state_reading(controller: ControllerMonitorQuantity):
+    with cd(test_dir):
+        current_complexity = controller._read_controller_restart_state('controller_state_legacy.txt')
+        assert pytest.approx(234.5) == current_complexity
+        assert controller.steps_at_current_complexity == 4
+        check_quantity_history(controller.quantity_history, [[1.334, 1.42], [4.32, 5.44]])
+
+
+def test_monitored_quantities_are_cached_per_step(controller: ControllerMonitorQuantity):
+    calls = []
+
+    def get_monitored_quantities_for_step(istep):
+        calls.append(istep)
+        return [float(istep)]
+
+    controller.get_monitored_quantities_for_step = get_monitored_quantities_for_step
+    assert controller.get_cached_monitored_quantities(3) == [3.0]
+    assert controller.get_cached_monitored_quantities(3) == [3.0]
+    assert controller.get_cached_monitored_quantities(4) == [4.0]
+    assert calls == [3, 4]
+
+
 def test_controller_reading_with_bad_file(controller: ControllerMonitorQuantity):
     with pytest.raises(RuntimeError):
         controller._read_controller_restart_state(restart_file='file_that_doesnt_exist.txt')
@@ -0,0 +1,81 @@
+import pytest
+
+from pyrefine.controller.richardson import ControllerRichardsonExtrapolation, ControllerRichardsonForcesFUN3D
+
+
+def quantity(complexity, order=2.0):
+    return 1.0 + 0.5 * complexity ** (-order / 3.0)
+
+
+@pytest.fixture
+def controller():
+    controller = ControllerRichardsonExtrapolation('test')
+    return controller
+
+
+def settle_level(controller: ControllerRichardsonExtrapolation, complexity, order=2.0):
+    controller.quantity_history = [[quantity(complexity, order)]] * 4
+    controller.steps_at_current_complexity = 4
+    assert controller._complexity_should_be_increased()
+    return controller._increase_complexity(complexity)
+
+
+def test_observed_order_and_extrapolated_value(controller: ControllerRichardsonExtrapolation):
+    controller.level_history = [(1000.0, [quantity(1000.0, 1.5)]),
+                                (3000.0, [quantity(3000.0, 1.5)]),
+                                (5000.0, [quantity(5000.0, 1.5)])]
+    extrapolated_values, coefficients, orders = controller.estimate_discretization_error()
+    assert orders[0] == pytest.approx(1.5, rel=1e-6)
+    assert coefficients[0] == pytest.approx(0.5, rel=1e-6)
+    assert extrapolated_values[0] == pytest.approx(1.0)
+
+
+def test_assumed_order_with_two_levels(controller: ControllerRichardsonExtrapolation):
+    controller.level_history = [(1000.0, [quantity(1000.0)]), (2000.0, [quantity(2000.0)])]
+    extrapolated_values, _, orders = controller.estimate_discretization_error()
+    assert orders[0] == controller.assumed_order
+    assert extrapolated_values[0] == pytest.approx(1.0)
+
+    controller.level_history = controller.level_history[:1]
+    with pytest.raises(ValueError):
+        controller.estimate_discretization_error()
+
+
+def test_multiplier_reaches_target_error(controller: ControllerRichardsonExtrapolation):
+    controller.target_relative_error = 1e-4
+    controller.maximum_complexity_multiplier = 1000.0
+
+    assert settle_level(controller, 1000.0) == pytest.approx(2000.0)
+    next_complexity = settle_level(controller, 2000.0)
+    # 0.5 C^(-2/3) = 1e-4 -> C = 5000^1.5
+    assert next_complexity == pytest.approx(5000.0 ** 1.5, rel=1e-6)
+    assert not controller.check_for_early_stop_condition(3)
+
+    # allow for round off in the error estimate of the level at the target complexity
+    controller.target_relative_error *= 1.0 + 1e-9
+    assert settle_level(controller, next_complexity) == pytest.approx(next_complexity)
+    assert controller.check_for_early_stop_condition(4)
+
+
+def test_multiplier_is_clamped(controller: ControllerRichardsonExtrapolation):
+    controller.target_relative_error = 1e-6
+    settle_level(controller, 1000.0)
+    assert settle_level(controller, 2000.0) == pytest.approx(2000.0 * controller.maximum_complexity_multiplier)
+
+
+def test_level_history_in_controller_state(controller: ControllerRichardsonExtrapolation, tmp_path):
+    controller._reset_monitored_state()
+    controller.level_history = [(1000.0, [1.1, 2.2])]
+    filename = str(tmp_path / 'controller_state.txt')
+    controller._save_controller_state(2000.0, filename)
+
+    restarted = ControllerRichardsonExtrapolation('test')
+    assert restarted._read_controller_restart_state(filename) == 2000.0
+    assert restarted.level_history == [(1000.0, [1.1, 2.2])]
+
+
+def test_richardson_forces_options():
+    controller = ControllerRichardsonForcesFUN3D('test', monitor_cd=False, monitor_cl=True)
+    assert controller.monitor_dict['Cl']
+    assert not controller.monitor_dict['Cd']
+    assert controller.level_history == []
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from pyrefine.file_watcher import InotifyFileWatcher, PollingFileWatcher, create_file_watcher
+
+
+def check_watcher_sees_new_and_appended_files(watcher, directory):
+    assert watcher.wait(timeout=0.05) == set()
+
+    new_file = os.path.join(directory, 'flow01.out')
+    with open(new_file, 'w') as fh:
+        fh.write('line 1\n')
+    assert new_file in watcher.wait(timeout=2.0)
+
+    with open(new_file, 'a') as fh:
+        fh.write('line 2\n')
+    assert new_file in watcher.wait(timeout=2.0)
+
+
+def test_polling_watcher(tmp_path):
+    with PollingFileWatcher([str(tmp_path)], poll_interval=0.01) as watcher:
+        check_watcher_sees_new_and_appended_files(watcher, str(tmp_path))
+
+
+def test_inotify_watcher(tmp_path):
+    try:
+        watcher = InotifyFileWatcher([str(tmp_path)])
+    except OSError:
+        pytest.skip('inotify is not available')
+    with watcher:
+        check_watcher_sees_new_and_appended_files(watcher, str(tmp_path))
+
+
+def test_watch_multiple_directories(tmp_path):
+    directories = [str(tmp_path / 'case1'), str(tmp_path / 'case2')]
+    for directory in directories:
+        os.mkdir(directory)
+    with create_file_watcher(directories, poll_interval=0.01) as watcher:
+        new_file = os.path.join(directories[1], 'refine02.out')
+        with open(new_file, 'w') as fh:
+            fh.write('refine\n')
+        assert new_file in watcher.wait(timeout=2.0)
+
+
+def test_polling_fallback(tmp_path):
+    watcher = create_file_watcher([str(tmp_path)], use_inotify=False)
+    assert isinstance(watcher, PollingFileWatcher)
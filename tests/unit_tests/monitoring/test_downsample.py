@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from pyrefine.monitoring.downsample import (downsample_indices, get_x_range_from_relayout, lttb_indices,
+                                            min_max_indices)
+
+
+@pytest.fixture
+def residual_history():
+    x = np.arange(1, 100001, dtype=float)
+    y = np.exp(-x / 20000.0) * (1.0 + 0.1 * np.sin(x / 50.0))
+    y[60000] = 10.0
+    return x, y
+
+
+def test_lttb_keeps_end_points_and_spikes(residual_history):
+    x, y = residual_history
+    indices = lttb_indices(x, y, 500)
+    assert len(indices) == 500
+    assert indices[0] == 0
+    assert indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert 60000 in indices
+
+
+def test_lttb_short_series_is_unchanged():
+    x = np.arange(10.0)
+    np.testing.assert_array_equal(lttb_indices(x, x ** 2, 20), np.arange(10))
+
+
+def test_min_max_keeps_extrema(residual_history):
+    _, y = residual_history
+    indices = min_max_indices(y, 200)
+    assert len(indices) <= 200
+    assert np.argmax(y) in indices
+    assert np.argmin(y) in indices
+
+
+def test_downsample_within_zoomed_range(residual_history):
+    x, y = residual_history
+    indices = downsample_indices(x, y, 2000, x_range=(1000.5, 2000.5))
+    assert len(indices) == 1002
+    assert x[indices[0]] < 1000.5
+    assert x[indices[-1]] > 2000.5
+
+
+def test_downsample_log_y_and_unknown_method(residual_history):
+    x, y = residual_history
+    y = y.copy()
+    y[10] = 0.0
+    indices = downsample_indices(x, y, 1000, log_y=True)
+    assert len(indices) == 1000
+    assert len(downsample_indices(x, y, 1000, method="minmax")) <= 1000
+    with pytest.raises(ValueError):
+        downsample_indices(x, y, 1000, method="every_other")
+
+
+def test_get_x_range_from_relayout():
+    assert get_x_range_from_relayout(None) == (False, None)
+    assert get_x_range_from_relayout({"legend.x": 1.0}) == (False, None)
+    assert get_x_range_from_relayout({"xaxis.autorange": True}) == (True, None)
+    assert get_x_range_from_relayout({"xaxis.range[0]": 10, "xaxis.range[1]": 20}) == (True, (10.0, 20.0))
+    assert get_x_range_from_relayout({"xaxis.range": [1, 2]}) == (True, (1.0, 2.0))
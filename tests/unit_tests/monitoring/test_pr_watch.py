@@ -0,0 +1,47 @@
+import os
+
+from pyrefine.monitoring.pr_watch import DirectoryWatch, FileTail
+
+
+def test_file_tail_reads_appended_lines(tmp_path):
+    filename = str(tmp_path / 'flow01.out')
+    with open(filename, 'w') as fh:
+        fh.write(''.join(f'line {i}\n' for i in range(1, 6)))
+    file_tail = FileTail(filename, num_lines=3)
+    assert file_tail.contents == 'line 3\nline 4\nline 5'
+    assert not file_tail.update()
+
+    with open(filename, 'a') as fh:
+        fh.write('line 6\nline')
+    assert file_tail.update()
+    assert file_tail.contents == 'line 5\nline 6\nline'
+
+    with open(filename, 'a') as fh:
+        fh.write(' 7\n')
+    assert file_tail.update()
+    assert file_tail.contents == 'line 5\nline 6\nline 7'
+
+
+def test_file_tail_rereads_truncated_file(tmp_path):
+    filename = str(tmp_path / 'flow01.out')
+    with open(filename, 'w') as fh:
+        fh.write('line 1\nline 2\nline 3\n')
+    file_tail = FileTail(filename, num_lines=3)
+
+    with open(filename, 'w') as fh:
+        fh.write('restart\n')
+    assert file_tail.update()
+    assert file_tail.contents == 'restart'
+
+
+def test_file_tail_of_missing_file(tmp_path):
+    file_tail = FileTail(str(tmp_path / 'flow01.out'))
+    assert not file_tail.update()
+    assert file_tail.contents == ''
+
+
+def test_out_files_match_directory_with_trailing_slash(tmp_path):
+    watch = DirectoryWatch(str(tmp_path) + os.sep, ['flow', 'refine'], 15)
+    assert watch.is_out_file(os.path.join(str(tmp_path), 'flow02.out'))
+    assert not watch.is_out_file(os.path.join(str(tmp_path), 'flow02.txt'))
+    assert not watch.is_out_file(os.path.join(str(tmp_path), 'other', 'flow02.out'))
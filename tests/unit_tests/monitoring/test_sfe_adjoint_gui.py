@@ -0,0 +1,23 @@
+import dash
+
+from pyrefine.monitoring.pr_gui_fun3d_sfe_steady_adjoint import GuiAdaptHistory
+
+
+def test_adjoint_data_is_loaded_once_per_update(monkeypatch):
+    gui = GuiAdaptHistory()
+    number_of_loads = []
+    load_sfe_adjoint_data = gui.load_sfe_adjoint_data
+
+    def count_loads(data_directory, project_rootname):
+        number_of_loads.append(1)
+        load_sfe_adjoint_data(data_directory, project_rootname)
+
+    monkeypatch.setattr(gui, "load_sfe_adjoint_data", count_loads)
+    gui.active_sfe_tab = "adjoint"
+    updates = gui.generate_sfe_tab_updates()
+    assert len(number_of_loads) == 1
+    assert updates[-1] is not dash.no_update
+    assert gui.rendered_sfe_tabs["adjoint"] is gui.sfe_goal_reader
+
+    gui.generate_sfe_tab_updates()
+    assert len(number_of_loads) == 2
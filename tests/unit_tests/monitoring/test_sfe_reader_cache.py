@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+import pyrefine.monitoring.sfe_reader_cache as sfe_reader_cache
+from pyrefine.monitoring.sfe_reader_cache import SFEReaderCache
+
+
+class CountingReader:
+    number_of_reads = 0
+
+    def __init__(self, data_directory, project_rootname, mesh_number=1):
+        CountingReader.number_of_reads += 1
+        self.imesh = mesh_number
+
+
+@pytest.fixture
+def log_directory(tmp_path, monkeypatch):
+    CountingReader.number_of_reads = 0
+    monkeypatch.setattr(sfe_reader_cache, "SFEForwardHistoryReader", CountingReader)
+    monkeypatch.setattr(sfe_reader_cache, "SFEGoalOrientedHistoryReader", CountingReader)
+    for imesh in range(1, 5):
+        (tmp_path / f"flow{imesh:02}.out").write_text("step 1\n")
+    return str(tmp_path)
+
+
+def test_reader_is_reused_until_log_changes(log_directory):
+    cache = SFEReaderCache(prefetch=False)
+    reader = cache.get_forward_reader(log_directory, "proj", 1)
+    assert cache.get_forward_reader(log_directory, "proj", 1) is reader
+    assert CountingReader.number_of_reads == 1
+
+    logfile = os.path.join(log_directory, "flow01.out")
+    with open(logfile, "a") as fh:
+        fh.write("step 2\n")
+    new_reader = cache.get_forward_reader(log_directory, "proj", 1)
+    assert new_reader is not reader
+    assert CountingReader.number_of_reads == 2
+    assert len(cache) == 1
+
+
+def test_least_recently_used_reader_is_evicted(log_directory):
+    cache = SFEReaderCache(max_size=2, prefetch=False)
+    cache.get_forward_reader(log_directory, "proj", 1)
+    cache.get_forward_reader(log_directory, "proj", 2)
+    cache.get_forward_reader(log_directory, "proj", 1)
+    cache.get_forward_reader(log_directory, "proj", 3)
+    assert len(cache) == 2
+    cache.get_forward_reader(log_directory, "proj", 1)
+    assert CountingReader.number_of_reads == 3
+    cache.get_forward_reader(log_directory, "proj", 2)
+    assert CountingReader.number_of_reads == 4
+
+
+def test_prefetch_neighbours(log_directory):
+    cache = SFEReaderCache()
+    cache.prefetch(log_directory, "proj", [2, 3, 7])
+    cache.close()
+    assert CountingReader.number_of_reads == 2
+    assert cache.get_forward_reader(log_directory, "proj", 3).imesh == 3
+    assert CountingReader.number_of_reads == 2
+
+
+def test_goal_oriented_reader_depends_on_adjoint_logs(log_directory):
+    cache = SFEReaderCache(prefetch=False)
+    reader = cache.get_goal_oriented_reader(log_directory, "proj")
+    assert cache.get_goal_oriented_reader(log_directory, "proj") is reader
+    with open(os.path.join(log_directory, "adjoint01.out"), "w") as fh:
+        fh.write("adjoint\n")
+    assert cache.get_goal_oriented_reader(log_directory, "proj") is not reader
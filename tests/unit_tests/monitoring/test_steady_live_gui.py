@@ -0,0 +1,97 @@
+import dash
+import numpy as np
+import pytest
+from dash.exceptions import PreventUpdate
+
+import pyrefine.monitoring.pr_gui_fun3d_steady_live as steady_live
+from pyrefine.monitoring.pr_gui_fun3d_steady_live import GuiAdaptHistoryLive
+
+
+class FakeReader:
+    def __init__(self, data_directory, project_rootname):
+        self.data_directory = data_directory
+        self.project_rootname = project_rootname
+        self.number_of_meshes = 0
+        self.number_of_nodes = np.zeros(0)
+        self.final_hist_values = {}
+        self.updated_meshes = []
+        if project_rootname != "":
+            self.add_mesh(1000, 0.5)
+            self.add_mesh(2000, 0.6)
+
+    def add_mesh(self, nodes, value):
+        self.number_of_meshes += 1
+        self.number_of_nodes = np.append(self.number_of_nodes, nodes)
+        self.final_hist_values["C_L"] = np.append(self.final_hist_values.get("C_L", np.zeros(0)), value)
+        self.updated_meshes.append(self.number_of_meshes)
+
+    def update_last_mesh(self, value):
+        self.final_hist_values["C_L"][-1] = value
+        self.updated_meshes.append(self.number_of_meshes)
+
+    def update(self):
+        updated_meshes, self.updated_meshes = self.updated_meshes, []
+        return updated_meshes
+
+
+@pytest.fixture
+def gui(monkeypatch):
+    monkeypatch.setattr(steady_live, "Fun3dAdaptationSteadyHistoryReader", FakeReader)
+    gui = GuiAdaptHistoryLive()
+    gui.generate_live_update(gui.load_data("Flow", "proj"), "C_L", False, False)
+    gui.reader.update()
+    return gui
+
+
+def test_new_meshes_are_sent_as_extend_data(gui):
+    gui.reader.add_mesh(3000, 0.7)
+    figure, (extend_data, trace_indices) = gui.generate_live_update(gui.load_data("Flow", "proj"), "C_L", False, False)
+    assert figure is dash.no_update
+    assert extend_data == dict(x=[[3000]], y=[[0.7]], customdata=[[[3]]])
+    assert trace_indices == [0]
+
+    with pytest.raises(PreventUpdate):
+        gui.generate_live_update(gui.load_data("Flow", "proj"), "C_L", False, False)
+
+
+def test_changed_last_mesh_is_sent_as_patch(gui):
+    gui.reader.update_last_mesh(0.65)
+    figure, extend_data = gui.generate_live_update(gui.load_data("Flow", "proj"), "C_L", False, False)
+    assert extend_data is dash.no_update
+    assert isinstance(figure, dash.Patch)
+    operations = figure.to_plotly_json()["operations"]
+    assert [(op["operation"], op["location"], op["params"]["value"]) for op in operations] == [
+        ("Assign", ["data", 0, "x", 1], 2000),
+        ("Assign", ["data", 0, "y", 1], 0.65),
+        ("Assign", ["data", 0, "customdata", 1], [2]),
+    ]
+
+
+def test_changed_last_mesh_and_new_meshes_are_sent_as_one_patch(gui):
+    gui.reader.update_last_mesh(0.65)
+    gui.reader.add_mesh(3000, 0.7)
+    figure, extend_data = gui.generate_live_update(gui.load_data("Flow", "proj"), "C_L", False, False)
+    assert extend_data is dash.no_update
+    operations = figure.to_plotly_json()["operations"]
+    extends = [(op["location"], op["params"]["value"]) for op in operations if op["operation"] == "Extend"]
+    assert extends == [(["data", 0, "x"], [3000]), (["data", 0, "y"], [0.7]), (["data", 0, "customdata"], [[3]])]
+    assert gui.plotted_number_of_meshes == 3
+
+
+def test_full_figure_is_sent_when_an_earlier_mesh_changes(gui):
+    figure, extend_data = gui.generate_live_update([1], "C_L", False, False)
+    assert extend_data is dash.no_update
+    assert list(figure.data[0].x) == [1000, 2000]
+
+
+def test_full_figure_is_sent_when_settings_change(gui):
+    figure, extend_data = gui.generate_live_update([], "C_L", True, False)
+    assert extend_data is dash.no_update
+    assert figure.layout.xaxis.type == "log"
+
+
+def test_full_figure_is_sent_after_case_changes(gui):
+    figure, extend_data = gui.generate_live_update(gui.load_data("Flow", "other"), "C_L", False, False)
+    assert extend_data is dash.no_update
+    assert list(figure.data[0].x) == [1000, 2000]
+    assert gui.plotted_number_of_meshes == 2
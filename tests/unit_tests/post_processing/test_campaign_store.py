@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from pyrefine.post_processing.campaign_store import CampaignStore, SOURCE_FLUTTER
+
+test_directory = os.path.dirname(os.path.abspath(__file__))
+data_directory = f'{test_directory}/post_processing_test_files'
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CampaignStore(str(tmp_path / 'campaign.db'))
+    yield store
+    store.close()
+
+
+def test_query_steady_histories_by_metadata(store, tmp_path):
+    assert store.ingest_steady_history('m080', data_directory, 'test_m', metadata={'mach': 0.8})
+    shutil.copytree(data_directory, tmp_path / 'm085')
+    assert store.ingest_steady_history('m085', str(tmp_path / 'm085'), 'test_m', metadata={'mach': 0.85})
+
+    assert store.cases() == ['m080', 'm085']
+    assert store.cases(where={'mach': 0.8}) == ['m080']
+    assert store.variables('m080') == ['Number of Nodes', 'Iteration', 'C_L', 'C_D']
+
+    data = store.query('C_D', where={'mach': 0.8})
+    assert list(data.keys()) == ['m080']
+    nodes, drag = data['m080']
+    assert nodes == pytest.approx([1044556, 1000442, 1047133])
+    assert drag[2] == pytest.approx(1.53)
+
+
+def test_incremental_ingestion(store, tmp_path):
+    case_directory = tmp_path / 'case'
+    shutil.copytree(data_directory, case_directory)
+    assert store.ingest_steady_history('case', str(case_directory), 'test_m')
+    assert not store.ingest_steady_history('case', str(case_directory), 'test_m')
+
+    hist_file = case_directory / 'test_m03_hist.dat'
+    hist_file.write_text(hist_file.read_text() + '  3000  0.4  1.6\n')
+    assert store.ingest_steady_history('case', str(case_directory), 'test_m')
+    assert store.get('case', 'C_L')[2] == pytest.approx(0.4)
+
+
+def test_store_persists_and_reopens(tmp_path):
+    filename = str(tmp_path / 'campaign.db')
+    with CampaignStore(filename) as store:
+        store.ingest_steady_history('m080', data_directory, 'test_m', metadata={'mach': 0.8})
+    with CampaignStore(filename) as store:
+        assert store.get_metadata('m080') == {'mach': 0.8}
+        assert store.get('m080', 'Iteration')[0] == pytest.approx(5000)
+        with pytest.raises(KeyError):
+            store.get('m080', 'C_M')
+
+
+def test_ingest_flutter_history(store, tmp_path):
+    history_file = tmp_path / 'history.dat'
+    history_file.write_text('istep nnodes AoA rho_flutter vel_flutter omega_flutter R_flutter\n'
+                            '1 1000 2.0 0.5 100.0 20.0 [(1+0j), (0.5-0.25j)]\n'
+                            '2 2000 2.0 0.6 110.0 21.0 [(1+0j), (0.4-0.2j)]\n')
+    assert store.ingest_flutter_history('papa', str(history_file))
+    assert store.get('papa', 'nnodes', source=SOURCE_FLUTTER) == pytest.approx([1000, 2000])
+    r_flutter = store.get('papa', 'R_flutter', source=SOURCE_FLUTTER)
+    assert r_flutter.shape == (2, 2)
+    assert r_flutter[1, 1] == pytest.approx(0.4 - 0.2j)
+    assert np.iscomplexobj(r_flutter)
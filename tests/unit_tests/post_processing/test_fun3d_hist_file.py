@@ -0,0 +1,143 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from pyrefine.post_processing.fun3d_file_reader import Fun3dAdaptationSteadyHistoryReader as F3DReader
+from pyrefine.post_processing.fun3d_hist_file import Fun3dHistFile, LoadFullHistoryCommand, read_final_hist_values
+
+test_directory = os.path.dirname(os.path.abspath(__file__))
+header = 'TITLE="fun3d_case_title"\nVARIABLES="Iteration" "R_1" "C_L"\nZONE  I=2000 F=POINT\n'
+
+
+def write_rows(filename: Path, first_iteration, last_iteration, mode='a'):
+    with open(filename, mode) as fh:
+        for i in range(first_iteration, last_iteration + 1):
+            fh.write(f'{i:8d}  {1.0 / i:.10E}  {0.3 + 1e-3 * i:.10E}\n')
+
+
+def test_read_full_history(tmp_path):
+    hist_file = tmp_path / 'test_hist.dat'
+    hist_file.write_text(header)
+    write_rows(hist_file, 1, 500)
+    hist = Fun3dHistFile(str(hist_file), use_cache=False, chunk_size=1000)
+    assert hist.variables == ['Iteration', 'R_1', 'C_L']
+    assert hist.number_of_rows == 500
+    assert hist['Iteration'] == pytest.approx(np.arange(1, 501))
+    assert hist['C_L'][-1] == pytest.approx(0.8)
+
+
+def test_update_reads_appended_lines_only(tmp_path):
+    hist_file = tmp_path / 'test_hist.dat'
+    hist_file.write_text(header)
+    write_rows(hist_file, 1, 10)
+    with open(hist_file, 'a') as fh:
+        fh.write('      11  1.0E-01')
+    hist = Fun3dHistFile(str(hist_file), use_cache=False)
+    assert hist.number_of_rows == 10
+
+    with open(hist_file, 'a') as fh:
+        fh.write('  3.11E-01\n')
+    write_rows(hist_file, 12, 20)
+    assert hist.update() == 10
+    assert hist['Iteration'] == pytest.approx(np.arange(1, 21))
+    assert hist.update() == 0
+
+
+def test_zone_lines_from_restarts_are_skipped(tmp_path):
+    hist_file = tmp_path / 'test_hist.dat'
+    hist_file.write_text(header)
+    write_rows(hist_file, 1, 5)
+    with open(hist_file, 'a') as fh:
+        fh.write('ZONE  I=2000 F=POINT\n')
+    write_rows(hist_file, 6, 8)
+    hist = Fun3dHistFile(str(hist_file), use_cache=False)
+    assert hist['Iteration'] == pytest.approx(np.arange(1, 9))
+
+
+def test_only_header_lines_are_skipped(tmp_path):
+    hist_file = tmp_path / 'test_hist.dat'
+    hist_file.write_text(header)
+    write_rows(hist_file, 1, 2)
+    with open(hist_file, 'a') as fh:
+        fh.write('variables="Iteration" "R_1"\n "C_L"\n       3  NaN  0.3\n')
+    hist = Fun3dHistFile(str(hist_file), use_cache=False)
+    assert hist['Iteration'] == pytest.approx(np.arange(1, 4))
+    assert np.isnan(hist['R_1'][-1])
+
+    with open(hist_file, 'a') as fh:
+        fh.write('       4  garbage  0.3\n')
+    with pytest.raises(ValueError):
+        hist.update()
+
+
+def test_sidecar_cache(tmp_path):
+    hist_file = tmp_path / 'test_hist.dat'
+    hist_file.write_text(header)
+    write_rows(hist_file, 1, 50)
+    hist = Fun3dHistFile(str(hist_file))
+    assert os.path.isfile(hist.cache_filename)
+
+    write_rows(hist_file, 51, 60)
+    cached_hist = Fun3dHistFile(str(hist_file))
+    assert cached_hist['Iteration'] == pytest.approx(np.arange(1, 61))
+
+    write_rows(hist_file, 61, 70)
+    assert cached_hist.update() == 10
+    with np.load(hist.cache_filename) as cache:
+        assert cache['data'].shape[0] == 60
+
+    write_rows(hist_file, 71, 80)
+    assert [rows.shape[0] for rows in cached_hist.follow(poll_interval=0.01, timeout=0.05)] == [10]
+    with np.load(hist.cache_filename) as cache:
+        assert cache['data'].shape[0] == 80
+        assert int(cache['source_size']) == os.path.getsize(hist_file)
+
+    write_rows(hist_file, 81, 90)
+    follower = cached_hist.follow(poll_interval=0.01)
+    next(follower)
+    follower.close()
+    with np.load(hist.cache_filename) as cache:
+        assert cache['data'].shape[0] == 90
+
+    hist_file.write_text(header)
+    write_rows(hist_file, 1, 3)
+    replaced_hist = Fun3dHistFile(str(hist_file))
+    assert replaced_hist.number_of_rows == 3
+
+
+def test_follow_missing_file(tmp_path):
+    hist_file = tmp_path / 'test_hist.dat'
+    with pytest.raises(FileNotFoundError):
+        Fun3dHistFile(str(hist_file))
+
+    hist = Fun3dHistFile(str(hist_file), use_cache=False, must_exist=False)
+    assert hist.number_of_rows == 0
+    hist_file.write_text(header)
+    write_rows(hist_file, 1, 4)
+    new_rows = next(hist.follow(poll_interval=0.01, timeout=0.1))
+    assert new_rows.shape == (4, 3)
+    assert list(hist.follow(poll_interval=0.01, timeout=0.05)) == []
+
+
+def test_load_full_history_command():
+    reader = F3DReader(f'{test_directory}/post_processing_test_files', 'test_m')
+    reader.register_command(LoadFullHistoryCommand(reader, use_cache=False))
+    reader.execute_commands()
+    assert len(reader.full_histories) == 3
+    assert reader.full_histories[2]['Iteration'] == pytest.approx([1, 2000])
+    assert reader.full_histories[3]['C_L'][-1] == pytest.approx(reader.final_hist_values['C_L'][2])
+
+
+def test_read_final_hist_values(tmp_path):
+    hist_file = tmp_path / 'test_hist.dat'
+    hist_file.write_text(header)
+    assert read_final_hist_values(str(hist_file)) == {}
+    write_rows(hist_file, 1, 100)
+    with open(hist_file, 'a') as fh:
+        fh.write('     101  1.0E-01')
+    values = read_final_hist_values(str(hist_file))
+    assert values['Iteration'] == 100
+    assert values['R_1'] == pytest.approx(0.01)
+    assert values['C_L'] == pytest.approx(0.4)
@@ -86,3 +86,51 @@ def test_raise_error_on_invalid_command():
     reader = F3DReader('', '')
     with pytest.raises(ValueError):
         reader.register_command(BadCommand())
+
+
+def copy_test_files_for_meshes(directory: Path, mesh_numbers):
+    source = Path(f'{test_directory}/post_processing_test_files')
+    for imesh in mesh_numbers:
+        for suffix in ['_flow_out', '_hist.dat']:
+            (directory / f'test_m{imesh:02}{suffix}').write_text(
+                (source / f'test_m{imesh:02}{suffix}').read_text())
+
+
+def test_update_only_reads_new_and_changed_meshes(tmp_path):
+    copy_test_files_for_meshes(tmp_path, [1, 2])
+    reader = F3DReader(str(tmp_path), 'test_m')
+    assert reader.number_of_meshes == 2
+    assert reader.update() == []
+
+    copy_test_files_for_meshes(tmp_path, [3])
+    assert reader.update() == [3]
+    assert reader.number_of_meshes == 3
+    assert reader.final_hist_values['C_L'][2] == pytest.approx(0.33)
+
+    hist_file = tmp_path / 'test_m02_hist.dat'
+    hist_file.write_text(hist_file.read_text() + '  100  0.5  0.25\n')
+    assert reader.update() == [2]
+    assert reader.final_hist_values['C_L'][1] == pytest.approx(0.5)
+    assert reader.final_hist_values['C_D'][1] == pytest.approx(0.25)
+
+
+def test_arrays_grow_in_place(tmp_path):
+    copy_test_files_for_meshes(tmp_path, [1])
+    reader = F3DReader(str(tmp_path), 'test_m')
+    node_buffer = reader.number_of_nodes.base
+    copy_test_files_for_meshes(tmp_path, [2, 3])
+    reader.update()
+    assert reader.number_of_nodes.base is node_buffer
+    assert reader.number_of_nodes.size == 3
+
+
+def test_sidecar_cache_is_reused(tmp_path):
+    copy_test_files_for_meshes(tmp_path, [1, 2, 3])
+    cache_file = str(tmp_path / 'adapt_hist_cache.json')
+    reader = F3DReader(str(tmp_path), 'test_m', cache_file=cache_file)
+    assert os.path.isfile(cache_file)
+
+    cached_reader = F3DReader(str(tmp_path), 'test_m', cache_file=cache_file)
+    assert cached_reader.update() == []
+    assert cached_reader.number_of_nodes == pytest.approx(reader.number_of_nodes)
+    assert cached_reader.final_hist_values['C_D'] == pytest.approx(reader.final_hist_values['C_D'])
@@ -0,0 +1,52 @@
+import os
+import shutil
+
+import pytest
+
+from pyrefine.post_processing.report import CaseReport
+
+test_directory = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def case_dir(tmp_path):
+    flow_dir = tmp_path / 'case1' / 'Flow'
+    flow_dir.mkdir(parents=True)
+    for imesh in range(1, 4):
+        for suffix in ['_hist.dat', '_flow_out']:
+            shutil.copy(f'{test_directory}/post_processing_test_files/test_m{imesh:02}{suffix}', flow_dir)
+    return str(tmp_path / 'case1')
+
+
+def test_report_signature_tracks_inputs(case_dir):
+    report = CaseReport(case_dir, 'test_m')
+    signature = report.create_signature()
+    assert [entry[0] for entry in signature['files']][:2] == ['Flow/test_m01_flow_out', 'Flow/test_m01_hist.dat']
+    assert len(signature['files']) == 6
+    assert not report.is_up_to_date()
+
+
+def test_missing_hist_files_raise(tmp_path):
+    report = CaseReport(str(tmp_path), 'test_m')
+    with pytest.raises(FileNotFoundError):
+        report.generate()
+
+
+def test_generate_report_and_skip_unchanged(case_dir):
+    pytest.importorskip('plotly')
+    report = CaseReport(case_dir, 'test_m')
+    filenames = report.generate()
+    assert filenames == [report.html_filename]
+    with open(report.html_filename) as fh:
+        contents = fh.read()
+    assert 'Adaptation History' in contents
+    assert report.is_up_to_date()
+
+    hist_file = f'{case_dir}/Flow/test_m03_hist.dat'
+    mtime = os.stat(hist_file).st_mtime_ns
+    os.utime(hist_file, ns=(mtime + 10**9, mtime + 10**9))
+    assert not report.is_up_to_date()
+
+    report.generate()
+    report.include_sfe = True
+    assert not report.is_up_to_date()
@@ -0,0 +1,53 @@
+import struct
+
+import numpy as np
+import pytest
+
+from pyrefine.post_processing.solb_file import SolbFile, write_solb
+
+
+def test_write_and_read_solb(tmp_path):
+    filename = str(tmp_path / 'test.solb')
+    values = np.random.default_rng(0).random((20, 6))
+    write_solb(filename, values, field_types=[1, 2, 1, 1])
+
+    solb = SolbFile(filename)
+    assert solb.version == 2
+    assert solb.dimension == 3
+    assert solb.number_of_vertices == 20
+    assert solb.field_types == [1, 2, 1, 1]
+    assert isinstance(solb.values, np.memmap)
+    assert np.array_equal(solb.values, values)
+    assert np.array_equal(SolbFile(filename, use_mmap=False).values, values)
+
+
+def test_read_version_3_solb_with_64_bit_positions(tmp_path):
+    filename = str(tmp_path / 'test.solb')
+    values = np.arange(4.0)
+    with open(filename, 'wb') as fh:
+        fh.write(struct.pack('<ii', 1, 3))
+        fh.write(struct.pack('<iqi', 3, 24, 2))
+        fh.write(struct.pack('<iqiii', 62, 24 + 24 + values.nbytes, 4, 1, 1))
+        fh.write(values.tobytes())
+        fh.write(struct.pack('<iq', 54, 0))
+
+    solb = SolbFile(filename)
+    assert solb.dimension == 2
+    assert np.array_equal(solb.values[:, 0], values)
+
+
+def test_incomplete_solb_raises_value_error(tmp_path):
+    filename = str(tmp_path / 'test.solb')
+    write_solb(filename, np.ones(10))
+    with open(filename, 'rb') as fh:
+        data = fh.read()
+    for length in [4, 30, len(data) - 20, len(data) - 4]:
+        with open(filename, 'wb') as fh:
+            fh.write(data[:length])
+        with pytest.raises(ValueError):
+            SolbFile(filename)
+
+
+def test_write_solb_with_mismatched_field_types(tmp_path):
+    with pytest.raises(ValueError):
+        write_solb(str(tmp_path / 'test.solb'), np.ones((10, 2)), field_types=[2])
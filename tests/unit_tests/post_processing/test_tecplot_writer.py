@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from pyrefine.post_processing.tecplot_writer import (TecplotZone, write_binary_tecplot_file,
+                                                     write_data_to_tecplot_format)
+
+
+class BinaryTecplotParser:
+    """ Minimal parser for the subset of the binary format that the writer produces """
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as fh:
+            self.buffer = fh.read()
+        self.position = 0
+
+    def read(self, dtype, count=1):
+        values = np.frombuffer(self.buffer, dtype=dtype, count=count, offset=self.position)
+        self.position += values.nbytes
+        return values
+
+    def read_int(self):
+        return int(self.read('<i4')[0])
+
+    def read_string(self):
+        chars = []
+        while True:
+            char = self.read_int()
+            if char == 0:
+                return ''.join(chars)
+            chars.append(chr(char))
+
+    def parse(self):
+        assert self.buffer[:8] == b'#!TDV112'
+        self.position = 8
+        assert self.read_int() == 1
+        assert self.read_int() == 0
+        title = self.read_string()
+        variables = [self.read_string() for _ in range(self.read_int())]
+        zones = []
+        while self.read('<f4')[0] == 299.0:
+            zone = {'name': self.read_string(), 'parent': self.read_int(), 'strand_id': self.read_int(),
+                    'solution_time': self.read('<f8')[0]}
+            assert self.read_int() == -1
+            zone['zone_type'] = self.read_int()
+            assert list(self.read('<i4', 3)) == [0, 0, 0]
+            if zone['zone_type'] == 0:
+                zone['dimensions'] = list(self.read('<i4', 3))
+                zone['number_of_points'] = zone['dimensions'][0]
+            else:
+                zone['number_of_points'] = self.read_int()
+                zone['number_of_elements'] = self.read_int()
+                assert list(self.read('<i4', 3)) == [0, 0, 0]
+            assert self.read_int() == 0
+            zones.append(zone)
+
+        for zone in zones:
+            assert self.read('<f4')[0] == 299.0
+            formats = self.read('<i4', len(variables))
+            dtype = '<f4' if formats[0] == 1 else '<f8'
+            assert list(self.read('<i4', 3)) == [0, 0, -1]
+            zone['min_max'] = self.read('<f8', 2 * len(variables)).reshape(-1, 2)
+            npts = zone['number_of_points']
+            zone['data'] = self.read(dtype, npts * len(variables)).reshape(len(variables), npts).T
+            if zone['zone_type'] == 3:
+                zone['connectivity'] = self.read('<i4', 4 * zone['number_of_elements']).reshape(-1, 4)
+        assert self.position == len(self.buffer)
+        return title, variables, zones
+
+
+def test_write_ordered_zone_through_line_data_writer(tmp_path):
+    filename = str(tmp_path / 'hist.plt')
+    data = np.column_stack((np.arange(1, 11), np.linspace(0.1, 1.0, 10)))
+    write_data_to_tecplot_format(filename, 'test_title', data, ['Steps', 'C_L'], 'zone1', file_format='binary')
+
+    title, variables, zones = BinaryTecplotParser(filename).parse()
+    assert title == 'test_title'
+    assert variables == ['Steps', 'C_L']
+    assert len(zones) == 1
+    assert zones[0]['name'] == 'zone1'
+    assert zones[0]['dimensions'] == [10, 1, 1]
+    assert zones[0]['data'] == pytest.approx(data)
+    assert zones[0]['min_max'][1] == pytest.approx([0.1, 1.0])
+
+
+def test_write_multiple_fe_quad_zones_in_single_precision(tmp_path):
+    filename = str(tmp_path / 'surface.plt')
+    nodes = np.array([[0., 0., 1.], [1., 0., 2.], [1., 1., 3.], [0., 1., 4.], [2., 0., 5.], [2., 1., 6.]])
+    quads = np.array([[0, 1, 2, 3], [1, 4, 5, 2]])
+    zones = [TecplotZone('surface', nodes, zone_type='fequadrilateral', connectivity=quads,
+                         solution_time=1.0, strand_id=0),
+             TecplotZone('line', nodes[:3])]
+    write_binary_tecplot_file(filename, 'surface', ['x', 'y', 'Cp'], zones, precision='single')
+
+    _, _, parsed_zones = BinaryTecplotParser(filename).parse()
+    assert len(parsed_zones) == 2
+    assert parsed_zones[0]['zone_type'] == 3
+    assert parsed_zones[0]['solution_time'] == pytest.approx(1.0)
+    assert parsed_zones[0]['strand_id'] == 0
+    assert parsed_zones[0]['data'] == pytest.approx(nodes)
+    assert np.all(parsed_zones[0]['connectivity'] == quads)
+    assert parsed_zones[1]['zone_type'] == 0
+    assert parsed_zones[1]['data'] == pytest.approx(nodes[:3])
+
+
+def test_invalid_binary_inputs(tmp_path):
+    with pytest.raises(ValueError):
+        TecplotZone('surface', np.zeros((4, 3)), zone_type='fequadrilateral')
+    with pytest.raises(ValueError):
+        write_binary_tecplot_file(str(tmp_path / 'bad.plt'), 'bad', ['x', 'y'], [TecplotZone('z', np.zeros((4, 3)))])
+    with pytest.raises(ValueError):
+        write_data_to_tecplot_format(str(tmp_path / 'bad.plt'), 'bad', np.zeros((4, 1)), ['x'], 'z', file_format='szl')
@@ -6,6 +6,7 @@ from pbs4py import PBS
 from pyrefine.refine.multiscale import (RefineMultiscale,
                                         RefineMultiscaleFixedPoint)
 from pyrefine.shell_utils import rm
+from pyrefine.simulation.distance_refine import DistanceRefine
 
 project = 'sphere'
 
@@ -70,6 +71,36 @@ def test_fixed_point_hrles_options(refine_fixedpoint: RefineMultiscaleFixedPoint
     assert expected == refine_fixedpoint._create_multiscale_command_line_options()
 
 
+def test_fixed_point_reduced_snapshot_command(refine_fixedpoint: RefineMultiscaleFixedPoint):
+    refine_fixedpoint.reduced_statistic = 'rms'
+    refine_fixedpoint.set_hlres(0.5, 1000000.0)
+    expected = ('refmpi loop sphere03 sphere04 1000.0 --norm-power 4 --interpolant sphere03_snapshot_rms.solb'
+                ' --hrles 0.5 1000000.0 --fun3d-mapbc sphere01.mapbc --gradation -1')
+    assert expected == refine_fixedpoint._create_multiscale_refine_command(3, 1000.0)
+
+    with pytest.raises(FileNotFoundError):
+        refine_fixedpoint.run(3, 1000.0)
+    refine_fixedpoint.reduced_statistic = 'median'
+    with pytest.raises(ValueError):
+        refine_fixedpoint.run(3, 1000.0)
+
+
+def test_fixed_point_window_ends_where_snapshot_reducer_stopped(refine_fixedpoint: RefineMultiscaleFixedPoint,
+                                                                tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    refine_fixedpoint.set_timestep_range_and_frequency(40, 440, 3)
+    refine_fixedpoint.sampling_data_filename_body = 'sample0_timestep'
+    with open('sphere03_snapshot_summary.json', 'w') as fh:
+        fh.write('{"stopped_at_timestep": 255}')
+    expected = ('refmpi loop sphere03 sphere04 1000.0 --norm-power 4 --interpolant mach'
+                ' --fixed-point sample0_timestep 40 3 253')
+    assert refine_fixedpoint._create_multiscale_refine_command(3, 1000.0).startswith(expected)
+
+    with open('sphere03_snapshot_summary.json', 'w') as fh:
+        fh.write('{"stopped_at_timestep": null}')
+    assert ' 40 3 440' in refine_fixedpoint._create_multiscale_refine_command(3, 1000.0)
+
+
 class PbsSpy(PBS):
     def __init__(self, profile_filename=''):
         self.expected_commands = []
@@ -117,6 +148,36 @@ def test_multiscale_run(refine: RefineMultiscale):
         refine.run(istep, complexity)
 
 
+def test_multiscale_run_with_distance(refine: RefineMultiscale, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    istep = 5
+    complexity = 350.0
+    refine.distance = DistanceRefine('other')
+
+    pbs = PbsSpy()
+    pbs.mpiexec = 'mpirun'
+    pbs.expected_jobname = 'refine05'
+    pbs.expected_commands.append('printf "Refine5 Start Time: " && date')
+    pbs.expected_commands.append(
+        'mpirun refmpi loop sphere05 sphere06 350.0 --norm-power 4 --interpolant mach --gradation -1 &> refine05.out')
+    pbs.expected_commands.append(
+        'mpirun refmpi distance sphere06.lb8.ugrid sphere06-distance.solb --fun3d sphere06.mapbc &> distance06.out')
+    pbs.expected_commands.append('printf "Refine5 End Time: " && date')
+    refine.pbs = pbs
+
+    Path('sphere05.mapbc').touch()
+    for file in ['sphere06.meshb', 'sphere06.lb8.ugrid', 'sphere06-restart.solb', 'sphere06-distance.solb']:
+        Path(file).touch()
+    # a cached field of the mesh left by an earlier attempt must not be linked into place
+    refine.distance.cache_directory = str(tmp_path / 'cache')
+    refine.distance.project_name = 'sphere'
+    refine.distance.cache_distance_file(6)
+
+    refine.run(istep, complexity)
+    assert Path('sphere06.mapbc').is_file()
+    assert not Path('sphere06-distance.solb').exists()
+
+
 def test_multiscale_fixed_point_run(refine_fixedpoint: RefineMultiscaleFixedPoint):
     istep = 5
     complexity = 350.0
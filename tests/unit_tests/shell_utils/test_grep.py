@@ -0,0 +1,69 @@
+import re
+
+import pytest
+
+from pyrefine.shell_utils import grep, grep_last, grep_multiple, tail
+
+
+def line_by_line_grep(pattern, filename, match_only=False):
+    regex = re.compile(pattern)
+    found_lines = []
+    with open(filename, 'r') as fh:
+        for line in fh:
+            match = regex.search(line)
+            if match:
+                found_lines.append(match.group(0) if match_only else line)
+    return found_lines
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    filename = tmp_path / 'test.log'
+    with open(filename, 'w') as fh:
+        for i in range(5000):
+            fh.write(f'iter {i} residual {1.0 / (i + 1):.6e}\n')
+            if i % 100 == 0:
+                fh.write(f'  Cd = {1e-3 * i:.6E}   Cl = {1e-2 * i:.6E}\n')
+        fh.write('\n')
+        fh.write('final line without newline')
+    return str(filename)
+
+
+@pytest.mark.parametrize('pattern', ['Cd', '^iter 4', 'residual [0-9.]+e-0[3-4]', 'line$', '^$', r'=\s*'])
+def test_grep_matches_line_by_line_search(log_file, pattern):
+    assert grep(pattern, log_file) == line_by_line_grep(pattern, log_file)
+    assert grep(pattern, log_file, match_only=True) == line_by_line_grep(pattern, log_file, match_only=True)
+
+
+def test_grep_tail_and_head(log_file):
+    expected = line_by_line_grep('Cd', log_file)
+    assert grep('Cd', log_file, tail=3) == expected[-3:]
+    assert grep('Cd', log_file, head=2) == expected[:2]
+    assert grep(re.compile('cd', re.IGNORECASE), log_file, tail=1) == expected[-1:]
+    assert grep_last('Cl = [0-9.E+]+', log_file, match_only=True) == ['Cl = 4.900000E+01']
+    assert grep_last('not in the file', log_file) == []
+
+
+def test_grep_multiple(log_file):
+    found_lines = grep_multiple(['Cd', 'Cl', 'iter 49'], log_file)
+    assert found_lines['Cd'] == line_by_line_grep('Cd', log_file)
+    assert found_lines['Cl'] == line_by_line_grep('Cl', log_file)
+    assert found_lines['iter 49'] == line_by_line_grep('iter 49', log_file)
+
+    found_lines = grep_multiple(['Cd = [0-9.E+]+', 'Cl = [0-9.E+]+'], log_file, tail=1, match_only=True)
+    assert found_lines == {'Cd = [0-9.E+]+': ['Cd = 4.900000E+00'], 'Cl = [0-9.E+]+': ['Cl = 4.900000E+01']}
+
+
+def test_grep_empty_file(tmp_path):
+    filename = tmp_path / 'empty.txt'
+    filename.write_text('')
+    assert grep('a', str(filename)) == []
+    assert grep('a', str(filename), tail=1) == []
+    assert tail(str(filename)) == []
+
+
+def test_tail_with_small_blocks(log_file):
+    with open(log_file, 'r') as fh:
+        lines = fh.readlines()
+    assert tail(log_file, 7, block_size=16) == lines[-7:]
+    assert tail(log_file, len(lines) + 5, block_size=1000) == lines
@@ -40,3 +40,65 @@ def test_distance_refine_command():
     istep = 3
     dist = DistanceRefine('test', FakePBS())
     assert refine_expected_dist_command == dist.create_distance_command(istep)
+
+
+def write_distance_cache_inputs(istep, mesh_contents='mesh'):
+    project = f'test{istep:02d}'
+    with open(f'{project}.lb8.ugrid', 'w') as fh:
+        fh.write(mesh_contents)
+    with open(f'{distance_test_dir}/test04.mapbc', 'r') as fh:
+        mapbc = fh.read()
+    with open(f'{project}.mapbc', 'w') as fh:
+        fh.write(mapbc)
+
+
+def test_distance_cache_key(tmp_path):
+    dist = DistanceRefine('test', FakePBS())
+    with cd(tmp_path):
+        assert dist.get_cache_key(1) is None
+
+        write_distance_cache_inputs(1)
+        write_distance_cache_inputs(2)
+        write_distance_cache_inputs(3, 'other mesh')
+        assert dist.get_cache_key(1) == dist.get_cache_key(2)
+        assert dist.get_cache_key(1) != dist.get_cache_key(3)
+        assert dist.get_cache_key(1) != DistanceTinf('test', FakePBS()).get_cache_key(1)
+
+        with open('test02.mapbc', 'w') as fh:
+            fh.write('1\n1 4000 wall\n')
+        assert dist.get_cache_key(1) != dist.get_cache_key(2)
+
+
+def test_distance_cache_hit(tmp_path):
+    dist = DistanceRefine('test', FakePBS())
+    dist.cache_directory = str(tmp_path / 'cache')
+    os.mkdir(tmp_path / 'run')
+    with cd(tmp_path / 'run'):
+        write_distance_cache_inputs(1)
+        write_distance_cache_inputs(2)
+        assert dist.create_distance_command(1) != ''
+
+        with open('test01-distance.solb', 'w') as fh:
+            fh.write('distance')
+        dist.cache_distance_file(1)
+        assert len(os.listdir(dist.cache_directory)) == 1
+
+        assert dist.create_distance_command(2) == ''
+        assert os.path.islink('test02-distance.solb')
+        with open('test02-distance.solb', 'r') as fh:
+            assert fh.read() == 'distance'
+
+        # the linked file is not stored again
+        dist.cache_distance_file(2)
+        assert len(os.listdir(dist.cache_directory)) == 1
+
+
+def test_distance_cache_disabled(tmp_path):
+    dist = DistanceRefine('test', FakePBS())
+    with cd(tmp_path):
+        write_distance_cache_inputs(1)
+        with open('test01-distance.solb', 'w') as fh:
+            fh.write('distance')
+        dist.cache_distance_file(1)
+        assert not dist.link_cached_distance_file(1)
+        assert dist.create_distance_command(1) != ''
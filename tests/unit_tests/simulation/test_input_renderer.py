@@ -0,0 +1,99 @@
+import os
+import shutil
+
+import f90nml
+import pytest
+
+from pyrefine.simulation.input_renderer import InputRenderer
+from pyrefine.simulation.sfe_cfg import SFEconfig
+
+test_dir = f"{os.path.dirname(os.path.abspath(__file__))}/test_fun3d_files"
+
+
+@pytest.fixture
+def run_directory(tmp_path, monkeypatch):
+    shutil.copy(f"{test_dir}/fun3d.nml", tmp_path)
+    with open(tmp_path / "sfe.cfg", "w") as fh:
+        fh.write("! comment\nnonlinear_iterations = 10\ncfl_max = 1.0e3\n")
+    os.mkdir(tmp_path / "Flow")
+    monkeypatch.chdir(tmp_path / "Flow")
+
+
+def test_read_namelist_does_not_mutate_template(run_directory):
+    renderer = InputRenderer()
+    nml = renderer.read_namelist("../fun3d.nml")
+    nml["project"]["project_rootname"] = "changed"
+    assert renderer.read_namelist("../fun3d.nml")["project"]["project_rootname"] != "changed"
+
+
+def test_namelist_overlay(run_directory):
+    renderer = InputRenderer()
+    renderer.set_overlay("../fun3d.nml", {"reference_physical_properties": {"angle_of_attack": 4.0}}, 1)
+    renderer.set_overlay("../fun3d.nml", {"new_group": {"value": 2}}, 1)
+
+    # overlays are stored in the run directory, so other renderers see them
+    nml = InputRenderer().read_namelist("../fun3d.nml")
+    assert nml["reference_physical_properties"]["angle_of_attack"] == pytest.approx(4.0)
+    assert nml["new_group"]["value"] == 2
+    assert "new_group" not in f90nml.read("../fun3d.nml")
+
+    renderer.clear_overlay("../fun3d.nml")
+    assert "new_group" not in renderer.read_namelist("../fun3d.nml")
+
+
+def test_overlays_are_kept_for_each_cycle(run_directory):
+    renderer = InputRenderer()
+    renderer.set_overlay("../fun3d.nml", {"reference_physical_properties": {"angle_of_attack": 1.0}}, 1)
+    renderer.set_overlay("../fun3d.nml", {"new_group": {"value": 2}}, 2)
+    renderer.set_overlay("../fun3d.nml", {"reference_physical_properties": {"angle_of_attack": 3.0}}, 10)
+
+    # an overlay applies from its cycle on
+    def angle_of_attack(istep):
+        return renderer.read_namelist("../fun3d.nml", istep)["reference_physical_properties"]["angle_of_attack"]
+    assert angle_of_attack(2) == pytest.approx(1.0)
+    assert angle_of_attack(10) == pytest.approx(3.0)
+    assert angle_of_attack(None) == pytest.approx(3.0)
+    assert "new_group" not in renderer.read_namelist("../fun3d.nml", 1)
+    assert renderer.read_namelist("../fun3d.nml", 3)["new_group"]["value"] == 2
+
+    overlays = InputRenderer().get_overlays_by_cycle("../fun3d.nml")
+    assert sorted(overlays) == [1, 2, 10]
+    assert overlays[1] == {"reference_physical_properties": {"angle_of_attack": 1.0}}
+
+    renderer.clear_overlay("../fun3d.nml")
+    assert renderer.get_overlays_by_cycle("../fun3d.nml") == {}
+
+
+def test_template_changes_invalidate_cache(run_directory):
+    renderer = InputRenderer()
+    renderer.read_namelist("../fun3d.nml")
+    nml = f90nml.read("../fun3d.nml")
+    nml["project"]["project_rootname"] = "edited"
+    nml.write("../fun3d.nml", force=True)
+    assert renderer.read_namelist("../fun3d.nml")["project"]["project_rootname"] == "edited"
+
+
+def test_write_only_when_changed(run_directory):
+    renderer = InputRenderer()
+    assert renderer.render_namelist("../fun3d.nml", "fun3d.nml")
+    os.utime("fun3d.nml", ns=(0, 0))
+    assert not renderer.render_namelist("../fun3d.nml", "fun3d.nml")
+    assert os.stat("fun3d.nml").st_mtime_ns == 0
+
+    renderer.set_overlay("../fun3d.nml", {"project": {"project_rootname": "other"}}, 1)
+    assert renderer.render_namelist("../fun3d.nml", "fun3d.nml")
+    assert f90nml.read("fun3d.nml")["project"]["project_rootname"] == "other"
+
+
+def test_render_sfe_cfg(run_directory):
+    renderer = InputRenderer()
+    assert renderer.render_sfe_cfg("../sfe.cfg", "sfe.cfg")
+    with open("sfe.cfg") as fh:
+        assert fh.read().startswith("! comment")
+    assert not renderer.render_sfe_cfg("../sfe.cfg", "sfe.cfg")
+
+    renderer.set_overlay("../sfe.cfg", {"cfl_max": 50.0}, 1)
+    assert renderer.render_sfe_cfg("../sfe.cfg", "sfe.cfg")
+    sfe_cfg = SFEconfig("sfe.cfg")
+    assert sfe_cfg["cfl_max"] == pytest.approx(50.0)
+    assert sfe_cfg["nonlinear_iterations"] == 10
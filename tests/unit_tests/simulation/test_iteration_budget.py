@@ -0,0 +1,83 @@
+import f90nml
+import numpy as np
+import pytest
+
+from pyrefine.post_processing.fun3d_hist_file import Fun3dHistFile
+from pyrefine.simulation.iteration_budget import IterationBudget
+
+
+def write_hist(filename, iterations_to_converge, iterations_run):
+    with open(filename, 'w') as fh:
+        fh.write('TITLE="test"\nVARIABLES="Iteration" "R_1" "C_L"\nZONE  I=1 F=POINT\n')
+        for i in range(1, iterations_run + 1):
+            residual = 10.0 ** (-6.5 * i / iterations_to_converge)
+            fh.write(f'{i} {residual:.10e} {0.3:.10e}\n')
+
+
+def create_nml():
+    nml = f90nml.Namelist()
+    nml['code_run_control'] = {'steps': 5000}
+    nml['nonlinear_solver_parameters'] = {'schedule_iteration': [1, 1000], 'schedule_cfl': [10.0, 200.0]}
+    return nml
+
+
+@pytest.fixture
+def budget(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return IterationBudget('test')
+
+
+def test_iterations_needed(budget: IterationBudget):
+    write_hist('test01_hist.dat', 1000, 2000)
+    hist = Fun3dHistFile('test01_hist.dat', use_cache=False)
+    assert budget.find_iterations_needed(hist) == pytest.approx(924, abs=2)
+    budget.residual_drop_orders = 20.0
+    assert budget.find_iterations_needed(hist) is None
+
+
+def test_steps_follow_the_history(budget: IterationBudget):
+    nml = create_nml()
+    budget.update_nml(1, nml, 1000.0)
+    assert nml['code_run_control']['steps'] == 5000
+
+    write_hist('test01_hist.dat', 2000, 5000)
+    nml = create_nml()
+    budget.update_nml(2, nml, 1000.0)
+    needed = budget.history[-1]['iterations_needed']
+    assert nml['code_run_control']['steps'] == int(np.ceil(needed * budget.safety_factor))
+    ramp = nml['nonlinear_solver_parameters']['schedule_iteration']
+    assert ramp[0] == 1 and ramp[1] < 1000
+
+    # the complexity changed, so the margin is larger and the ramp is kept
+    write_hist('test02_hist.dat', 400, 3000)
+    nml = create_nml()
+    budget.update_nml(3, nml, 2000.0)
+    assert nml['code_run_control']['steps'] == min(int(np.ceil(max(needed, 370) * 1.5 * 2.0)), 5000)
+    budget.maximum_steps = 10000
+    assert budget.predict_steps(budget.maximum_steps, complexity_changed=True) == int(np.ceil(needed * 3.0))
+    assert nml['nonlinear_solver_parameters']['schedule_iteration'] == [1, 1000]
+
+
+def test_unconverged_cycle_and_cap(budget: IterationBudget):
+    budget.update_nml(1, create_nml(), 1000.0)
+    write_hist('test01_hist.dat', 10000, 3000)
+    nml = create_nml()
+    budget.update_nml(2, nml, 1000.0)
+    assert budget.history[-1]['iterations_needed'] is None
+    assert nml['code_run_control']['steps'] == 5000
+
+    # the unconverged cycle ran 3000 iterations, independent of the complexity change factor
+    budget.complexity_change_factor = 10.0
+    budget.unconverged_factor = 1.2
+    assert budget.predict_steps() == int(np.ceil(3000 * 1.2 * 1.5))
+
+
+def test_restart_from_history_file(budget: IterationBudget):
+    budget.update_nml(1, create_nml(), 1000.0)
+    write_hist('test01_hist.dat', 400, 3000)
+
+    restarted = IterationBudget('test')
+    nml = create_nml()
+    restarted.update_nml(2, nml, 1000.0)
+    assert restarted.history[0]['istep'] == 1
+    assert nml['code_run_control']['steps'] < 5000
@@ -0,0 +1,199 @@
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from pyrefine.post_processing.fun3d_hist_file import Fun3dHistFile
+from pyrefine.post_processing.solb_file import SolbFile, write_solb
+from pyrefine.simulation.job_monitor import Fun3dConvergenceMonitor, SnapshotReducer
+
+header = 'TITLE="test"\nVARIABLES="Iteration" "R_1" "C_L" "C_D"\nZONE  I=1 F=POINT\n'
+
+
+def hist_lines(iterations, residual_slope=-0.01, force_oscillation=0.0):
+    lines = []
+    for i in iterations:
+        residual = 10.0 ** max(residual_slope * i, -6.0)
+        lift = 0.3 + force_oscillation * np.sin(i) + 0.1 * np.exp(-0.05 * i)
+        lines.append(f'{i} {residual:.10e} {lift:.10e} {0.02:.10e}\n')
+    return ''.join(lines)
+
+
+def write_hist(filename, iterations, **kwargs):
+    with open(filename, 'w') as fh:
+        fh.write(header + hist_lines(iterations, **kwargs))
+    return Fun3dHistFile(filename, use_cache=False)
+
+
+@pytest.fixture
+def monitor():
+    monitor = Fun3dConvergenceMonitor('test', poll_interval=0.01)
+    monitor.minimum_iterations = 10
+    return monitor
+
+
+def test_residual_drop(monitor: Fun3dConvergenceMonitor, tmp_path):
+    monitor.residual_drop_orders = 3.0
+    assert monitor.check_criteria(write_hist(tmp_path / 'a_hist.dat', range(1, 200))) == []
+    assert len(monitor.check_criteria(write_hist(tmp_path / 'b_hist.dat', range(1, 400)))) == 1
+
+
+def test_force_variation_and_stall(monitor: Fun3dConvergenceMonitor, tmp_path):
+    monitor.force_variation_tolerance = 1e-3
+    monitor.force_window = 50
+    assert monitor.check_criteria(write_hist(tmp_path / 'a_hist.dat', range(1, 100), force_oscillation=0.01)) == []
+    assert len(monitor.check_criteria(write_hist(tmp_path / 'b_hist.dat', range(1, 400)))) == 1
+
+    monitor.force_variation_tolerance = None
+    monitor.stall_orders = 0.1
+    monitor.stall_window = 100
+    assert monitor.check_criteria(write_hist(tmp_path / 'c_hist.dat', range(1, 500))) == []
+    assert len(monitor.check_criteria(write_hist(tmp_path / 'd_hist.dat', range(1, 800)))) == 1
+
+
+def test_require_all_criteria(monitor: Fun3dConvergenceMonitor, tmp_path):
+    monitor.residual_drop_orders = 3.0
+    monitor.force_variation_tolerance = 1e-3
+    monitor.force_window = 50
+    hist = write_hist(tmp_path / 'a_hist.dat', range(1, 400), force_oscillation=0.01)
+    assert len(monitor.check_criteria(hist)) == 1
+    monitor.require_all_criteria = True
+    assert monitor.check_criteria(hist) == []
+
+
+def test_stop_file_written_while_job_runs(monitor: Fun3dConvergenceMonitor, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monitor.residual_drop_orders = 2.0
+    with open('killsign', 'w') as fh:
+        fh.write('left over from an earlier job\n')
+
+    with monitor.monitoring(3, 'flow'):
+        assert not os.path.exists('killsign')
+        with open('test03_hist.dat', 'w') as fh:
+            fh.write(header)
+            for start in range(1, 1000, 50):
+                fh.write(hist_lines(range(start, start + 50)))
+                fh.flush()
+                time.sleep(0.02)
+                if os.path.exists('killsign'):
+                    break
+        assert os.path.exists('killsign')
+
+    assert not os.path.exists('killsign')
+    stop_iteration = monitor.stop_iterations['flow03']
+    assert 200 <= stop_iteration < 1000
+    with open('convergence_monitor.log') as fh:
+        log = fh.read()
+    assert 'flow03: requested stop at iteration' in log
+    assert f'flow03: stopped at iteration {stop_iteration}' in log
+
+
+def test_malformed_hist_line_stops_the_monitor(monitor: Fun3dConvergenceMonitor, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monitor.residual_drop_orders = 2.0
+    with monitor.monitoring(2, 'flow'):
+        with open('test02_hist.dat', 'w') as fh:
+            fh.write(header + hist_lines(range(1, 20)) + '20 garbage 0.3 0.02\n')
+        monitor._thread.join(timeout=5.0)
+        assert not monitor._thread.is_alive()
+
+    with open('convergence_monitor.log') as fh:
+        log = fh.read()
+    assert 'flow02: stopped monitoring:' in log
+    assert 'flow02: could not read the final iteration' in log
+    assert 'flow02' not in monitor.stop_iterations
+
+
+def test_other_jobs_are_not_monitored(monitor: Fun3dConvergenceMonitor, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with monitor.monitoring(1, 'adjoint'):
+        pass
+    assert not os.path.exists('convergence_monitor.log')
+
+
+@pytest.mark.parametrize('use_inotify', [True, False])
+def test_snapshot_reducer_consumes_snapshots_while_job_runs(tmp_path, monkeypatch, use_inotify):
+    monkeypatch.chdir(tmp_path)
+    reducer = SnapshotReducer('test', poll_interval=0.01)
+    reducer.use_inotify = use_inotify
+    reducer.delete_consumed_snapshots = True
+    reducer.set_timestep_range(20, 100)
+    snapshots = {timestep: np.random.default_rng(timestep).random((50, 2)) for timestep in range(10, 130, 10)}
+
+    with reducer.monitoring(2, 'metric'):
+        for timestep, values in snapshots.items():
+            write_solb(f'test02_volume_timestep{timestep}.solb', values)
+            time.sleep(0.02)
+        time.sleep(0.1)
+        assert len([name for name in os.listdir('.') if '_volume_timestep' in name]) <= 4
+
+    reduced = np.array([values[:, 0] for timestep, values in snapshots.items() if 20 <= timestep <= 100])
+    assert reducer.consumed_timesteps == list(range(20, 110, 10))
+    assert np.allclose(SolbFile('test02_snapshot_mean.solb').values[:, 0], np.mean(reduced, axis=0))
+    assert np.allclose(SolbFile('test02_snapshot_rms.solb').values[:, 0], np.sqrt(np.mean(reduced**2, axis=0)))
+    assert np.array_equal(SolbFile('test02_snapshot_max.solb').values[:, 0], np.max(reduced, axis=0))
+    assert sorted(name for name in os.listdir('.') if '_volume_timestep' in name) == \
+        ['test02_volume_timestep10.solb', 'test02_volume_timestep110.solb', 'test02_volume_timestep120.solb']
+    with open('test02_snapshot_summary.json') as fh:
+        summary = json.load(fh)
+    assert summary['number_of_snapshots'] == 9
+    assert summary['statistics_written']
+
+
+def test_snapshot_reducer_ignores_snapshots_of_earlier_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    reducer = SnapshotReducer('test', poll_interval=0.01)
+    write_solb('test01_volume_timestep10.solb', np.full(5, 100.0))
+
+    with reducer.monitoring(1, 'unsteady'):
+        time.sleep(0.05)
+        write_solb('test01_volume_timestep20.solb', np.ones(5))
+        with open('test01_volume_timestep30.solb', 'wb') as fh:
+            fh.write(b'\x01\x00\x00\x00')
+
+    assert reducer.consumed_timesteps == [20]
+    assert np.array_equal(SolbFile('test01_snapshot_max.solb').values[:, 0], np.ones(5))
+
+
+def test_snapshot_reducer_stops_job_once_statistics_converge(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    reducer = SnapshotReducer('test', poll_interval=0.01)
+    reducer.statistics_tolerance = 1e-2
+    reducer.minimum_snapshots = 5
+    rng = np.random.default_rng(0)
+    mean_field = 1.0 + rng.random(40)
+
+    with reducer.monitoring(3, 'metric'):
+        for timestep in range(10, 2010, 10):
+            write_solb(f'test03_volume_timestep{timestep}.solb', mean_field + 0.1 * rng.standard_normal(40))
+            time.sleep(0.01)
+            if os.path.exists('killsign'):
+                break
+        assert os.path.exists('killsign')
+
+    assert not os.path.exists('killsign')
+    assert reducer.stopped_at_timestep is not None
+    assert reducer.stopped_at_timestep < 2000
+    assert max(reducer.relative_changes[-reducer.convergence_window:]) < reducer.statistics_tolerance
+    with open('test03_snapshot_summary.json') as fh:
+        summary = json.load(fh)
+    assert summary['stopped_at_timestep'] == reducer.stopped_at_timestep
+    assert summary['relative_changes'][0] is None
+
+
+def test_snapshot_reducer_convergence_needs_minimum_snapshots_and_window():
+    reducer = SnapshotReducer('test')
+    reducer.statistics_tolerance = 1e-3
+    reducer.minimum_snapshots = 4
+    reducer.consumed_timesteps = [1, 2, 3, 4]
+    reducer.relative_changes = [np.inf, 1e-2, 1e-4, 1e-4]
+    assert not reducer.statistics_converged()
+    reducer.convergence_window = 2
+    assert reducer.statistics_converged()
+    reducer.consumed_timesteps = [1, 2, 3]
+    assert not reducer.statistics_converged()
+    reducer.statistics_tolerance = None
+    reducer.consumed_timesteps = [1, 2, 3, 4]
+    assert not reducer.statistics_converged()
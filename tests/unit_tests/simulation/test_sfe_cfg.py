@@ -122,6 +122,147 @@ def test_creating_sfe_cfg_from_scratch():
         cfg.write(output_file, force=True)
 
 
+class LegacySFEconfig(SFEconfig):
+    """
+    The original array conversion and writer, kept as the oracle for the property tests
+    """
+
+    def _convert_parentheses_arrays_to_numpy(self):
+        array_keys = []
+        for array_key in self.keys():
+            strip_key = array_key.split('(')[0]
+            if '(' in array_key and strip_key not in array_keys:
+                array_keys.append(strip_key)
+
+        for array_key in array_keys:
+            for key, value in self.items():
+                if array_key in key:
+                    dtype = type(self._convert_type(value))
+                    ndims = key.count(',') + 1
+                    break
+            dims = np.ones(ndims, dtype=int)
+            for key in self.keys():
+                if array_key == self._strip_parentheses_from_key(key):
+                    for dim in range(ndims):
+                        dims[dim] = np.max((dims[dim], self._legacy_index(key, dim) + 1))
+            array = np.zeros(dims, dtype=dtype)
+
+            old_keys = []
+            for key, value in self.items():
+                if array_key == self._strip_parentheses_from_key(key):
+                    index = tuple(self._legacy_index(key, dim) for dim in range(array.ndim))
+                    array[index] = self._convert_type(value)
+                    old_keys.append(key)
+            for key in old_keys:
+                self.pop(key)
+            self[array_key] = array
+
+    def _legacy_index(self, key, dim):
+        return int(key.split('(')[1].split(')')[0].split(',')[dim])
+
+    def _write_array(self, array_key, value, fh):
+        for index in np.ndindex(value.shape):
+            index_string = ','.join(str(i) for i in index)
+            self._write_single_value(f'{array_key}({index_string})', value[index], fh)
+
+    def _write_single_value(self, key, value, fh):
+        if isinstance(value, (bool, np.bool_)):
+            value = '.true.' if value else '.false.'
+        fh.write(f'{key} = {value}\n')
+
+
+def random_value(rng, kind):
+    if kind == 'int':
+        return int(rng.integers(-1000, 1000))
+    if kind == 'float':
+        return float(rng.normal() * 10.0 ** rng.integers(-8, 8))
+    if kind == 'bool':
+        return bool(rng.integers(2))
+    return str(rng.choice(['surface', 'wall', 'farfield', 'hello world']))
+
+
+def format_random_value(value):
+    if isinstance(value, bool):
+        return '.true.' if value else '.false.'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def create_random_cfg_text(rng):
+    lines = ['! randomly generated configuration']
+    for ientry in range(rng.integers(5, 30)):
+        name = f'k{ientry:03d}x'
+        entry_type = rng.choice(['scalar', 'plus', 'array'])
+        if entry_type == 'scalar':
+            value = random_value(rng, rng.choice(['int', 'float', 'bool', 'str']))
+            lines.append(f'{name} = {format_random_value(value)}  ! trailing comment')
+        elif entry_type == 'plus':
+            values = [random_value(rng, 'int') for _ in range(rng.integers(2, 6))]
+            lines.append(f'{name} = {" + ".join(str(abs(value)) for value in values)}')
+        else:
+            ndim = int(rng.integers(1, 5))
+            shape = rng.integers(1, 4, size=ndim)
+            if ndim == 4:
+                shape[3] = shape[2]
+            kind = rng.choice(['int', 'float', 'bool'])
+            indices = list(np.ndindex(tuple(shape)))
+            rng.shuffle(indices)
+            # leave some elements out so the unset elements are zero filled
+            for index in indices[:max(1, int(rng.integers(len(indices) // 2, len(indices) + 1)))]:
+                index_string = ','.join(str(i) for i in index)
+                lines.append(f'{name}({index_string}) = {format_random_value(random_value(rng, kind))}')
+    return '\n'.join(lines) + '\n'
+
+
+def assert_configs_equal(cfg, expected, check_order=True):
+    if check_order:
+        assert list(cfg.keys()) == list(expected.keys())
+    assert sorted(cfg.keys()) == sorted(expected.keys())
+    for key, value in expected.items():
+        if isinstance(value, np.ndarray):
+            assert cfg[key].dtype == value.dtype
+            assert np.array_equal(cfg[key], value)
+        else:
+            assert type(cfg[key]) is type(value)
+            assert cfg[key] == value
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_sfe_cfg_matches_legacy_implementation(seed, tmp_path):
+    rng = np.random.default_rng(seed)
+    input_file = str(tmp_path / 'sfe.cfg')
+    with open(input_file, 'w') as fh:
+        fh.write(create_random_cfg_text(rng))
+
+    cfg = SFEconfig(input_file, convert_read_arrays=True)
+    legacy_cfg = LegacySFEconfig(input_file, convert_read_arrays=True)
+    assert_configs_equal(cfg, legacy_cfg)
+
+    legacy_cfg.write(str(tmp_path / 'legacy.cfg'))
+    with open(tmp_path / 'legacy.cfg') as fh:
+        assert cfg.to_string() == fh.read()
+
+    # converted arrays are written as indexed entries, which move behind the scalars when read again
+    cfg.write(str(tmp_path / 'round_trip.cfg'))
+    round_trip_cfg = SFEconfig(str(tmp_path / 'round_trip.cfg'), convert_read_arrays=True)
+    assert_configs_equal(round_trip_cfg, cfg, check_order=False)
+
+
+def test_writing_4d_arrays_with_different_last_dimensions(tmp_path):
+    cfg = SFEconfig()
+    cfg['table'] = np.arange(6).reshape((1, 1, 2, 3))
+    cfg.write(str(tmp_path / 'sfe.cfg'))
+
+    read_cfg = SFEconfig(str(tmp_path / 'sfe.cfg'), convert_read_arrays=True)
+    assert np.array_equal(read_cfg['table'], cfg['table'])
+
+
+def test_reading_string_arrays_without_truncation(tmp_path):
+    with open(tmp_path / 'sfe.cfg', 'w') as fh:
+        fh.write('bc(0) = wall\nbc(1) = farfield\n')
+    cfg = SFEconfig(str(tmp_path / 'sfe.cfg'), convert_read_arrays=True)
+    assert list(cfg['bc']) == ['wall', 'farfield']
+
+
 if __name__ == "__main__":
     cfg = SFEconfig(f'{test_directory}/sfe_cfg_test_files/sfe_test0.cfg', convert_read_arrays=True)
     test_reading_floats_from_sfe_cfg(cfg)
@@ -142,6 +142,50 @@ def test_fv_command_list_skip_external_distance(fv: SimulationFun3dFV):
         assert c == e
 
 
+def test_fv_command_list_distance_computed_by_refine(fv: SimulationFun3dFV, tmp_path):
+    istep = 4
+    job_name = "flow"
+    fv.project_name = "test"
+    fv.distance_computed_by_refine = True
+    expected = ['printf "Flow4 Start Time: " && date',
+                "mpiexec nodet_mpi &> flow04.out", 'printf "Flow4 End Time: " && date']
+
+    with cd(str(tmp_path)):
+        open("test04.lb8.ugrid", "w").close()
+        commands = fv._create_list_of_commands_to_run(istep, job_name)
+        assert len(commands) == len(expected) + 1
+
+        open("test04-distance.solb", "w").close()
+        os.utime("test04.lb8.ugrid", ns=(1_000_000_000, 1_000_000_000))
+        commands = fv._create_list_of_commands_to_run(istep, job_name)
+        assert commands == expected
+
+        # a distance field from an earlier attempt at an older mesh is not used
+        os.utime("test04-distance.solb", ns=(500_000_000, 500_000_000))
+        commands = fv._create_list_of_commands_to_run(istep, job_name)
+        assert len(commands) == len(expected) + 1
+
+
+def test_fv_command_list_cached_distance(fv: SimulationFun3dFV, tmp_path):
+    istep = 4
+    job_name = "flow"
+    fv.project_name = "test"
+    fv.distance.cache_directory = str(tmp_path / "cache")
+    expected = ['printf "Flow4 Start Time: " && date',
+                "mpiexec nodet_mpi &> flow04.out", 'printf "Flow4 End Time: " && date']
+
+    with cd(str(tmp_path)):
+        open("test04.lb8.ugrid", "w").close()
+        commands = fv._create_list_of_commands_to_run(istep, job_name)
+        assert len(commands) == len(expected) + 1
+
+        open("test04-distance.solb", "w").close()
+        fv._check_for_distance_file(istep)
+        commands = fv._create_list_of_commands_to_run(istep, job_name)
+        assert os.path.islink("test04-distance.solb")
+    assert commands == expected
+
+
 def test_check_for_distance_file(fv: SimulationFun3dFV):
     with cd(test_dir):
         istep = 2
@@ -146,3 +146,34 @@ def test_fun3d_adjoint_command(sim_no_input_files: SimulationFun3dSFEAdjointNoIn
 
     with pytest.raises(FileNotFoundError):
         sim_no_input_files._run_adjoint_simulation(step)
+
+
+class PbsRecorder(PBS):
+    def __init__(self, profile_filename=""):
+        self.launched_jobs = {}
+        super().__init__(profile_filename=profile_filename)
+
+    def launch(self, job_name, job_body) -> str:
+        self.launched_jobs[job_name] = job_body
+
+
+def test_batched_phases_keep_omp_settings(sim_no_input_files: SimulationFun3dSFEAdjointNoInputFiles, tmp_path):
+    pbs = PbsRecorder()
+    pbs.mpiexec = "mpirun"
+    sim_no_input_files.pbs = pbs
+    sim_no_input_files.batch_phases = True
+
+    with cd(str(tmp_path)):
+        # the spy does not run the phase hooks, so the output checks are never recorded as completed
+        with pytest.raises(RuntimeError):
+            sim_no_input_files.run(5)
+
+    job_body = pbs.launched_jobs["phases05"]
+    forward = "OMP_NUM_THREADS=2 OMP_PLACES=cores OMP_PROC_BIND=close mpirun --npernode 20 nodet_mpi &> forward05.out"
+    adjoint = "OMP_NUM_THREADS=20 OMP_PLACES=cores OMP_PROC_BIND=close mpirun --npernode 2 nodet_mpi &> adjoint05.out"
+    assert job_body.index("cp fun3d.nml_forward05 fun3d.nml") < job_body.index(forward)
+    assert job_body.index("cp sfe.cfg_adjoint05 sfe.cfg") < job_body.index(adjoint)
+    assert job_body.index(forward) < job_body.index(adjoint)
+    hooks = [command for command in job_body if "pyrefine.phase_hook" in command]
+    assert len(hooks) == 2
+    assert '{"omp_threads": 20}' in hooks[1]
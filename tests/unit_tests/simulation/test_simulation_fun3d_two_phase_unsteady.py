@@ -1,12 +1,16 @@
+import json
 import os
 
 import f90nml
+import numpy as np
 import pytest
 from pbs4py import FakePBS
 
 from pyrefine.directory_utils import cd
+from pyrefine.post_processing.solb_file import write_solb
 from pyrefine.simulation.fun3d_two_phase_unsteady import (
     SimulationFun3dTwoPhase, SimulationSFETwoPhase)
+from pyrefine.simulation.job_monitor import Fun3dConvergenceMonitor, SnapshotReducer
 
 test_dir = f"{os.path.dirname(os.path.abspath(__file__))}/test_fun3d_two_phase_unsteady_files"
 
@@ -117,3 +121,108 @@ def test_sfe_expected_file_list(sfe: SimulationSFETwoPhase):
     assert len(actual) == len(expected)
     for a in actual:
         assert a in expected
+
+
+def write_fake_solver(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    scripts = {"nodet_mpi": "grep -c on_nohistorykept fun3d.nml >> nodet_calls.txt\n"
+                            "test -e killsign && echo killed >> stopped_by_killsign.txt\n"
+                            "touch sphere04_volume.solb sphere04_volume_timestep10.solb\n",
+               "refmpi": "echo distance >> distance_calls.txt\ntouch sphere04-distance.solb\n"}
+    for name, body in scripts.items():
+        script = bin_dir / name
+        script.write_text(f"#!/bin/sh\n{body}")
+        script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    # FakePBS runs the commands with /bin/sh, which would put the solver in the background with '&>'
+    monkeypatch.setattr(FakePBS, "_redirect_shell_output", lambda pbs, filename: f"> {filename} 2>&1")
+
+    nml = f90nml.read(f"{test_dir}/fun3d.nml")
+    nml["project"] = {"project_rootname": "sphere"}
+    nml["special_parameters"] = {"distance_from_file": ""}
+    nml.write(str(tmp_path / "fun3d.nml"))
+    (tmp_path / "Flow").mkdir()
+
+
+@pytest.mark.parametrize("batch_phases, expected_jobs", [(False, ["transient04", "metric04"]), (True, ["phases04"])])
+def test_fv_run_phases(fv: SimulationFun3dTwoPhase, tmp_path, monkeypatch, batch_phases, expected_jobs):
+    write_fake_solver(tmp_path, monkeypatch)
+    launched_jobs = []
+    launch = FakePBS.launch
+
+    def record_launch(pbs, job_name, job_body, *args, **kwargs):
+        launched_jobs.append(job_name)
+        return launch(pbs, job_name, job_body, *args, **kwargs)
+
+    monkeypatch.setattr(FakePBS, "launch", record_launch)
+    fv.pbs.mpiexec = ""
+    fv.batch_phases = batch_phases
+    with cd(str(tmp_path / "Flow")):
+        fv.run(4)
+        assert launched_jobs == expected_jobs
+        with open("nodet_calls.txt") as fh:
+            assert fh.read().split() == ["0", "1"]
+        with open("distance_calls.txt") as fh:
+            distance_calls = len(fh.read().split())
+    assert distance_calls == (1 if batch_phases else 2)
+
+
+def test_fv_run_batched_phases_with_snapshot_reducer(fv: SimulationFun3dTwoPhase, tmp_path, monkeypatch):
+    write_fake_solver(tmp_path, monkeypatch)
+    fv.pbs.mpiexec = ""
+    fv.batch_phases = True
+    reducer = SnapshotReducer(fv_project, poll_interval=0.01)
+    reducer.use_inotify = False
+    fv.job_monitors = [reducer]
+    with cd(str(tmp_path / "Flow")):
+        write_solb("sphere04_volume_timestep10.solb", np.arange(3.0))
+        fv.run(4)
+        assert reducer.job_name == "metric"
+        assert reducer.consumed_timesteps == [10]
+        with open("sphere04_snapshot_summary.json") as fh:
+            assert json.load(fh)["job"] == "metric04"
+
+
+def test_fv_run_batched_phases_removes_stop_file(fv: SimulationFun3dTwoPhase, tmp_path, monkeypatch):
+    write_fake_solver(tmp_path, monkeypatch)
+    fv.pbs.mpiexec = ""
+    fv.batch_phases = True
+    with cd(str(tmp_path / "Flow")):
+        with open("killsign", "w") as fh:
+            fh.write("\n")
+        fv.run(4)
+        assert not os.path.exists("stopped_by_killsign.txt")
+
+
+def test_fv_run_batched_phases_rejects_convergence_monitor(fv: SimulationFun3dTwoPhase, tmp_path, monkeypatch):
+    write_fake_solver(tmp_path, monkeypatch)
+    fv.batch_phases = True
+    monitor = Fun3dConvergenceMonitor(fv_project)
+    monitor.job_names = ["transient"]
+    fv.job_monitors = [monitor]
+    with cd(str(tmp_path / "Flow")):
+        with pytest.raises(ValueError):
+            fv.run(4)
+
+
+def test_fv_run_batched_phases_failed_hook(fv: SimulationFun3dTwoPhase, tmp_path, monkeypatch):
+    write_fake_solver(tmp_path, monkeypatch)
+    fv.pbs.mpiexec = ""
+    fv.batch_phases = True
+    fv.metric_frequency = 20
+    with cd(str(tmp_path / "Flow")):
+        with pytest.raises(RuntimeError):
+            fv.run(4)
+        with open("phases04_hooks.out") as fh:
+            assert "sphere04_volume_timestep20.solb" in fh.read()
+
+
+def test_fv_metric_file_check_accepts_reduced_snapshots(fv: SimulationFun3dTwoPhase, tmp_path):
+    fv.metric_frequency = 10
+    with cd(str(tmp_path)):
+        with pytest.raises(FileNotFoundError):
+            fv._check_for_metric_file(2)
+        with open("sphere02_snapshot_summary.json", "w") as fh:
+            fh.write('{"number_of_snapshots": 1}')
+        fv._check_for_metric_file(2)
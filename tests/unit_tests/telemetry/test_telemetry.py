@@ -0,0 +1,68 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from pyrefine.telemetry import AdaptationTelemetry
+
+
+def record_a_cycle(telemetry: AdaptationTelemetry):
+    telemetry.start_cycle(3)
+    with telemetry.phase("simulation"):
+        pass
+    telemetry.record_mesh_size(12345, {"simulation": 4, "refine": 1})
+    telemetry.record_monitor_values({"R_1": 1.5e-9, "C_L": 0.3})
+    telemetry.record_complexity(20000.0)
+
+
+def test_state_from_events():
+    telemetry = AdaptationTelemetry("om6")
+    record_a_cycle(telemetry)
+    with telemetry.phase("simulation"):
+        pass
+    state = telemetry.snapshot()
+    assert state["cycle"] == 3
+    assert state["phase"] is None
+    assert state["complexity"] == 20000.0
+    assert state["vertex_count"] == 12345
+    assert state["node_requests"] == {"simulation": 4, "refine": 1}
+    assert state["monitor_values"]["R_1"] == pytest.approx(1.5e-9)
+    assert state["total_phase_durations"]["simulation"] >= state["phase_durations"]["simulation"]
+
+
+def test_prometheus_text():
+    telemetry = AdaptationTelemetry('wing "a"')
+    record_a_cycle(telemetry)
+    text = telemetry.to_prometheus_text()
+    assert '# TYPE pyrefine_cycle gauge' in text
+    assert 'pyrefine_cycle{project="wing \\"a\\""} 3.0' in text
+    assert 'pyrefine_node_request{project="wing \\"a\\"",component="simulation"} 4.0' in text
+    assert 'pyrefine_monitor_value{project="wing \\"a\\"",variable="C_L"} 0.3' in text
+    assert 'pyrefine_phase{' not in text
+
+
+def test_event_log_replay(tmp_path):
+    event_log = str(tmp_path / "telemetry_events.jsonl")
+    telemetry = AdaptationTelemetry("om6", event_log)
+    record_a_cycle(telemetry)
+
+    restarted = AdaptationTelemetry("om6", event_log)
+    restarted.load_event_log()
+    assert restarted.snapshot() == telemetry.snapshot()
+
+
+def test_metrics_server():
+    telemetry = AdaptationTelemetry("om6")
+    record_a_cycle(telemetry)
+    port = telemetry.start_server(0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert "text/plain" in response.headers["Content-Type"]
+            assert "pyrefine_vertex_count" in response.read().decode()
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics.json") as response:
+            assert json.loads(response.read())["complexity"] == 20000.0
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/missing")
+    finally:
+        telemetry.stop_server()
@@ -0,0 +1,179 @@
+import os
+import subprocess
+import time
+
+import pytest
+from pbs4py import PBS, FakePBS
+
+import pyrefine.work_queue as work_queue
+from pyrefine.simulation.fun3d import SimulationFun3dFV
+from pyrefine.work_queue import FileWorkQueue, PersistentWorkerLauncher
+
+
+@pytest.fixture
+def launcher(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    launcher = PersistentWorkerLauncher(FakePBS())
+    launcher.detach_worker_launch = True
+    launcher.idle_timeout = 30.0
+    launcher.heartbeat_interval = 0.1
+    launcher.poll_interval = 0.05
+    yield launcher
+    launcher.stop_worker()
+    queue = FileWorkQueue(launcher.queue_directory)
+    if queue.get_worker_status(heartbeat_timeout=5.0) != 'absent':
+        wait_for_worker_status(queue, 'exited')
+
+
+def wait_for_worker_status(queue: FileWorkQueue, status: str, timeout: float = 20.0):
+    start = time.time()
+    while queue.get_worker_status(heartbeat_timeout=5.0) != status:
+        if time.time() - start > timeout:
+            raise TimeoutError(f'worker did not reach status {status}')
+        time.sleep(0.05)
+
+
+def record_worker_launches(monkeypatch):
+    launched_jobs = []
+    launch = FakePBS.launch
+
+    def record_launch(pbs, job_name, job_body, *args, **kwargs):
+        launched_jobs.append(job_name)
+        return launch(pbs, job_name, job_body, *args, **kwargs)
+
+    monkeypatch.setattr(FakePBS, 'launch', record_launch)
+    return launched_jobs
+
+
+def test_tasks_are_claimed_in_order_once(tmp_path):
+    queue = FileWorkQueue(str(tmp_path / 'queue'))
+    first = queue.submit('flow01', ['echo 1'])
+    second = queue.submit('flow02', ['echo 2'])
+
+    task = queue.claim()
+    assert task['task_id'] == first
+    assert task['working_directory'] == os.path.abspath('.')
+    assert queue.requeue_running_tasks() == [first]
+    assert queue.claim()['task_id'] == first
+    assert queue.claim()['task_id'] == second
+    assert queue.claim() is None
+
+    queue.complete(task, [0, 2])
+    assert queue.get_result(first)['number_of_failures'] == 1
+    assert queue.get_result(second) is None
+    assert os.listdir(tmp_path / 'queue' / 'running') == [f'{second}.json']
+
+
+def test_worker_is_reused_between_jobs(launcher: PersistentWorkerLauncher, monkeypatch):
+    launched_jobs = record_worker_launches(monkeypatch)
+    launcher.add_startup_command('echo started >> startup.txt')
+    launcher.add_startup_command('echo started >> startup.txt')
+
+    assert launcher.launch('flow01', ['echo flow01 > flow01.txt', 'false']) == 'PersistentWorker.1'
+    assert launcher.launch('flow02', ['echo flow02 > flow02.txt']) == 'PersistentWorker.0'
+
+    assert launched_jobs == ['worker']
+    with open('flow02.txt') as fh:
+        assert fh.read() == 'flow02\n'
+    with open('startup.txt') as fh:
+        assert fh.read() == 'started\n'
+    assert launcher.create_mpi_command('nodet_mpi', 'flow01') == FakePBS().create_mpi_command('nodet_mpi', 'flow01')
+
+
+def test_worker_is_relaunched_after_idle_timeout(launcher: PersistentWorkerLauncher, monkeypatch):
+    launched_jobs = record_worker_launches(monkeypatch)
+    launcher.idle_timeout = 0.2
+
+    assert launcher.launch('flow01', ['true']) == 'PersistentWorker.0'
+    wait_for_worker_status(FileWorkQueue(launcher.queue_directory), 'exited')
+    assert launcher.launch('flow02', ['true']) == 'PersistentWorker.0'
+    assert launched_jobs == ['worker', 'worker']
+
+
+def test_worker_is_relaunched_when_node_request_changes(launcher: PersistentWorkerLauncher, monkeypatch):
+    launched_jobs = record_worker_launches(monkeypatch)
+    launcher.requested_number_of_nodes = 2
+
+    assert launcher.launch('flow01', ['true']) == 'PersistentWorker.0'
+    launcher.requested_number_of_nodes = 2
+    assert launcher.launch('flow02', ['true']) == 'PersistentWorker.0'
+    assert launched_jobs == ['worker']
+
+    launcher.requested_number_of_nodes = 4
+    assert launcher.pbs.requested_number_of_nodes == 4
+    assert 'requested_number_of_nodes' not in vars(launcher)
+    assert launcher.launch('flow03', ['true']) == 'PersistentWorker.0'
+    assert launched_jobs == ['worker', 'worker']
+
+
+def test_tasks_of_dead_worker_are_requeued(launcher: PersistentWorkerLauncher, monkeypatch):
+    deleted_jobs = []
+    monkeypatch.setattr(launcher, '_delete_job', deleted_jobs.append)
+    queue = FileWorkQueue(launcher.queue_directory)
+    launcher._start_session(queue)
+    task_id = queue.submit('flow01', ['echo rerun > flow01.txt'])
+    queue.claim()
+    queue._write_json(queue.heartbeat_filename, {'state': 'running', 'time': time.time() - 1000.0,
+                                                 'job_id': '1234.pbs'})
+
+    assert launcher.wait(queue, task_id)['number_of_failures'] == 0
+    with open('flow01.txt') as fh:
+        assert fh.read() == 'rerun\n'
+    assert deleted_jobs == ['1234.pbs']
+
+
+def test_worker_that_exits_before_starting_is_relaunched(launcher: PersistentWorkerLauncher, monkeypatch):
+    launched_jobs = record_worker_launches(monkeypatch)
+    launcher.python_command = 'false'
+    launcher.max_worker_launches = 2
+
+    with pytest.raises(RuntimeError):
+        launcher.launch('flow01', ['true'])
+    assert launched_jobs == ['worker', 'worker']
+
+
+def test_worker_job_that_left_the_queue_is_not_waited_for(tmp_path, monkeypatch):
+    qstat_calls = []
+
+    def qstat(command, **kwargs):
+        qstat_calls.append(command)
+        return subprocess.CompletedProcess(command, returncode=153)
+
+    monkeypatch.setattr(work_queue.subprocess, 'run', qstat)
+    launcher = PersistentWorkerLauncher(PBS(), queue_directory=str(tmp_path / 'queue'))
+    launcher._worker_launch_time = time.time()
+    launcher._worker_job_id = '1234.pbs'
+
+    assert not launcher._worker_is_starting(FileWorkQueue(launcher.queue_directory))
+    assert qstat_calls == [['qstat', '1234.pbs']]
+
+
+def test_launch_limit_is_checked_before_launching(launcher: PersistentWorkerLauncher, monkeypatch):
+    launched_jobs = record_worker_launches(monkeypatch)
+    launcher.python_command = 'false'
+    launcher.worker_start_timeout = 0.0
+    launcher.max_worker_launches = 1
+
+    with pytest.raises(RuntimeError):
+        launcher.launch('flow01', ['true'])
+    assert launched_jobs == ['worker']
+    assert os.listdir(os.path.join(launcher.queue_directory, 'pending')) == []
+
+
+def test_stale_tasks_are_discarded(launcher: PersistentWorkerLauncher):
+    queue = FileWorkQueue(launcher.queue_directory)
+    queue.submit('flow01', ['echo stale > stale.txt'])
+
+    assert launcher.launch('flow02', ['true']) == 'PersistentWorker.0'
+    assert not os.path.exists('stale.txt')
+
+
+def test_mps_is_started_once_per_worker(launcher: PersistentWorkerLauncher):
+    simulation = SimulationFun3dFV('test', launcher)
+    simulation.external_wall_distance = False
+    simulation.launch_mps = True
+
+    command_list = simulation._create_list_of_commands_to_run(1, 'flow')
+    assert not any('nvidia-cuda-mps-control' in command for command in command_list)
+    assert len(launcher.startup_commands) == 1
+    assert 'nvidia-cuda-mps-control -d' in launcher.startup_commands[0]